@@ -0,0 +1,315 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "biolexica",
+#     "click",
+#     "semra",
+#     "ssslm[gilda-slim]",
+# ]
+#
+# [tool.uv.sources]
+# biolexica = { path = "..", editable = true  }
+# ///
+
+"""Benchmark building, loading, and applying the committed lexica.
+
+Each benchmark runs in a fresh process, so loads are really cold and the peak resident
+set size (RSS) of the process can be measured. Grounding and annotation use a synthetic
+corpus made from each lexicon's own texts with a fixed seed, so it's the same on every
+run. Results are compared to the baselines in ``baselines.json`` and the script fails if
+any benchmark got slower or used more memory than allowed. Baselines are only compared
+in the same environment (Python minor version, operating system, machine type, and
+number of CPUs) they were saved in. Otherwise, the results are only reported. Run with
+``--save`` to update the baselines, e.g., after an intentional change or on a new
+machine.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import click
+
+HERE = Path(__file__).parent.resolve()
+ROOT = HERE.parent
+LEXICA = ROOT.joinpath("lexica")
+BASELINES_PATH = HERE.joinpath("baselines.json")
+
+#: Lexica with committed literal mappings files
+LEXICON_KEYS = sorted(
+    path.parent.name for path in LEXICA.glob("*/*.ssslm.tsv.gz") if path.name.count(".") == 3
+)
+
+#: The seed for generating the synthetic corpus
+SEED = 0
+#: The number of mentions to ground
+NUMBER_MENTIONS = 10_000
+#: The number of documents to annotate
+NUMBER_DOCUMENTS = 500
+#: Words that go between mentions in the synthetic corpus
+FILLER = (  # noqa:SIM905
+    "the of and in a was with were to for that by is on from as patients cells these "
+    "study results showed we found expression increased after compared than observed"
+).split()
+
+
+def _get_path(key: str) -> Path:
+    return LEXICA.joinpath(key, f"{key}.ssslm.tsv.gz")
+
+
+def _get_texts(key: str) -> list[str]:
+    """Get the texts from a lexicon's literal mappings file, without parsing it."""
+    with gzip.open(_get_path(key), "rt") as file:
+        next(file)
+        return [line.split("\t", 1)[0] for line in file]
+
+
+def _get_mentions(key: str) -> list[str]:
+    """Get texts that are exact, case-varied, and non-matching mentions."""
+    texts = _get_texts(key)
+    rng = random.Random(SEED)  # noqa:S311
+    rv = []
+    for text in rng.sample(texts, min(NUMBER_MENTIONS, len(texts))):
+        match rng.randrange(4):
+            case 0:
+                rv.append(text.lower())
+            case 1:
+                rv.append(text.upper())
+            case 2:
+                rv.append(f"{text} {rng.choice(FILLER)}")
+            case _:
+                rv.append(text)
+    return rv
+
+
+def _get_documents(key: str) -> list[str]:
+    """Get documents with several sentences, each with filler words and mentions."""
+    texts = _get_texts(key)
+    rng = random.Random(SEED)  # noqa:S311
+    documents = []
+    for _ in range(NUMBER_DOCUMENTS):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(FILLER, k=rng.randint(8, 20))
+            for _ in range(rng.randint(1, 3)):
+                words.insert(rng.randrange(len(words)), rng.choice(texts))
+            sentences.append(" ".join(words).capitalize() + ".")
+        documents.append(" ".join(sentences))
+    return documents
+
+
+def _load_cold(key: str) -> dict[str, Any]:
+    import biolexica
+
+    start = time.perf_counter()
+    biolexica.load_grounder(_get_path(key), snapshot=False)
+    return {"seconds": time.perf_counter() - start}
+
+
+def _load_snapshot(key: str) -> dict[str, Any]:
+    import biolexica
+
+    start = time.perf_counter()
+    biolexica.load_grounder(_get_path(key))
+    return {"seconds": time.perf_counter() - start}
+
+
+def _load_shared(key: str) -> dict[str, Any]:
+    import biolexica
+
+    start = time.perf_counter()
+    biolexica.load_grounder(_get_path(key), shared=True)
+    return {"seconds": time.perf_counter() - start}
+
+
+def _ground(key: str) -> dict[str, Any]:
+    import biolexica
+
+    grounder = biolexica.load_grounder(_get_path(key))
+    mentions = _get_mentions(key)
+    grounder.get_matches(mentions[0])
+    start = time.perf_counter()
+    for mention in mentions:
+        grounder.get_matches(mention)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "mentions_per_second": len(mentions) / seconds}
+
+
+def _annotate(key: str) -> dict[str, Any]:
+    import biolexica
+
+    grounder = biolexica.load_grounder(_get_path(key))
+    documents = _get_documents(key)
+    grounder.annotate(documents[0])
+    start = time.perf_counter()
+    for document in documents:
+        grounder.annotate(document)
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "documents_per_second": len(documents) / seconds,
+        "characters_per_second": sum(map(len, documents)) / seconds,
+    }
+
+
+def _assemble(key: str) -> dict[str, Any]:
+    import semra
+
+    import biolexica
+
+    # the semra configuration is only imported by biolexica for type checking
+    biolexica.Configuration.model_rebuild(_types_namespace={"semra": semra})
+    configuration = biolexica.Configuration(
+        inputs=[biolexica.Input(processor="ssslm", source=_get_path(key).as_posix())]
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        biolexica.assemble_terms(
+            configuration,
+            include_biosynonyms=False,
+            processed_path=Path(directory, "processed.ssslm.tsv.gz"),
+            summary_path=Path(directory, "summary.json"),
+        )
+        return {"seconds": time.perf_counter() - start}
+
+
+#: Benchmarks, which are each run for each lexicon
+BENCHMARKS: dict[str, Callable[[str], dict[str, Any]]] = {
+    "load_cold": _load_cold,
+    "load_snapshot": _load_snapshot,
+    "load_shared": _load_shared,
+    "ground": _ground,
+    "annotate": _annotate,
+    "assemble": _assemble,
+}
+
+
+def _get_environment() -> dict[str, Any]:
+    # only coarse fields, since e.g. the kernel or patch version changes on every CI image
+    # without changing the timings much, and the tolerances absorb the rest
+    return {
+        "python": ".".join(platform.python_version_tuple()[:2]),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _run_in_subprocess(*args: str) -> dict[str, Any]:
+    result = subprocess.run(  # noqa:S603
+        [sys.executable, __file__, *args], check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])  # type:ignore[no-any-return]
+
+
+def _compare(
+    name: str, result: dict[str, Any], baseline: dict[str, Any] | None, tolerances: dict[str, float]
+) -> list[str]:
+    if baseline is None:
+        return []
+    return [
+        f"{name} {metric}: {result[metric]:,.2f} > {baseline[metric]:,.2f} + {tolerance:.0%}"
+        for metric, tolerance in tolerances.items()
+        if metric in baseline and result[metric] > baseline[metric] * (1 + tolerance)
+    ]
+
+
+@click.group(invoke_without_command=True)
+@click.option("--lexicon", "keys", multiple=True, type=click.Choice(LEXICON_KEYS))
+@click.option("--benchmark", "names", multiple=True, type=click.Choice(list(BENCHMARKS)))
+@click.option("--save", is_flag=True, help="Save the results as the new baselines")
+@click.option("--time-tolerance", type=float, default=0.25, show_default=True)
+@click.option("--memory-tolerance", type=float, default=0.10, show_default=True)
+@click.pass_context
+def main(
+    ctx: click.Context,
+    keys: tuple[str, ...],
+    names: tuple[str, ...],
+    save: bool,
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> None:
+    """Run benchmarks and compare them to the baselines."""
+    if ctx.invoked_subcommand is not None:
+        return
+
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.is_file() else {}
+    environment = _get_environment()
+    # timings and memory from another machine aren't comparable, so they'd fail at random
+    comparable = baselines.get("environment") == environment
+    if baselines and not comparable:
+        click.secho(
+            f"not comparing to baselines from a different environment: "
+            f"{baselines.get('environment')}\nrun with --save to save baselines for this "
+            f"one: {environment}",
+            fg="yellow",
+        )
+    tolerances = {"seconds": time_tolerance, "peak_rss_mb": memory_tolerance}
+
+    results = dict(baselines.get("results", {})) if save else {}
+    regressions = []
+    for key in keys or LEXICON_KEYS:
+        # write the snapshot and shared index first, so they're not part of the loads
+        _run_in_subprocess("prepare", key)
+        for name in names or BENCHMARKS:
+            full_name = f"{name}[{key}]"
+            result = _run_in_subprocess("worker", name, key)
+            baseline = baselines.get("results", {}).get(full_name) if comparable else None
+            regressions.extend(_compare(full_name, result, baseline, tolerances))
+            results[full_name] = result
+            click.echo(
+                f"{full_name:<24} {result['seconds']:>9.3f} s {result['peak_rss_mb']:>9,.1f} MB"
+                + (
+                    f" (baseline {baseline['seconds']:.3f} s, {baseline['peak_rss_mb']:,.1f} MB)"
+                    if baseline
+                    else ""
+                )
+            )
+
+    if save:
+        BASELINES_PATH.write_text(
+            json.dumps({"environment": environment, "results": results}, indent=2) + "\n"
+        )
+        click.echo(f"saved baselines to {BASELINES_PATH}")
+    elif regressions:
+        click.secho("\n".join(["regressions:", *regressions]), fg="red")
+        sys.exit(1)
+
+
+@main.command(hidden=True)
+@click.argument("key")
+def prepare(key: str) -> None:
+    """Write the snapshot and shared index for a lexicon."""
+    import biolexica
+
+    biolexica.load_grounder(_get_path(key))
+    biolexica.load_grounder(_get_path(key), shared=True)
+    click.echo(json.dumps({}))
+
+
+@main.command(hidden=True)
+@click.argument("name")
+@click.argument("key")
+def worker(name: str, key: str) -> None:
+    """Run a single benchmark and output its results as JSON."""
+    result = BENCHMARKS[name](key)
+    # on Linux, this is in kilobytes, and on macOS, in bytes
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_mb"] = max_rss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    click.echo(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
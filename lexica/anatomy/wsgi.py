@@ -1,6 +1,22 @@
-"""Run the anatomy grounder API."""
+"""Run the anatomy grounder API.
 
-from ssslm.web import run_app
+The grounder is loaded from a memory-mapped index, so when this is run with several
+workers, e.g., with ``gunicorn -w 4 -k uvicorn.workers.UvicornWorker wsgi:app``, the
+workers share the same memory instead of each loading their own copy of the lexicon.
+Besides grounding one text per request, the app grounds and annotates texts in batches
+(see :mod:`biolexica.web`).
+"""
+
+from pathlib import Path
+
+from biolexica.web import get_app
+
+HERE = Path(__file__).parent.resolve()
+PATH = HERE.joinpath("anatomy.ssslm.tsv.gz")
+
+app = get_app(PATH.as_posix())
 
 if __name__ == "__main__":
-    run_app("anatomy.ssslm.tsv.gz")
+    import uvicorn
+
+    uvicorn.run(app)
@@ -1,9 +1,8 @@
 #!/bin/sh
 
-# This script runs all of the lexica generation scripts
+# This script builds all of the lexica. The lexica with configurations are built
+# together, so the inputs that they share are only extracted once.
 
 set -x
-uv run --script anatomy/generate.py
-uv run --script cell/generate.py
-uv run --script phenotype/generate.py
+uv run --extra gilda-slim biolexica build anatomy cell phenotype --workers 4
 uv run --script obo/generate.py
@@ -30,6 +30,7 @@ HERE = Path(__file__).parent.resolve()
 LITERAL_MAPPINGS_PATH = HERE.joinpath("cell.ssslm.tsv.gz")
 GILDA_PATH = HERE.joinpath("terms.tsv.gz")
 SUMMARY_PATH = HERE.joinpath("summary.json")
+MANIFEST_PATH = HERE.joinpath("manifest.json")
 
 
 def _main() -> None:
@@ -39,6 +40,8 @@ def _main() -> None:
         processed_path=LITERAL_MAPPINGS_PATH,
         gilda_path=GILDA_PATH,
         summary_path=SUMMARY_PATH,
+        manifest_path=MANIFEST_PATH,
+        cache=biolexica.InputCache(),
     )
 
 
@@ -19,28 +19,161 @@
 #
 # ///
 
-"""Generate a lexical index for OBO Foundry ontologies."""
+"""Generate a lexical index for OBO Foundry ontologies.
 
+Ontologies are extracted concurrently by a pool of worker processes. Their literal
+mappings are written to the output as soon as they're ready, in the order of their
+prefixes, so the output is the same regardless of how many workers are used. The
+literal mappings for each ontology are stored in an input cache (for up to
+``UNVERSIONED_MAX_AGE`` if its version can't be resolved) and the status of each
+ontology (whether it succeeded, how long it took, and how many literal mappings it
+had, or else the error) is saved to ``status.json`` after it finishes, along with the
+key of its literal mappings in the cache. If the build is interrupted, running it
+again with ``--resume`` reuses the literal mappings of each ontology that finished
+from that key, without resolving its version again. This way, resuming works for all
+ontologies, including ones whose versions can't be resolved.
+
+Ontologies that failed in a previous run are tried again, since most failures (e.g.,
+of the network) are transient. With ``--skip-failed``, ones that failed for the same
+version (i.e., the same key in the cache) are skipped instead, and are listed at the
+end. The workers don't evict entries from the cache, since they'd remove the same
+ones at the same time. Instead, entries are evicted once after all ontologies finish.
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
+from typing import Any
 
 import bioregistry
 import click
 import ssslm
 from tqdm import tqdm
-from tqdm.contrib.logging import logging_redirect_tqdm
 
-from biolexica import get_literal_mappings, summarize_terms
+from biolexica import Input, InputCache, get_literal_mappings, write_terms
 
 HERE = Path(__file__).parent.resolve()
 LITERAL_MAPPINGS_PATH = HERE.joinpath("obo.ssslm.tsv.gz")
 GILDA_PATH = HERE.joinpath("terms.tsv.gz")
 SUMMARY_PATH = HERE.joinpath("summary.json")
+STATUS_PATH = HERE.joinpath("status.json")
 CACHE = HERE.joinpath("cache")
-CACHE.mkdir(exist_ok=True, parents=True)
+
+#: How long to reuse the literal mappings for ontologies whose versions can't be
+#: resolved, which would otherwise be extracted again on every run
+UNVERSIONED_MAX_AGE = datetime.timedelta(days=30)
+
+#: The result of extracting an ontology, its status, and the error, if it failed
+Result = tuple[list[ssslm.LiteralMapping], dict[str, Any]]
+
+
+def _extract(
+    prefix: str, cache: InputCache, finished_key: str | None, failed_key: str | None
+) -> Result:
+    """Get the literal mappings for an ontology, in a worker process.
+
+    If the ontology finished in a run that's being resumed, its literal mappings are
+    loaded from the key recorded in the status, if they're still in the cache. If it
+    failed before with the given key and it's still the same, it's skipped.
+    """
+    start = time.time()
+    literal_mappings = cache.get(finished_key) if finished_key is not None else None
+    if literal_mappings is not None:
+        key: str | None = finished_key
+    else:
+        key = cache.get_key(Input(source=prefix, processor="bioontologies"))
+        literal_mappings = cache.get(key)
+    cached = literal_mappings is not None
+    if literal_mappings is None:
+        if failed_key is not None and key == failed_key:
+            return [], {"status": "skipped", "key": key}
+        try:
+            literal_mappings = get_literal_mappings(prefix, processor="bioontologies")
+        except Exception as e:  # noqa:BLE001
+            # any failure of a single ontology is recorded, so the rest can go on
+            return [], {
+                "status": "failure",
+                "seconds": round(time.time() - start, 3),
+                "error": f"{type(e).__name__}: {e}",
+                "key": key,
+            }
+        cache.put(key, literal_mappings)
+    return literal_mappings, {
+        "status": "success",
+        "seconds": round(time.time() - start, 3),
+        "count": len(literal_mappings),
+        "cached": cached,
+        "key": key,
+    }
+
+
+def _iter_results(
+    prefixes: list[str],
+    cache: InputCache,
+    workers: int,
+    finished_keys: dict[str, str],
+    failed_keys: dict[str, str],
+) -> Iterable[tuple[str, Result]]:
+    """Extract ontologies in a process pool, yielding results in order.
+
+    Only a limited number of ontologies are submitted ahead of the one being waited
+    for, so the results held in memory at once stay bounded.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        pending: dict[str, Future[Result]] = {}
+        remaining = iter(prefixes)
+        for prefix in remaining:
+            pending[prefix] = executor.submit(
+                _extract, prefix, cache, finished_keys.get(prefix), failed_keys.get(prefix)
+            )
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            prefix = next(iter(pending))
+            result = pending.pop(prefix).result()
+            if (following := next(remaining, None)) is not None:
+                pending[following] = executor.submit(
+                    _extract,
+                    following,
+                    cache,
+                    finished_keys.get(following),
+                    failed_keys.get(following),
+                )
+            yield prefix, result
+
+
+def _write_status(status: dict[str, dict[str, Any]]) -> None:
+    """Write the status atomically, so an interruption never leaves a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=HERE, prefix=f".{STATUS_PATH.name}.")
+    with os.fdopen(fd, "w") as file:
+        json.dump(status, file, indent=2, sort_keys=True)
+    os.replace(tmp, STATUS_PATH)
 
 
 @click.command()
-def main() -> None:
+@click.option(
+    "--workers",
+    type=int,
+    default=min(8, os.cpu_count() or 1),
+    show_default=True,
+    help="The number of ontologies to extract concurrently",
+)
+@click.option(
+    "--skip-failed",
+    is_flag=True,
+    help="Skip ontologies that failed in a previous run, unless their versions changed",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Reuse the ontologies that finished in a previous, interrupted run as they were",
+)
+def main(workers: int, skip_failed: bool, resume: bool) -> None:
     """Generate a lexical index for OBO Foundry ontologies."""
     skip = {"pr"}
     prefixes = sorted(
@@ -52,28 +185,73 @@ def main() -> None:
         and resource.prefix not in skip
     )
 
-    literal_mappings: list[ssslm.LiteralMapping] = []
-    for prefix in tqdm(prefixes, unit="ontology", desc="Extracting OBO literal mappings"):
-        path = CACHE.joinpath(prefix).with_suffix(".ssslm.tsv.gz")
-        if path.is_file():
-            literal_mappings.extend(ssslm.read_literal_mappings(path))
-        else:
-            with logging_redirect_tqdm():
-                try:
-                    local_literal_mappings = list(
-                        get_literal_mappings(prefix, processor="bioontologies")
-                    )
-                except ValueError as e:
-                    tqdm.write(click.style(f"Failed to parse {prefix}: {e}", fg="red"))
-                    continue
-                ssslm.write_literal_mappings(path=path, literal_mappings=local_literal_mappings)
-            literal_mappings.extend(local_literal_mappings)
-
-    ssslm.write_literal_mappings(path=LITERAL_MAPPINGS_PATH, literal_mappings=literal_mappings)
-    ssslm.write_gilda_terms(literal_mappings, GILDA_PATH)
-
-    summary = summarize_terms(literal_mappings)
-    SUMMARY_PATH.write_text(summary.model_dump_json(indent=2))
+    status: dict[str, dict[str, Any]] = (
+        json.loads(STATUS_PATH.read_text()) if STATUS_PATH.is_file() else {}
+    )
+    failed_keys = (
+        {
+            prefix: prefix_status["key"]
+            for prefix, prefix_status in status.items()
+            if prefix_status.get("status") == "failure" and prefix_status.get("key")
+        }
+        if skip_failed
+        else {}
+    )
+
+    # workers don't evict, since they'd all remove the same entries at the same time
+    cache = InputCache(CACHE, unversioned_max_age=UNVERSIONED_MAX_AGE, evict_on_put=False)
+    finished_keys = (
+        {
+            prefix: prefix_status["key"]
+            for prefix, prefix_status in status.items()
+            if prefix_status.get("status") == "success" and prefix_status.get("key")
+        }
+        if resume
+        else {}
+    )
+
+    def _iter_literal_mappings() -> Iterable[ssslm.LiteralMapping]:
+        results = tqdm(
+            _iter_results(prefixes, cache, workers, finished_keys, failed_keys),
+            total=len(prefixes),
+            unit="ontology",
+            desc="Extracting OBO literal mappings",
+        )
+        for prefix, (literal_mappings, prefix_status) in results:
+            if prefix_status["status"] == "skipped":
+                # the failure from before is kept, so it's skipped again next time
+                skipped.append(prefix)
+                continue
+            if prefix_status["status"] == "failure":
+                tqdm.write(
+                    click.style(f"Failed to parse {prefix}: {prefix_status['error']}", fg="red")
+                )
+            status[prefix] = prefix_status
+            _write_status(status)
+            yield from literal_mappings
+
+    skipped: list[str] = []
+    write_terms(
+        _iter_literal_mappings(),
+        processed_path=LITERAL_MAPPINGS_PATH,
+        gilda_path=GILDA_PATH,
+        summary_path=SUMMARY_PATH,
+    )
+    cache.evict()
+    hits = sum(bool(status.get(prefix, {}).get("cached")) for prefix in prefixes)
+    failures = sum(status.get(prefix, {}).get("status") == "failure" for prefix in prefixes)
+    tqdm.write(
+        f"Reused {hits:,} cached ontologies, extracted {len(prefixes) - hits - failures:,}, "
+        f"and failed to extract {failures - len(skipped):,}"
+    )
+    if skipped:
+        tqdm.write(
+            click.style(
+                f"Skipped {len(skipped):,} ontologies that failed before for the same "
+                f"version: {', '.join(skipped)}",
+                fg="yellow",
+            )
+        )
 
 
 if __name__ == "__main__":
@@ -25,11 +25,11 @@ from bioliterature.annotate import AnnotatedArticle
 from pubmed_downloader import iterate_process_articles
 from tabulate import tabulate
 
-from biolexica import load_grounder
+from biolexica import CachingGrounder, load_grounder
 
 
 def _main() -> None:
-    grounder = load_grounder("phenotype")
+    grounder = CachingGrounder(load_grounder("phenotype"))
 
     annotated_articles = []
     for article, _ in zip(iterate_process_articles(), range(100000), strict=False):
@@ -42,6 +42,9 @@ def _main() -> None:
         )
         annotated_articles.append(annotated_article)
 
+    for level, info in grounder.cache_info().items():
+        click.echo(f"{level} cache hit rate: {info.hit_rate:.1%} of {info.hits + info.misses:,}")
+
     reference_counter = count_references(annotated_articles)
     co_occurrence_counter = count_cooccurrences(annotated_articles)
 
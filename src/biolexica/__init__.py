@@ -1,25 +1,83 @@
-"""Generate and apply coherent biomedical lexica."""
-
-from .api import (
-    PREDEFINED,
-    Configuration,
-    Input,
-    Processor,
-    assemble_grounder,
-    assemble_terms,
-    get_literal_mappings,
-    load_grounder,
-    summarize_terms,
-)
+"""Generate and apply coherent biomedical lexica.
+
+The public API is imported lazily on first use, so importing :mod:`biolexica` (e.g.,
+for its command line interface) doesn't import heavy dependencies like :mod:`ssslm`.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .annotate import annotate_corpus
+    from .api import (
+        PREDEFINED,
+        Configuration,
+        Input,
+        Processor,
+        assemble_grounder,
+        assemble_terms,
+        get_literal_mappings,
+        iter_terms,
+        load_grounder,
+        stream_terms,
+        write_terms,
+    )
+    from .cache import InputCache
+    from .memoize import CachingGrounder
+    from .store import LexiconStore
+    from .summary import summarize_terms
 
 __all__ = [
     "PREDEFINED",
+    "CachingGrounder",
     "Configuration",
     "Input",
+    "InputCache",
+    "LexiconStore",
     "Processor",
+    "annotate_corpus",
     "assemble_grounder",
     "assemble_terms",
     "get_literal_mappings",
+    "iter_terms",
     "load_grounder",
+    "stream_terms",
     "summarize_terms",
+    "write_terms",
 ]
+
+#: The submodule that each public name is imported from
+_SUBMODULES = {
+    "PREDEFINED": "api",
+    "CachingGrounder": "memoize",
+    "Configuration": "api",
+    "Input": "api",
+    "InputCache": "cache",
+    "LexiconStore": "store",
+    "Processor": "api",
+    "annotate_corpus": "annotate",
+    "assemble_grounder": "api",
+    "assemble_terms": "api",
+    "get_literal_mappings": "api",
+    "iter_terms": "api",
+    "load_grounder": "api",
+    "stream_terms": "api",
+    "summarize_terms": "summary",
+    "write_terms": "api",
+}
+
+
+def __getattr__(name: str) -> Any:
+    submodule = _SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    # cache it so this isn't called again for the same name
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
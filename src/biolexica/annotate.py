@@ -0,0 +1,328 @@
+"""Annotate large corpora with a grounder, in parallel.
+
+Annotation is CPU-bound, so :func:`annotate_corpus` splits a corpus into batches that
+are annotated by a pool of worker processes, which all share the same grounder. When
+processes are started by forking (the default on Linux), the grounder is loaded once
+in the parent process and inherited by the workers. Otherwise, each worker loads it
+from a memory-mapped index (see :mod:`biolexica.index`), so the lexicon's memory is
+still shared through the operating system's page cache.
+
+.. code-block:: python
+
+    import biolexica
+
+    corpus = [("1", "B cells and T cells are lymphocytes."), ...]
+    for document_id, annotations in biolexica.annotate_corpus(corpus, "cell", workers=8):
+        ...
+"""
+
+from __future__ import annotations
+
+import gc
+import gzip
+import json
+import logging
+import multiprocessing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+import ssslm
+from curies import NamableReference
+
+if TYPE_CHECKING:
+    import pyarrow
+
+__all__ = [
+    "annotate_corpus",
+    "read_corpus",
+    "write_annotations",
+]
+
+logger = logging.getLogger(__name__)
+
+#: An annotation in a compact form that's cheap to send between processes, as the
+#: start, end, prefix, identifier, name, and score
+AnnotationTuple = tuple[int, int, str, str, str | None, float]
+
+#: A match in a compact form, as the prefix, identifier, name, and score
+MatchTuple = tuple[str, str, str | None, float]
+
+#: The grounder used by worker processes
+_GROUNDER: ssslm.Grounder | None = None
+
+
+def annotate_corpus(
+    corpus: Iterable[tuple[str, str]],
+    grounder: ssslm.GrounderHint,
+    *,
+    workers: int | None = None,
+    batch_size: int = 64,
+) -> Iterable[tuple[str, list[ssslm.Annotation]]]:
+    """Annotate each document in a corpus.
+
+    :param corpus: An iterable of pairs of document identifiers and texts. This is
+        consumed lazily, so it can be a generator over a corpus that's too big to fit
+        in memory.
+    :param grounder: A grounder, or anything that can be passed to
+        :func:`biolexica.load_grounder`, like the key for a predefined lexicon
+    :param workers: If given and more than one, the number of worker processes
+    :param batch_size: The number of documents sent to a worker process at a time
+
+    :yields: Pairs of document identifiers and their annotations, in the same order
+        as the corpus. Only a bounded number of batches are processed ahead of the one
+        being yielded, so memory doesn't grow with the size of the corpus.
+    """
+    if not workers or workers <= 1:
+        loaded = _load(grounder, shared=False)
+        for document_id, text in corpus:
+            yield document_id, loaded.annotate(text)
+        return
+
+    with _worker_pool(grounder, workers) as executor:
+        for batch, results in _iter_batch_results(executor, corpus, workers, batch_size):
+            for (document_id, text), annotation_tuples in zip(batch, results, strict=True):
+                yield document_id, [_from_tuple(text, t) for t in annotation_tuples]
+
+
+@contextmanager
+def _worker_pool(grounder: ssslm.GrounderHint, workers: int) -> Iterator[ProcessPoolExecutor]:
+    """Start a pool of worker processes that share a grounder."""
+    global _GROUNDER
+
+    context = multiprocessing.get_context()
+    if context.get_start_method() == "fork":
+        # load the grounder before forking so workers share it, and move
+        # everything allocated so far out of the garbage collector's view so it
+        # doesn't touch (and therefore copy) the shared memory pages
+        _GROUNDER = _load(grounder, shared=True)
+        gc.freeze()
+        executor = ProcessPoolExecutor(workers, mp_context=context)
+    else:
+        executor = ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_initialize, initargs=(grounder,)
+        )
+
+    try:
+        with executor:
+            yield executor
+    finally:
+        if context.get_start_method() == "fork":
+            _GROUNDER = None
+            gc.unfreeze()
+
+
+def _load(grounder: ssslm.GrounderHint, *, shared: bool) -> ssslm.Grounder:
+    if isinstance(grounder, ssslm.Grounder):
+        return grounder
+    from .api import load_grounder
+
+    return load_grounder(grounder, shared=shared)
+
+
+def _initialize(grounder: ssslm.GrounderHint) -> None:
+    """Load the grounder in a worker process that isn't forked from the parent."""
+    global _GROUNDER
+    _GROUNDER = _load(grounder, shared=True)
+
+
+def _get_worker_grounder() -> ssslm.Grounder:
+    if _GROUNDER is None:
+        raise RuntimeError("grounder was not initialized in the worker process")
+    return _GROUNDER
+
+
+def _annotate_batch(texts: list[str]) -> list[list[AnnotationTuple]]:
+    """Annotate a batch of texts in a worker process."""
+    return _annotate_texts(_get_worker_grounder(), texts)
+
+
+def _ground_batch(texts: list[str]) -> list[list[MatchTuple]]:
+    """Ground a batch of texts in a worker process."""
+    return _ground_texts(_get_worker_grounder(), texts)
+
+
+def _annotate_texts(grounder: ssslm.Grounder, texts: list[str]) -> list[list[AnnotationTuple]]:
+    return [
+        [
+            (
+                annotation.start,
+                annotation.end,
+                annotation.prefix,
+                annotation.identifier,
+                annotation.name,
+                annotation.score,
+            )
+            for annotation in grounder.annotate(text)
+        ]
+        for text in texts
+    ]
+
+
+def _ground_texts(grounder: ssslm.Grounder, texts: list[str]) -> list[list[MatchTuple]]:
+    return [
+        [
+            (match.prefix, match.identifier, match.name, match.score)
+            for match in grounder.get_matches(text)
+        ]
+        for text in texts
+    ]
+
+
+def _from_tuple(text: str, annotation_tuple: AnnotationTuple) -> ssslm.Annotation:
+    start, end, prefix, identifier, name, score = annotation_tuple
+    # the data came from a grounder, so it doesn't need to be validated again
+    return ssslm.Annotation.model_construct(
+        text=text,
+        start=start,
+        end=end,
+        match=ssslm.Match.model_construct(
+            reference=NamableReference.model_construct(
+                prefix=prefix,  # type:ignore[arg-type]
+                identifier=identifier,
+                name=name,
+            ),
+            score=score,
+        ),
+    )
+
+
+def _iter_batches(
+    corpus: Iterable[tuple[str, str]], batch_size: int
+) -> Iterator[list[tuple[str, str]]]:
+    batch: list[tuple[str, str]] = []
+    for document in corpus:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iter_batch_results(
+    executor: ProcessPoolExecutor,
+    corpus: Iterable[tuple[str, str]],
+    workers: int,
+    batch_size: int,
+) -> Iterator[tuple[list[tuple[str, str]], list[list[AnnotationTuple]]]]:
+    """Submit batches to the executor, keeping a few per worker in flight, and yield in order."""
+    pending: list[tuple[list[tuple[str, str]], Future[list[list[AnnotationTuple]]]]] = []
+    batches = _iter_batches(corpus, batch_size)
+    for batch in batches:
+        pending.append((batch, executor.submit(_annotate_batch, [text for _, text in batch])))
+        if len(pending) < 2 * workers:
+            continue
+        oldest, future = pending.pop(0)
+        yield oldest, future.result()
+    for batch, future in pending:
+        yield batch, future.result()
+
+
+def read_corpus(path: str | Path) -> Iterable[tuple[str, str]]:
+    """Read a corpus from a file.
+
+    :param path: The path to either a JSON Lines file, where each line is an object
+        with ``id`` and ``text`` keys, or a TSV file with two columns for the identifier
+        and the text, without a header. Either can be gzipped.
+
+    :yields: Pairs of document identifiers and texts
+    """
+    path = Path(path)
+    with _open(path, "r") as file:
+        if ".jsonl" in path.suffixes:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    yield str(record["id"]), record["text"]
+        else:
+            for line in file:
+                document_id, _, text = line.rstrip("\n").partition("\t")
+                yield document_id, text
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type:ignore[return-value]
+    return path.open(mode, encoding="utf-8")
+
+
+def _as_dict(annotation: ssslm.Annotation) -> dict[str, Any]:
+    return {
+        "start": annotation.start,
+        "end": annotation.end,
+        "text": annotation.substr,
+        "curie": annotation.curie,
+        "name": annotation.name,
+        "score": annotation.score,
+    }
+
+
+def write_annotations(
+    results: Iterable[tuple[str, list[ssslm.Annotation]]],
+    path: str | Path,
+    *,
+    row_group_size: int = 100_000,
+) -> int:
+    """Write annotations as they're generated.
+
+    :param results: Pairs of document identifiers and their annotations, e.g., from
+        :func:`annotate_corpus`
+    :param path: The path to write to. If it ends with ``.parquet``, a Parquet file is
+        written with one row per annotation, which requires :mod:`pyarrow`. Otherwise,
+        a JSON Lines file is written with one line per document, which is gzipped if the
+        path ends with ``.gz``.
+    :param row_group_size: The number of annotations in each row group of a Parquet
+        file, which bounds the memory used while writing
+
+    :returns: The number of documents written
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return _write_parquet(results, path, row_group_size=row_group_size)
+    count = 0
+    with _open(path, "w") as file:
+        for document_id, annotations in results:
+            record = {"id": document_id, "annotations": [_as_dict(a) for a in annotations]}
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _get_parquet_schema() -> pyarrow.Schema:
+    import pyarrow
+
+    return pyarrow.schema(
+        [
+            ("id", pyarrow.string()),
+            ("start", pyarrow.int64()),
+            ("end", pyarrow.int64()),
+            ("text", pyarrow.string()),
+            ("curie", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("score", pyarrow.float64()),
+        ]
+    )
+
+
+def _write_parquet(
+    results: Iterable[tuple[str, list[ssslm.Annotation]]], path: Path, *, row_group_size: int
+) -> int:
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = _get_parquet_schema()
+    count = 0
+    rows: list[dict[str, Any]] = []
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for document_id, annotations in results:
+            rows.extend({"id": document_id, **_as_dict(a)} for a in annotations)
+            count += 1
+            if len(rows) >= row_group_size:
+                writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+                rows = []
+        if rows:
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+    return count
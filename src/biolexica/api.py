@@ -2,21 +2,34 @@
 
 from __future__ import annotations
 
+import contextlib
 import logging
+import time
 import typing as t
 from collections import Counter
-from collections.abc import Sequence
+from collections.abc import Collection, Iterable, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Literal, TypeAlias
+from typing import TYPE_CHECKING, Any, Literal, TypeAlias, overload
 
 import ssslm
-from curies import Reference
-from pydantic import BaseModel, Field
+from curies import Reference, ReferenceTuple
+from pydantic import BaseModel, Field, field_validator
+from pystow.utils import safe_open_writer
 from ssslm import LiteralMapping
+from ssslm.model import HEADER as LITERAL_MAPPINGS_HEADER
+
+from .instrument import collect_timings, record, timed
+from .remote import ensure_lexicon
+from .summary import Summary, SummaryBuilder, summarize_terms
 
 if TYPE_CHECKING:
     import semra
 
+    from .cache import InputCache
+    from .remapping import RemappingIndex
+    from .store import LexiconStore
+
 __all__ = [
     "PREDEFINED",
     "Configuration",
@@ -25,8 +38,11 @@ __all__ = [
     "assemble_grounder",
     "assemble_terms",
     "get_literal_mappings",
+    "iter_terms",
     "load_grounder",
+    "stream_terms",
     "summarize_terms",
+    "write_terms",
 ]
 
 logger = logging.getLogger(__name__)
@@ -34,8 +50,10 @@ logger = logging.getLogger(__name__)
 HERE = Path(__file__).parent.resolve()
 LEXICA = HERE.parent.parent.joinpath("lexica")
 
-#: A processor available as a literal mapping input
-Processor: TypeAlias = Literal["pyobo", "bioontologies", "ssslm", "gilda"]
+#: The name of a processor for a literal mapping input, either a built-in one (``pyobo``,
+#: ``bioontologies``, ``ssslm``, or ``gilda``) or one registered by another package. See
+#: :mod:`biolexica.processors`.
+Processor: TypeAlias = str
 
 
 class Input(BaseModel):  # type:ignore
@@ -46,6 +64,14 @@ class Input(BaseModel):  # type:ignore
     ancestors: None | str | list[str] = None
     kwargs: dict[str, Any] | None = None
 
+    @field_validator("processor")
+    @classmethod
+    def _check_processor(cls, processor: str) -> str:
+        from .processors import get_processor
+
+        get_processor(processor)
+        return processor
+
 
 class Configuration(BaseModel):
     """A configuration for construction of a lexicon."""
@@ -55,15 +81,57 @@ class Configuration(BaseModel):
         default=None,
         description="A list of CURIEs to exclude after processing is complete",
     )
-    mapping_configuration: semra.Configuration | None = None
+    mapping_configuration: semra.Configuration | None = Field(
+        None,
+        description="A configuration for assembling semantic mappings with semra, which are "
+        "used to remap literal mappings. The prioritized mappings are cached in the "
+        "configuration's directory, keyed on its hash.",
+    )
 
 
 PREDEFINED: TypeAlias = Literal["cell", "anatomy", "phenotype", "obo"]
-URL_FMT = "https://github.com/biopragmatics/biolexica/raw/main/lexica/{key}/{key}.ssslm.tsv.gz"
 
 
-def load_grounder(grounder: ssslm.GrounderHint) -> ssslm.Grounder:
-    """Load a grounder, potentially from a remote location."""
+def load_grounder(
+    grounder: ssslm.GrounderHint,
+    *,
+    offline: bool | None = None,
+    snapshot: bool = True,
+    shared: bool = False,
+    cache: bool = False,
+    prefixes: Collection[str] | None = None,
+    sources: Collection[str] | None = None,
+) -> ssslm.Grounder:
+    """Load a grounder, potentially from a remote location.
+
+    :param grounder: A predefined lexicon's key (e.g., ``cell``) or anything that can
+        be passed to :func:`ssslm.make_grounder`
+    :param offline: If true and a predefined lexicon is given, only use a previously
+        cached copy. Defaults to the ``BIOLEXICA_OFFLINE`` environment variable.
+        See :func:`biolexica.remote.ensure_lexicon`.
+    :param snapshot: If true and the grounder comes from a local literal mappings file,
+        load it from a binary snapshot in biolexica's cache directory, if there's one
+        for the file's current contents. Otherwise, build it from the file then try to
+        write a snapshot for next time. Nothing is written next to the file. See
+        :mod:`biolexica.snapshot`.
+    :param shared: If true and the grounder comes from a local literal mappings file,
+        load it from a memory-mapped index next to the file instead of a snapshot, which
+        lets several processes (e.g., the workers of a web server) share the same
+        memory. The index is written first if it doesn't exist or is out-of-date. See
+        :mod:`biolexica.index`.
+    :param cache: If true, wrap the grounder in a :class:`biolexica.CachingGrounder`,
+        which memoizes matches for repeated spans and annotations for repeated
+        sentences. See :mod:`biolexica.memoize`.
+    :param prefixes: If given, only load literal mappings whose references have these
+        prefixes. This requires a Parquet file, like one written with the
+        ``parquet_path`` argument of :func:`assemble_terms`.
+    :param sources: If given, only load literal mappings from these sources. This also
+        requires a Parquet file.
+
+    :returns: A grounder
+
+    :raises ValueError: If prefixes or sources are given without a Parquet file
+    """
     if isinstance(grounder, str) and grounder in t.get_args(PREDEFINED):
         if LEXICA.is_dir():
             # If biolexica is installed in editable mode, try looking for
@@ -71,15 +139,67 @@ def load_grounder(grounder: ssslm.GrounderHint) -> ssslm.Grounder:
             # index directly
             grounder = LEXICA.joinpath(grounder, f"{grounder}.ssslm.tsv.gz").as_posix()
         else:
-            grounder = URL_FMT.format(key=grounder)
-    return ssslm.make_grounder(grounder)
+            # Otherwise, download the predefined index once and revalidate
+            # it on subsequent loads
+            grounder = ensure_lexicon(grounder, offline=offline).as_posix()
+    if isinstance(grounder, str | Path) and Path(grounder).suffix == ".parquet":
+        from .columnar import read_parquet_grounder
+
+        rv: ssslm.Grounder = read_parquet_grounder(grounder, prefixes=prefixes, sources=sources)
+    elif prefixes is not None or sources is not None:
+        raise ValueError("literal mappings can only be filtered when loading a Parquet file")
+    elif (shared or snapshot) and isinstance(grounder, str | Path) and Path(grounder).is_file():
+        if shared:
+            rv = _load_grounder_with_index(Path(grounder))
+        else:
+            rv = _load_grounder_with_snapshot(Path(grounder))
+    else:
+        rv = ssslm.make_grounder(grounder)
+    if cache:
+        from .memoize import CachingGrounder
+
+        return CachingGrounder(rv)
+    return rv
+
+
+def _load_grounder_with_snapshot(path: Path) -> ssslm.Grounder:
+    from .snapshot import read_snapshot, write_snapshot
+
+    rv = read_snapshot(path)
+    if rv is not None:
+        return rv
+    grounder = ssslm.make_grounder(path)
+    if isinstance(grounder, ssslm.GildaGrounder):
+        try:
+            write_snapshot(path, grounder=grounder)
+        except OSError as e:
+            # e.g., if the directory isn't writable, which is fine
+            logger.debug("could not write grounder snapshot for %s: %s", path, e)
+    return grounder
+
+
+def _load_grounder_with_index(path: Path) -> ssslm.Grounder:
+    from .index import read_index, write_index
+
+    rv = read_index(path)
+    if rv is not None:
+        return rv
+    try:
+        write_index(path)
+    except OSError as e:
+        logger.warning("could not write shared grounder index for %s: %s", path, e)
+        return _load_grounder_with_snapshot(path)
+    rv = read_index(path)
+    if rv is None:
+        raise ValueError(f"could not read shared grounder index for {path}")
+    return rv
 
 
 def assemble_grounder(
     configuration: Configuration,
     mappings: list[semra.Mapping] | None = None,
     *,
-    extra_terms: list[LiteralMapping] | None = None,
+    extra_terms: Sequence[LiteralMapping] | None = None,
     include_biosynonyms: bool = True,
 ) -> ssslm.Grounder:
     """Assemble terms from multiple resources and load into a grounder."""
@@ -92,35 +212,216 @@ def assemble_grounder(
     return ssslm.make_grounder(literal_mappings)
 
 
-def assemble_terms(  # noqa:C901
+@overload
+def assemble_terms(
     configuration: Configuration,
     mappings: list[semra.Mapping] | None = None,
     *,
-    extra_terms: list[LiteralMapping] | None = None,
+    extra_terms: Sequence[LiteralMapping] | None = None,
     include_biosynonyms: bool = True,
     raw_path: Path | None = None,
     processed_path: Path | None = None,
     gilda_path: Path | None = None,
     summary_path: Path | None = None,
-) -> list[LiteralMapping]:
-    """Assemble terms from multiple resources."""
-    terms: list[LiteralMapping] = []
-    for inp in configuration.inputs:
-        if inp.processor in {"pyobo", "bioontologies"}:
-            terms.extend(
-                get_literal_mappings(
-                    inp.source,
-                    ancestors=inp.ancestors,
-                    processor=inp.processor,
-                    **(inp.kwargs or {}),
-                )
+    parquet_path: Path | None = None,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    refresh_mappings: bool = False,
+    manifest_path: Path | None = None,
+    previous_path: Path | None = None,
+    deduplicate: bool = True,
+    compact: Literal[False] = False,
+) -> list[LiteralMapping]: ...
+
+
+@overload
+def assemble_terms(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    extra_terms: Sequence[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    raw_path: Path | None = None,
+    processed_path: Path | None = None,
+    gilda_path: Path | None = None,
+    summary_path: Path | None = None,
+    parquet_path: Path | None = None,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    refresh_mappings: bool = False,
+    manifest_path: Path | None = None,
+    previous_path: Path | None = None,
+    deduplicate: bool = True,
+    compact: Literal[True],
+) -> LexiconStore: ...
+
+
+def assemble_terms(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    extra_terms: Sequence[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    raw_path: Path | None = None,
+    processed_path: Path | None = None,
+    gilda_path: Path | None = None,
+    summary_path: Path | None = None,
+    parquet_path: Path | None = None,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    refresh_mappings: bool = False,
+    manifest_path: Path | None = None,
+    previous_path: Path | None = None,
+    deduplicate: bool = True,
+    compact: bool = False,
+) -> list[LiteralMapping] | LexiconStore:
+    """Assemble terms from multiple resources.
+
+    :param configuration: The configuration for the lexicon
+    :param mappings: Additional semantic mappings used for remapping
+    :param extra_terms: Additional literal mappings to include
+    :param include_biosynonyms: Should literal mappings from :mod:`biosynonyms` be
+        included?
+    :param raw_path: If given, where to write literal mappings before processing
+    :param processed_path: If given, where to write processed literal mappings
+    :param gilda_path: If given, where to write processed literal mappings as Gilda
+        terms
+    :param summary_path: If given, where to write a summary of the processed literal
+        mappings
+    :param parquet_path: If given, where to write processed literal mappings as a
+        Parquet file, which requires :mod:`pyarrow`. See :mod:`biolexica.columnar`.
+    :param workers: If given and more than one, extract the inputs in parallel with a
+        process pool of this size. Results are merged in the order of the inputs in the
+        configuration, so the output is the same as a serial build.
+    :param cache: If given, an input cache from which literal mappings are loaded for
+        inputs that haven't changed since they were last extracted, and in which newly
+        extracted literal mappings are stored.
+    :param refresh_mappings: If true, assemble the mappings from the configuration's
+        mapping configuration again, even if they were cached for the same
+        configuration. See :func:`biolexica.remapping.get_remapping_index`.
+    :param manifest_path: If given, where to write a manifest of which processed literal
+        mappings came from each input. If a manifest from a previous build already
+        exists there, build incrementally: the processed literal mappings for inputs
+        that haven't changed are reused from ``previous_path`` and only the other inputs
+        are extracted again. The result is the same as a full build. See
+        :mod:`biolexica.incremental`.
+    :param previous_path: The literal mappings that the manifest from the previous
+        build refers to, for an incremental build. Defaults to ``processed_path``, or
+        when deduplicating, to a file next to the manifest where the literal mappings
+        are written before deduplication (see
+        :func:`biolexica.incremental.get_segments_path`).
+    :param deduplicate: Should literal mappings with the same text, reference,
+        language, and taxon be merged, keeping the one with the best predicate and
+        combining their provenance? See :func:`biolexica.dedup.deduplicate`.
+    :param compact: If true, return the processed literal mappings in a
+        :class:`biolexica.store.LexiconStore`, which takes much less memory than a list.
+        The list is released as soon as they're stored, before they're written.
+
+    :returns: A list of processed literal mappings, or a store of them if ``compact``
+        is true
+
+    :raises ValueError: If ``raw_path`` is given with ``manifest_path``, since raw
+        literal mappings aren't available for inputs that are reused, or if
+        ``previous_path`` is ``processed_path`` when deduplicating, since the literal
+        mappings before deduplication are written there
+    """
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        if manifest_path is not None:
+            if raw_path is not None:
+                raise ValueError("raw literal mappings can't be written in an incremental build")
+
+            from .incremental import assemble_segments, read_manifest
+
+            previous_path = _get_previous_path(
+                manifest_path, processed_path, previous_path, deduplicate=deduplicate
+            )
+            terms, manifest = assemble_segments(
+                configuration,
+                _get_remapping_index(configuration, mappings, refresh=refresh_mappings),
+                extra_terms=extra_terms,
+                include_biosynonyms=include_biosynonyms,
+                workers=workers,
+                cache=cache,
+                previous_path=previous_path,
+                previous_manifest=read_manifest(manifest_path),
             )
-        elif inp.processor == "ssslm":
-            terms.extend(ssslm.read_literal_mappings(inp.source))
-        elif inp.processor == "gilda":
-            terms.extend(ssslm.read_gilda_terms(inp.source))
         else:
-            raise ValueError(f"Unknown processor {inp.processor}")
+            terms = _assemble_terms_full(
+                configuration,
+                mappings,
+                extra_terms=extra_terms,
+                include_biosynonyms=include_biosynonyms,
+                raw_path=raw_path,
+                workers=workers,
+                cache=cache,
+                refresh_mappings=refresh_mappings,
+            )
+        if cache is not None:
+            logger.info("input cache had %d hits and %d misses", cache.hits, cache.misses)
+
+        # the literal mappings before deduplication are only kept for the manifest
+        segment_terms = terms if manifest_path is not None else []
+        removed_duplicates: Counter[str] = Counter()
+        if deduplicate:
+            terms, removed_duplicates = _deduplicate(terms)
+        rv: list[LiteralMapping] | LexiconStore = terms
+        if compact:
+            from .store import LexiconStore
+
+            with timed("compact", len(terms)):
+                rv = LexiconStore(terms)
+            del terms
+
+        summary = _write_processed(
+            rv,
+            processed_path=processed_path,
+            summary_path=summary_path,
+            parquet_path=parquet_path,
+        )
+
+        if manifest_path is not None:
+            from .incremental import write_manifest
+
+            # the manifest refers to the literal mappings before deduplication
+            with timed("write_manifest", len(segment_terms)):
+                write_manifest(
+                    manifest,
+                    manifest_path,
+                    artifact_path=previous_path if deduplicate else processed_path,
+                    literal_mappings=segment_terms if deduplicate else None,
+                )
+
+        if gilda_path is not None:
+            with timed("write_gilda", len(rv)):
+                ssslm.write_gilda_terms(rv, gilda_path)
+
+        record("total", time.perf_counter() - start, len(rv))
+
+    if summary_path is not None and summary is not None:
+        summary.removed_duplicates = dict(removed_duplicates)
+        summary.timings = timings
+        summary_path.write_text(summary.model_dump_json(indent=2))
+
+    return rv
+
+
+def _assemble_terms_full(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    extra_terms: Sequence[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    raw_path: Path | None = None,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    refresh_mappings: bool = False,
+) -> list[LiteralMapping]:
+    terms: list[LiteralMapping] = []
+    for _inp, input_terms in _iter_input_literal_mappings(
+        configuration.inputs, workers=workers, cache=cache
+    ):
+        terms.extend(input_terms)
 
     if extra_terms:
         terms.extend(extra_terms)
@@ -128,49 +429,480 @@ def assemble_terms(  # noqa:C901
     if include_biosynonyms:
         import biosynonyms
 
-        terms.extend(biosynonyms.get_positive_synonyms())
+        with timed("biosynonyms") as stage:
+            biosynonyms_terms = biosynonyms.get_positive_synonyms()
+            stage.count = len(biosynonyms_terms)
+        terms.extend(biosynonyms_terms)
 
     if raw_path is not None:
         logger.info("Writing %d raw literal mappings to %s", len(terms), raw_path)
-        ssslm.write_literal_mappings(terms, raw_path)
+        with timed("write_raw", len(terms)):
+            ssslm.write_literal_mappings(terms, raw_path)
 
-    _mappings: list[semra.Mapping] = []
-    if configuration.mapping_configuration is not None:
-        from semra.pipeline import AssembleReturnType
+    remapping_index = _get_remapping_index(configuration, mappings, refresh=refresh_mappings)
+    if remapping_index:
+        with timed("remap", len(terms)):
+            remapped = remapping_index.remap(terms)
+        logger.info("remapped %d literal mappings with %r", remapped, remapping_index)
 
-        _mappings.extend(
-            configuration.mapping_configuration.get_mappings(
-                return_type=AssembleReturnType.priority
-            )
-        )
-    if mappings is not None:
-        _mappings.extend(mappings)
+    if configuration.excludes:
+        _excludes_set = set(configuration.excludes)
+        with timed("excludes") as stage:
+            terms = [term for term in terms if term.reference not in _excludes_set]
+            stage.count = len(terms)
 
-    if _mappings is not None:
-        from semra.api import assert_projection
+    return terms
 
-        assert_projection(_mappings)
-        terms = ssslm.remap_literal_mappings(
-            literal_mappings=terms,
-            mappings=[(mapping.subject, mapping.object) for mapping in _mappings],
-        )
 
-    if configuration.excludes:
-        _excludes_set = set(configuration.excludes)
-        terms = [term for term in terms if term.reference not in _excludes_set]
+def _write_processed(
+    terms: Sequence[LiteralMapping],
+    *,
+    processed_path: Path | None = None,
+    summary_path: Path | None = None,
+    parquet_path: Path | None = None,
+) -> Summary | None:
+    """Write processed literal mappings and summarize them from the same dataframe."""
+    if processed_path is None and summary_path is None and parquet_path is None:
+        return None
+
+    from .summary import (
+        get_provenance_prefixes,
+        literal_mappings_to_df,
+        summarize_df,
+        write_literal_mappings_df,
+    )
 
+    with timed("dataframe", len(terms)):
+        df = literal_mappings_to_df(terms)
     if processed_path is not None:
         logger.info("Writing %d processed literal mappings to %s", len(terms), processed_path)
-        ssslm.write_literal_mappings(terms, processed_path)
+        with timed("write_processed", len(terms)):
+            write_literal_mappings_df(df, processed_path)
+    if parquet_path is not None:
+        from .columnar import write_parquet
+
+        logger.info("Writing %d processed literal mappings to %s", len(terms), parquet_path)
+        with timed("write_parquet", len(terms)):
+            write_parquet(df, parquet_path)
+    if summary_path is None:
+        return None
+    with timed("summarize", len(terms)):
+        return summarize_df(df, get_provenance_prefixes(terms))
+
+
+def _get_previous_path(
+    manifest_path: Path,
+    processed_path: Path | None,
+    previous_path: Path | None,
+    *,
+    deduplicate: bool,
+) -> Path | None:
+    """Get where the literal mappings that a manifest refers to are written."""
+    from .incremental import get_segments_path
+
+    if previous_path is None:
+        return get_segments_path(manifest_path) if deduplicate else processed_path
+    if (
+        deduplicate
+        and processed_path is not None
+        and Path(previous_path).resolve() == Path(processed_path).resolve()
+    ):
+        # the literal mappings before deduplication would overwrite the processed ones
+        raise ValueError(
+            "the previous literal mappings can't be the processed ones when deduplicating"
+        )
+    return previous_path
 
-    if gilda_path is not None:
-        ssslm.write_gilda_terms(terms, gilda_path)
 
+def _deduplicate(terms: list[LiteralMapping]) -> tuple[list[LiteralMapping], Counter[str]]:
+    from .dedup import deduplicate
+
+    with timed("deduplicate") as stage:
+        rv, removed = deduplicate(terms)
+        stage.count = len(rv)
+    logger.info(
+        "removed %d duplicate literal mappings: %s",
+        sum(removed.values()),
+        dict(removed.most_common()),
+    )
+    return rv, removed
+
+
+def _get_remapping_index(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    refresh: bool = False,
+) -> RemappingIndex:
+    """Get an index of the prioritized mappings from the configuration and any extras."""
+    from .remapping import RemappingIndex, get_remapping_index
+
+    with timed("remapping_index") as stage:
+        if configuration.mapping_configuration is not None:
+            rv = get_remapping_index(configuration.mapping_configuration, refresh=refresh)
+        else:
+            rv = RemappingIndex()
+        if mappings is not None:
+            rv.add_mappings(mappings)
+        stage.count = len(rv)
+    return rv
+
+
+def iter_terms(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    extra_terms: Iterable[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+) -> Iterable[LiteralMapping]:
+    """Iterate over processed literal mappings, one input at a time.
+
+    Unlike :func:`assemble_terms`, remapping and excludes are applied to each literal
+    mapping as it's generated, so only the literal mappings for a single input are kept
+    in memory at a time. Arguments are the same as for :func:`assemble_terms`.
+
+    :yields: Processed literal mappings, in the order of the inputs in the
+        configuration, followed by the extra terms, then the literal mappings from
+        :mod:`biosynonyms`
+
+    .. note::
+
+        When a literal mapping is remapped, the name of the target reference comes from
+        the mapping, if available, otherwise from a previously seen literal mapping
+        for the target. Since :meth:`biolexica.remapping.RemappingIndex.remap` can also
+        use names from literal mappings that come later, the results might have fewer
+        names.
+    """
+    remapping_index = _get_remapping_index(configuration, mappings)
+    names: dict[ReferenceTuple, str] = {}
+    excludes = set(configuration.excludes or [])
+    for literal_mapping in _iter_raw_terms(
+        configuration,
+        extra_terms=extra_terms,
+        include_biosynonyms=include_biosynonyms,
+        workers=workers,
+        cache=cache,
+    ):
+        reference = literal_mapping.reference
+        if (target := remapping_index.get(reference.prefix, reference.identifier)) is not None:
+            prefix, identifier, name = target
+            literal_mapping = literal_mapping.model_copy(
+                update={
+                    "reference": reference.__class__(
+                        prefix=prefix,
+                        identifier=identifier,
+                        name=name or names.get(ReferenceTuple(prefix, identifier)),
+                    )
+                }
+            )
+        elif reference.name:
+            names.setdefault(reference.pair, reference.name)
+        if literal_mapping.reference in excludes:
+            continue
+        yield literal_mapping
+
+
+def _iter_raw_terms(
+    configuration: Configuration,
+    *,
+    extra_terms: Iterable[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+) -> Iterable[LiteralMapping]:
+    for _inp, input_terms in _iter_input_literal_mappings(
+        configuration.inputs, workers=workers, cache=cache
+    ):
+        yield from input_terms
+    if extra_terms:
+        yield from extra_terms
+    if include_biosynonyms:
+        import biosynonyms
+
+        yield from biosynonyms.get_positive_synonyms()
+
+
+def stream_terms(
+    configuration: Configuration,
+    mappings: list[semra.Mapping] | None = None,
+    *,
+    extra_terms: Iterable[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    processed_path: Path | None = None,
+    gilda_path: Path | None = None,
+    summary_path: Path | None = None,
+    parquet_path: Path | None = None,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+) -> Summary:
+    """Assemble terms and write them in a single pass, with bounded memory.
+
+    This consumes :func:`iter_terms` and writes each processed literal mapping to all
+    the given paths as it's generated, so peak memory depends on the largest single
+    input rather than on the whole lexicon. Arguments are the same as for
+    :func:`assemble_terms`.
+
+    :returns: A summary of the processed literal mappings
+
+    .. note::
+
+        Processed literal mappings are written with all columns, even if some are
+        empty, since it's not known in advance which ones will be.
+    """
+    return write_terms(
+        iter_terms(
+            configuration,
+            mappings=mappings,
+            extra_terms=extra_terms,
+            include_biosynonyms=include_biosynonyms,
+            workers=workers,
+            cache=cache,
+        ),
+        processed_path=processed_path,
+        gilda_path=gilda_path,
+        summary_path=summary_path,
+        parquet_path=parquet_path,
+    )
+
+
+def write_terms(
+    literal_mappings: Iterable[LiteralMapping],
+    *,
+    processed_path: Path | None = None,
+    gilda_path: Path | None = None,
+    summary_path: Path | None = None,
+    parquet_path: Path | None = None,
+) -> Summary:
+    """Write literal mappings to all the given paths in a single pass.
+
+    :param literal_mappings: An iterable of literal mappings, which is consumed lazily,
+        so it can be a generator that's too big to fit in memory
+    :param processed_path: If given, where to write the literal mappings
+    :param gilda_path: If given, where to write the literal mappings as Gilda terms
+    :param summary_path: If given, where to write a summary of the literal mappings
+    :param parquet_path: If given, where to write the literal mappings as a Parquet
+        file, one row group at a time
+
+    :returns: A summary of the literal mappings
+    """
+    summary_builder = SummaryBuilder()
+    with contextlib.ExitStack() as stack:
+        processed_writer = gilda_writer = parquet_writer = None
+        if parquet_path is not None:
+            from .columnar import ParquetWriter
+
+            parquet_writer = stack.enter_context(ParquetWriter(parquet_path))
+        if processed_path is not None:
+            processed_writer = stack.enter_context(safe_open_writer(processed_path))
+            processed_writer.writerow(LITERAL_MAPPINGS_HEADER)
+        if gilda_path is not None:
+            from gilda.term import TERMS_HEADER
+
+            gilda_writer = stack.enter_context(safe_open_writer(gilda_path))
+            gilda_writer.writerow(TERMS_HEADER)
+
+        for literal_mapping in literal_mappings:
+            row = literal_mapping._as_row()
+            summary_builder.add_row(row, [p.prefix for p in literal_mapping.provenance])
+            if parquet_writer is not None:
+                parquet_writer.add_row(row)
+            if processed_writer is not None:
+                processed_writer.writerow(tuple(x or "" for x in row))
+            if gilda_writer is not None:
+                _write_gilda_row(gilda_writer, literal_mapping)
+
+    summary = summary_builder.build()
+    logger.info("Wrote %d processed literal mappings", summary.count)
     if summary_path is not None:
-        summary = summarize_terms(terms)
         summary_path.write_text(summary.model_dump_json(indent=2))
+    return summary
+
+
+def _write_gilda_row(writer: Any, literal_mapping: LiteralMapping) -> None:
+    try:
+        gilda_term = literal_mapping.to_gilda()
+    except ValueError:
+        # this is the same as the "ignore" policy in ssslm.write_gilda_terms
+        return
+    writer.writerow(gilda_term.to_list())  # type:ignore[no-untyped-call]
+
+
+#: Literal mappings for an input and the number of seconds it took to get them
+Extracted: TypeAlias = tuple[list[LiteralMapping], float]
+
+
+def _get_input_literal_mappings(inp: Input) -> Extracted:
+    """Get the literal mappings for a single input, with its processor's fetch step."""
+    from .processors import get_processor
+
+    start = time.perf_counter()
+    spec = get_processor(inp.processor)
+    if spec.fetch is not None:
+        inp = spec.fetch(inp)
+    return list(spec.func(inp)), time.perf_counter() - start
 
-    return terms
+
+def _run_processor(inp: Input) -> Extracted:
+    """Get the literal mappings for a single input that has already been fetched."""
+    from .processors import get_processor
+
+    start = time.perf_counter()
+    return list(get_processor(inp.processor).func(inp)), time.perf_counter() - start
+
+
+def _extract_on_thread(inp: Input, processes: ProcessPoolExecutor) -> Extracted:
+    """Fetch an input on this thread, then get its literal mappings where they belong."""
+    from .processors import get_processor
+
+    start = time.perf_counter()
+    spec = get_processor(inp.processor)
+    if spec.fetch is not None:
+        inp = spec.fetch(inp)
+    if spec.bound == "io":
+        return list(spec.func(inp)), time.perf_counter() - start
+    fetch_seconds = time.perf_counter() - start
+    input_terms, seconds = processes.submit(_run_processor, inp).result()
+    return input_terms, fetch_seconds + seconds
+
+
+def _iter_input_literal_mappings(
+    inputs: Sequence[Input],
+    *,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+) -> Iterable[tuple[Input, list[LiteralMapping]]]:
+    """Iterate over inputs and their literal mappings, in order.
+
+    If a cache is given, inputs that are already cached are loaded from it when they're
+    yielded and the rest are stored in it after extraction. If more than one worker is
+    given, inputs that need extraction are scheduled ahead of the one being yielded:
+    CPU-bound processors run in a process pool of this size, while I/O-bound processors
+    and the fetch steps of CPU-bound processors run concurrently on threads (see
+    :mod:`biolexica.processors`). Only a few inputs per worker are scheduled ahead, so
+    when an early input is slow, the finished literal mappings of later inputs don't
+    pile up in memory. Results are yielded in the same order as the inputs.
+
+    The time spent extracting each input is recorded as the ``extract[<source>]`` stage
+    (see :mod:`biolexica.instrument`), where it's the time spent in its worker, so it
+    doesn't include waiting in the queue.
+    """
+    keys: list[str | None] = [None] * len(inputs)
+    is_cached = [False] * len(inputs)
+    if cache is not None:
+        keys = [cache.get_key(inp) for inp in inputs]
+        is_cached = [key is not None and key in cache for key in keys]
+        # the others are counted here, since they're not looked up with get()
+        cache.misses += is_cached.count(False)
+
+    if workers is None or workers <= 1 or is_cached.count(False) <= 1:
+        for inp, key, in_cache in zip(inputs, keys, is_cached, strict=True):
+            input_terms = _load_cached(cache, key) if in_cache else None
+            if input_terms is None:
+                input_terms = _extract(inp, key, cache)
+            yield inp, input_terms
+        return
+
+    yield from _iter_pooled_literal_mappings(inputs, keys, is_cached, workers, cache)
+
+
+def _iter_pooled_literal_mappings(
+    inputs: Sequence[Input],
+    keys: Sequence[str | None],
+    is_cached: Sequence[bool],
+    workers: int,
+    cache: InputCache | None,
+) -> Iterable[tuple[Input, list[LiteralMapping]]]:
+    with (
+        ProcessPoolExecutor(max_workers=workers) as processes,
+        ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="biolexica") as threads,
+    ):
+        remaining = (i for i, in_cache in enumerate(is_cached) if not in_cache)
+        futures: dict[int, Future[Extracted]] = {}
+
+        def _submit_next() -> None:
+            if (i := next(remaining, None)) is not None:
+                futures[i] = _submit(inputs[i], processes, threads)
+
+        for _ in range(WINDOW_PER_WORKER * workers):
+            _submit_next()
+        for i, (inp, key) in enumerate(zip(inputs, keys, strict=True)):
+            future = futures.pop(i, None)
+            if future is None:
+                input_terms = _load_cached(cache, key)
+                if input_terms is None:
+                    # the entry was evicted since it was checked
+                    input_terms = _extract(inp, key, cache)
+                yield inp, input_terms
+                continue
+            _submit_next()
+            try:
+                input_terms, seconds = future.result()
+            except Exception as e:
+                threads.shutdown(wait=False, cancel_futures=True)
+                processes.shutdown(wait=False, cancel_futures=True)
+                raise _get_extraction_error(inp, e) from e
+            del future
+            _record_extracted(inp, key, input_terms, seconds, cache)
+            yield inp, input_terms
+
+
+def _load_cached(cache: InputCache | None, key: str | None) -> list[LiteralMapping] | None:
+    if cache is None:
+        return None
+    with timed("load_cached") as stage:
+        rv = cache.get(key)
+        stage.count = len(rv) if rv is not None else 0
+    return rv
+
+
+def _extract(inp: Input, key: str | None, cache: InputCache | None) -> list[LiteralMapping]:
+    """Extract an input in this process."""
+    try:
+        input_terms, seconds = _get_input_literal_mappings(inp)
+    except Exception as e:
+        raise _get_extraction_error(inp, e) from e
+    _record_extracted(inp, key, input_terms, seconds, cache)
+    return input_terms
+
+
+def _get_extraction_error(inp: Input, e: Exception) -> ValueError:
+    """Get the error for an input that failed, the same way with or without workers."""
+    return ValueError(f"[{inp.source}] failed to get literal mappings with {inp.processor}: {e}")
+
+
+def _record_extracted(
+    inp: Input,
+    key: str | None,
+    input_terms: list[LiteralMapping],
+    seconds: float,
+    cache: InputCache | None,
+) -> None:
+    logger.info("[%s] got %d literal mappings", inp.source, len(input_terms))
+    record(f"extract[{inp.source}]", seconds, len(input_terms))
+    if cache is not None:
+        cache.put(key, input_terms)
+
+
+#: The maximum number of threads for I/O-bound processors and fetch steps
+MAX_THREADS = 16
+
+#: The number of inputs per worker that are scheduled ahead of the one being yielded
+WINDOW_PER_WORKER = 2
+
+
+def _submit(
+    inp: Input, processes: ProcessPoolExecutor, threads: ThreadPoolExecutor
+) -> Future[Extracted]:
+    from .processors import get_processor
+
+    spec = get_processor(inp.processor)
+    if spec.bound == "cpu" and spec.fetch is None:
+        # these are submitted directly from the calling thread, which also means that
+        # worker processes are started before any threads that could be forked with them
+        return processes.submit(_run_processor, inp)
+    return threads.submit(_extract_on_thread, inp, processes)
 
 
 def get_literal_mappings(
@@ -195,7 +927,15 @@ def get_literal_mappings(
         if ancestor_refs is None:
             return pyobo.get_literal_mappings(prefix, **kwargs)
         else:
-            return pyobo.get_literal_mappings_subset(prefix, ancestors=ancestor_refs, **kwargs)
+            from .hierarchy import ClosureIndex
+
+            # the descendants of all ancestors are looked up in an index that's stored
+            # for the ontology's version, rather than traversing the hierarchy for each
+            index = ClosureIndex.from_pyobo(prefix, **kwargs)
+            return index.get_subset(
+                pyobo.get_literal_mappings(prefix, **kwargs),
+                [pyobo.Reference.from_curie(ref.curie) for ref in ancestor_refs],
+            )
     elif processor == "bioontologies":
         import bioontologies
 
@@ -207,27 +947,3 @@ def get_literal_mappings(
             )
     else:
         raise ValueError(f"Unknown processor: {processor}")
-
-
-class Summary(BaseModel):
-    """A model for summaries."""
-
-    count: int
-    provenance_counter: dict[str, int]
-    type_counter: dict[str, int]
-
-
-def summarize_terms(literal_mappings: list[LiteralMapping]) -> BaseModel:
-    """Summarize terms."""
-    provenance_counter: Counter[str] = Counter()
-    type_counter: Counter[str] = Counter()
-    for mapping in literal_mappings:
-        for ref in mapping.provenance:
-            provenance_counter[ref.prefix] += 1
-        if mapping.type is not None:
-            type_counter[mapping.type.curie] += 1
-    return Summary(
-        count=len(literal_mappings),
-        provenance_counter=dict(provenance_counter),
-        type_counter=dict(type_counter),
-    )
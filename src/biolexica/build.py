@@ -0,0 +1,403 @@
+"""Build several lexica together, extracting the inputs they share only once.
+
+Predefined lexica use many of the same resources, e.g., MeSH, NCIT, UMLS, BTO, and EFO
+each appear in several of the configurations in :mod:`biolexica.configs`. Building
+them one after another means parsing these resources again for each lexicon.
+:func:`build_lexica` instead works in two phases:
+
+1. The inputs of all lexica are planned together with :func:`plan_extraction`, then
+   extracted with :func:`extract_inputs`. Inputs that are the same in several lexica
+   are only extracted once. If a processor can get subsets (see
+   :attr:`biolexica.processors.ProcessorSpec.get_subsets`), inputs with the same source
+   that only differ by their ancestors share a single extraction of the whole source.
+   All of their subsets are then taken at once, e.g., for :mod:`pyobo` inputs, from a
+   single :class:`biolexica.hierarchy.ClosureIndex` of the source's hierarchy.
+   Inputs whose rows can be reused from a lexicon's previous build (see
+   :mod:`biolexica.incremental`) are left out, unless another lexicon needs them.
+2. Each lexicon is assembled with :func:`biolexica.assemble_terms` from the extracted
+   inputs, which are kept in the meantime in compact
+   :class:`biolexica.store.LexiconStore` objects. Each input is stored as soon as it's
+   extracted, so building several lexica together doesn't take much more memory than
+   building the largest of them alone. Assembling is mostly CPU-bound
+   (remapping, deduplicating, and writing files), so with more than one worker, lexica
+   are assembled in parallel in a process pool, where each process gets the stores for
+   its lexicon's inputs. Otherwise, they're assembled concurrently on threads, where
+   only I/O (e.g., downloading mappings) overlaps between lexica.
+
+This is also available on the command line as ``biolexica build``:
+
+.. code-block:: console
+
+    $ biolexica build anatomy cell phenotype --directory lexica --workers 4
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal, NamedTuple, overload
+
+from ssslm import LiteralMapping
+
+from .api import Configuration, Input, _iter_input_literal_mappings, assemble_terms
+from .cache import InputCache
+from .instrument import collect_timings, timed
+from .store import LexiconStore
+
+__all__ = [
+    "ExtractionPlan",
+    "LexiconPaths",
+    "SharedSource",
+    "build_lexica",
+    "extract_inputs",
+    "get_lexicon_paths",
+    "plan_extraction",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _get_key(inp: Input) -> str:
+    return inp.model_dump_json(exclude_none=True)
+
+
+def _get_source_key(inp: Input) -> str:
+    """Get a key for an input that's the same for all its subsets."""
+    return _get_key(inp.model_copy(update={"ancestors": None}))
+
+
+class SharedSource(NamedTuple):
+    """A source that's extracted once, then split into the subsets for several inputs."""
+
+    #: The source, as an input without ancestors
+    source: Input
+    #: The inputs whose literal mappings are taken from the source's
+    inputs: list[Input]
+
+
+class ExtractionPlan(NamedTuple):
+    """A plan for extracting several inputs, which shares work between them."""
+
+    #: The distinct inputs, by their keys
+    inputs: dict[str, Input]
+    #: Inputs that are loaded from the input cache
+    cached: list[Input]
+    #: Inputs that are extracted by themselves
+    extracted: list[Input]
+    #: Sources that are extracted once for several inputs
+    shared: list[SharedSource]
+
+    def describe(self) -> str:
+        """Describe what will be extracted, one input or source per line."""
+        lines = [f"{len(self.inputs)} distinct inputs"]
+        lines.extend(f"cached: {_describe(inp)}" for inp in self.cached)
+        lines.extend(f"extract: {_describe(inp)}" for inp in self.extracted)
+        for shared in self.shared:
+            lines.append(f"extract once: {_describe(shared.source)}")
+            lines.extend(f"    subset: {_describe(inp)}" for inp in shared.inputs)
+        return "\n".join(lines)
+
+
+def _describe(inp: Input) -> str:
+    rv = f"{inp.source} ({inp.processor})"
+    if inp.ancestors is not None:
+        ancestors = [inp.ancestors] if isinstance(inp.ancestors, str) else inp.ancestors
+        rv += f" under {len(ancestors)} ancestors"
+    return rv
+
+
+def plan_extraction(inputs: Iterable[Input], *, cache: InputCache | None = None) -> ExtractionPlan:
+    """Plan how to extract inputs, e.g., from several configurations.
+
+    Inputs that appear more than once are only extracted once. If an input's processor
+    can get subsets (see :attr:`biolexica.processors.ProcessorSpec.get_subsets`), the
+    inputs with the same source that only differ by their ancestors and that aren't
+    cached share a single extraction of the whole source.
+
+    :param inputs: Inputs, which can repeat
+    :param cache: If given, an input cache. Inputs that are in it aren't extracted.
+
+    :returns: A plan, which can be carried out with :func:`extract_inputs`
+    """
+    from .processors import get_processor
+
+    unique = {_get_key(inp): inp for inp in inputs}
+    cached: list[Input] = []
+    groups: dict[str, list[Input]] = {}
+    for inp in unique.values():
+        if cache is not None and cache.get_key(inp) in cache:
+            cached.append(inp)
+        elif get_processor(inp.processor).get_subsets is not None:
+            groups.setdefault(_get_source_key(inp), []).append(inp)
+        else:
+            groups.setdefault(_get_key(inp), []).append(inp)
+
+    extracted: list[Input] = []
+    shared: list[SharedSource] = []
+    for group in groups.values():
+        if len(group) == 1:
+            extracted.append(group[0])
+        else:
+            shared.append(SharedSource(group[0].model_copy(update={"ancestors": None}), group))
+    return ExtractionPlan(inputs=unique, cached=cached, extracted=extracted, shared=shared)
+
+
+@overload
+def extract_inputs(
+    inputs: Iterable[Input],
+    *,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    compact: Literal[False] = False,
+) -> dict[str, list[LiteralMapping]]: ...
+
+
+@overload
+def extract_inputs(
+    inputs: Iterable[Input],
+    *,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    compact: Literal[True],
+) -> dict[str, LexiconStore]: ...
+
+
+def extract_inputs(
+    inputs: Iterable[Input],
+    *,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    compact: bool = False,
+) -> dict[str, list[LiteralMapping]] | dict[str, LexiconStore]:
+    """Extract the literal mappings for inputs, following :func:`plan_extraction`.
+
+    :param inputs: Inputs, e.g., from several configurations, which can repeat
+    :param workers: If given and more than one, the size of the process pool used to
+        extract inputs and shared sources in parallel (see
+        :func:`biolexica.assemble_terms`)
+    :param cache: If given, an input cache, which is checked before extracting and
+        filled in afterwards. Subsets that are taken from a shared source are stored
+        in it, too.
+    :param compact: If true, store each input's literal mappings in a
+        :class:`biolexica.store.LexiconStore` as soon as they're extracted, so only
+        one input's list is kept in memory at a time
+
+    :returns: A dictionary from the JSON of each distinct input (as from
+        :meth:`pydantic.BaseModel.model_dump_json` without empty values) to its
+        literal mappings
+    """
+    plan = plan_extraction(inputs, cache=cache)
+    shared = {_get_key(shared.source): shared for shared in plan.shared}
+    rv: dict[str, Sequence[LiteralMapping]] = {}
+    for inp, input_terms in _iter_input_literal_mappings(
+        [*plan.cached, *plan.extracted, *(shared.source for shared in plan.shared)],
+        workers=workers,
+        cache=cache,
+    ):
+        key = _get_key(inp)
+        if key in shared:
+            # the whole source is only kept while its subsets are taken
+            subsets = _get_subsets(shared[key], input_terms, cache)
+            rv.update((k, _compact(subset) if compact else subset) for k, subset in subsets)
+        else:
+            rv[key] = _compact(input_terms) if compact else input_terms
+    return {key: rv[key] for key in plan.inputs}  # type:ignore[return-value]
+
+
+def _compact(literal_mappings: list[LiteralMapping]) -> LexiconStore:
+    with timed("compact", len(literal_mappings)):
+        return LexiconStore(literal_mappings)
+
+
+def _get_subsets(
+    shared: SharedSource, literal_mappings: list[LiteralMapping], cache: InputCache | None
+) -> Iterable[tuple[str, list[LiteralMapping]]]:
+    from .processors import get_processor
+
+    get_subsets = get_processor(shared.source.processor).get_subsets
+    if get_subsets is None:
+        raise ValueError(f"processor {shared.source.processor} can't get subsets")
+    with timed(f"subsets[{shared.source.source}]", len(shared.inputs)):
+        subsets = get_subsets(shared.inputs, literal_mappings)
+    for inp, subset in zip(shared.inputs, subsets, strict=True):
+        logger.info("[%s] took %d literal mappings for %s", inp.source, len(subset), inp.ancestors)
+        if cache is not None:
+            cache.put(cache.get_key(inp), subset)
+        yield _get_key(inp), subset
+
+
+class _ExtractedInputs(InputCache):
+    """An input cache that has the literal mappings that were already extracted."""
+
+    def __init__(self, extracted: dict[str, Sequence[LiteralMapping]]) -> None:
+        # this doesn't use a directory, so the parent's initialization is skipped
+        self.extracted = extracted
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.extracted
+
+    def get_key(self, inp: Input) -> str:
+        return _get_key(inp)
+
+    def get(self, key: str | None) -> list[LiteralMapping] | None:
+        input_terms = self.extracted.get(key) if key is not None else None
+        if input_terms is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # literal mappings from a store are made again for each lexicon
+        return list(input_terms)
+
+    def put(self, key: str | None, literal_mappings: list[LiteralMapping]) -> None:
+        if key is not None:
+            self.extracted[key] = literal_mappings
+
+
+class LexiconPaths(NamedTuple):
+    """The paths of the files for a lexicon, like for the predefined lexica."""
+
+    #: The processed literal mappings
+    processed: Path
+    #: The processed literal mappings, as Gilda terms
+    gilda: Path
+    #: The summary
+    summary: Path
+    #: The manifest for incremental builds (see :mod:`biolexica.incremental`)
+    manifest: Path
+
+
+def get_lexicon_paths(directory: str | Path, key: str) -> LexiconPaths:
+    """Get the paths of the files for a lexicon.
+
+    :param directory: The directory with a subdirectory for each lexicon
+    :param key: The key of the lexicon
+
+    :returns: The paths of the files in the lexicon's subdirectory
+    """
+    lexicon_directory = Path(directory).joinpath(key)
+    return LexiconPaths(
+        processed=lexicon_directory.joinpath(f"{key}.ssslm.tsv.gz"),
+        gilda=lexicon_directory.joinpath("terms.tsv.gz"),
+        summary=lexicon_directory.joinpath("summary.json"),
+        manifest=lexicon_directory.joinpath("manifest.json"),
+    )
+
+
+def build_lexica(
+    lexica: Mapping[str, Configuration],
+    directory: str | Path,
+    *,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    include_biosynonyms: bool = True,
+) -> dict[str, int]:
+    """Build several lexica, extracting the inputs they share only once.
+
+    :param lexica: A dictionary from the keys of lexica to their configurations
+    :param directory: The directory in which each lexicon's files are written, in a
+        subdirectory named after its key (see :func:`get_lexicon_paths`). Lexica are
+        built incrementally from the files of a previous build there, if any, and
+        inputs that haven't changed since then aren't extracted at all.
+    :param workers: If given and more than one, the size of the process pools used to
+        extract inputs and then to assemble lexica in parallel. Otherwise, lexica are
+        assembled on threads, which only overlap their I/O.
+    :param cache: If given, an input cache for extracting inputs
+    :param include_biosynonyms: Should literal mappings from :mod:`biosynonyms` be
+        included in each lexicon?
+
+    :returns: A dictionary from the keys of lexica to their numbers of literal mappings
+    """
+    with collect_timings() as timings:
+        # each input's list is released as soon as it's stored
+        stores: dict[str, Sequence[LiteralMapping]] = dict(
+            extract_inputs(
+                _get_changed_inputs(lexica, directory), workers=workers, cache=cache, compact=True
+            )
+        )
+    logger.info(
+        "extracted %d distinct inputs for %d lexica in %.2f seconds",
+        len(stores),
+        len(lexica),
+        sum(timing.seconds for timing in timings.values()),
+    )
+
+    pool: Executor
+    if workers is not None and workers > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(lexica) or 1))
+    else:
+        pool = ThreadPoolExecutor(max_workers=len(lexica) or 1, thread_name_prefix="lexicon")
+    with pool:
+        futures = [
+            pool.submit(
+                _build_lexicon,
+                directory,
+                key,
+                configuration,
+                # only the stores for the lexicon's inputs are sent to its process
+                {
+                    input_key: stores[input_key]
+                    for inp in configuration.inputs
+                    if (input_key := _get_key(inp)) in stores
+                },
+                include_biosynonyms=include_biosynonyms,
+            )
+            for key, configuration in lexica.items()
+        ]
+        return {key: future.result() for key, future in zip(lexica, futures, strict=True)}
+
+
+def _get_changed_inputs(lexica: Mapping[str, Configuration], directory: str | Path) -> list[Input]:
+    """Get the inputs of lexica that can't be reused from their previous builds."""
+    from .api import _get_previous_path, _get_remapping_index
+    from .incremental import get_reusable_inputs, read_manifest
+
+    rv = []
+    for key, configuration in lexica.items():
+        paths = get_lexicon_paths(directory, key)
+        manifest = read_manifest(paths.manifest)
+        if manifest is None:
+            rv.extend(configuration.inputs)
+            continue
+        reusable = {
+            _get_key(inp)
+            for inp in get_reusable_inputs(
+                configuration,
+                _get_remapping_index(configuration),
+                # this is where assemble_terms looks for the previous literal mappings
+                previous_path=_get_previous_path(
+                    paths.manifest, paths.processed, None, deduplicate=True
+                ),
+                previous_manifest=manifest,
+            )
+        }
+        logger.info("[%s] reusing %d inputs from the previous build", key, len(reusable))
+        rv.extend(inp for inp in configuration.inputs if _get_key(inp) not in reusable)
+    return rv
+
+
+def _build_lexicon(
+    directory: str | Path,
+    key: str,
+    configuration: Configuration,
+    stores: dict[str, Sequence[LiteralMapping]],
+    *,
+    include_biosynonyms: bool,
+) -> int:
+    """Assemble a lexicon from its extracted inputs and write its files."""
+    paths = get_lexicon_paths(directory, key)
+    paths.processed.parent.mkdir(parents=True, exist_ok=True)
+    terms = assemble_terms(
+        configuration,
+        include_biosynonyms=include_biosynonyms,
+        processed_path=paths.processed,
+        gilda_path=paths.gilda,
+        summary_path=paths.summary,
+        manifest_path=paths.manifest,
+        cache=_ExtractedInputs(stores),
+    )
+    logger.info("[%s] built %d literal mappings", key, len(terms))
+    return len(terms)
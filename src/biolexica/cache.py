@@ -0,0 +1,302 @@
+"""A content-addressed cache for the literal mappings extracted from each input."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import ssslm
+from ssslm import LiteralMapping
+
+if TYPE_CHECKING:
+    from .api import Input
+
+__all__ = [
+    "InputCache",
+    "get_input_key",
+    "get_input_version",
+    "get_unversioned_input_key",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Increment this when the on-disk layout of the cache changes
+#: so old entries are not read back
+CACHE_FORMAT_VERSION = 1
+
+#: The suffix used for literal mappings in the cache
+SUFFIX = ".ssslm.tsv.gz"
+
+#: The start of keys for inputs whose versions can't be resolved
+UNVERSIONED_PREFIX = "unversioned-"
+
+
+def get_input_version(inp: Input) -> str | None:
+    """Get the version of the resource behind an input, if it can be resolved.
+
+    If the input's processor can get versions (see
+    :attr:`biolexica.processors.ProcessorSpec.get_version`), this is what it gets,
+    e.g., for inputs processed by :mod:`pyobo` or :mod:`bioontologies`, the version
+    explicitly passed in the input's keyword arguments or else the one resolved by
+    :func:`pyobo.utils.ver.get_version`. For other inputs that are local files, e.g.,
+    ones read with :mod:`ssslm` or :mod:`gilda`, this is the SHA-256 hash of the file's
+    contents.
+
+    :param inp: An input to a lexicon
+
+    :returns: A version string, or None if no version could be resolved. In the latter
+        case, the input can't be cached since there's no way to invalidate it.
+    """
+    from .processors import get_processor
+
+    spec = get_processor(inp.processor)
+    if spec.get_version is not None:
+        return spec.get_version(inp)
+
+    path = Path(inp.source).expanduser()
+    if not path.is_file():
+        # this is either a remote file or doesn't exist
+        return None
+    return _hash_file(path)
+
+
+def get_input_key(inp: Input) -> str | None:
+    """Get a key for an input that changes when its literal mappings could change.
+
+    :param inp: An input to a lexicon
+
+    :returns: A hash of the input's processor, source, resolved version (see
+        :func:`get_input_version`), ancestors, and keyword arguments, or None if no
+        version could be resolved
+    """
+    version = get_input_version(inp)
+    if version is None:
+        return None
+    return _hash_input(inp, version)
+
+
+def get_unversioned_input_key(inp: Input) -> str:
+    """Get a key for an input that doesn't depend on its version.
+
+    :param inp: An input to a lexicon
+
+    :returns: A hash of the input's processor, source, ancestors, and keyword
+        arguments, starting with :data:`UNVERSIONED_PREFIX`. Since it doesn't change
+        when the input's literal mappings change, entries with these keys should only
+        be reused for a limited time.
+    """
+    return UNVERSIONED_PREFIX + _hash_input(inp, None)
+
+
+def _hash_input(inp: Input, version: str | None) -> str:
+    if inp.ancestors is None:
+        ancestors = None
+    elif isinstance(inp.ancestors, str):
+        ancestors = [inp.ancestors]
+    else:
+        ancestors = list(inp.ancestors)
+    data = {
+        "format": CACHE_FORMAT_VERSION,
+        "processor": inp.processor,
+        "source": inp.source,
+        "version": version,
+        "ancestors": ancestors,
+        "kwargs": inp.kwargs or {},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputCache:
+    """A content-addressed, on-disk cache of the literal mappings for each input.
+
+    Each input is keyed on its processor, source, resolved version, ancestors, and
+    keyword arguments, so changing any of these (or an upstream release of the
+    resource) results in a cache miss for only that input.
+
+    .. code-block:: python
+
+        import datetime
+
+        import biolexica
+        from biolexica.configs import CELL_CONFIGURATION
+
+        cache = biolexica.InputCache(
+            max_size=10 * 1024**3,
+            max_age=datetime.timedelta(days=90),
+        )
+        biolexica.assemble_terms(CELL_CONFIGURATION, cache=cache)
+
+    Inputs whose versions can't be resolved aren't cached by default, since there's no
+    way to tell when their entries are stale. With ``unversioned_max_age``, they're
+    cached without their versions and reused until the entries reach that age.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        max_size: int | None = None,
+        max_age: datetime.timedelta | None = None,
+        unversioned_max_age: datetime.timedelta | None = None,
+        evict_on_put: bool = True,
+    ) -> None:
+        """Instantiate the cache.
+
+        :param directory: The directory in which cached literal mappings are stored.
+            Defaults to ``~/.data/biolexica/inputs``, which can be configured with
+            :mod:`pystow` using the ``BIOLEXICA_HOME`` environment variable.
+        :param max_size: The maximum total size of the cache, in bytes. When exceeded,
+            the least recently used entries are removed.
+        :param max_age: The maximum time since an entry was last used before it's
+            removed
+        :param unversioned_max_age: If given, inputs whose versions can't be resolved
+            are cached too, and their entries are reused until they're this old. Unlike
+            for ``max_age``, this is the time since the entry was written, not since it
+            was last used.
+        :param evict_on_put: Should entries be evicted each time literal mappings are
+            stored? If several processes store literal mappings at the same time (e.g.,
+            the workers of a process pool), turn this off and call :meth:`evict` once
+            afterwards instead.
+        """
+        if directory is None:
+            import pystow
+
+            directory = pystow.join("biolexica", "inputs")
+        self.directory = Path(directory).expanduser().resolve()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.unversioned_max_age = unversioned_max_age
+        self.evict_on_put = evict_on_put
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"InputCache(directory={self.directory}, hits={self.hits}, misses={self.misses})"
+
+    def get_key(self, inp: Input) -> str | None:
+        """Get the content address for an input, or None if it can't be cached."""
+        key = get_input_key(inp)
+        if key is None and self.unversioned_max_age is not None:
+            return get_unversioned_input_key(inp)
+        return key
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory.joinpath(key[:2], f"{key}{SUFFIX}")
+
+    def _is_expired(self, path: Path) -> bool:
+        """Check if an entry for an unversioned input is too old to be reused."""
+        if not path.name.startswith(UNVERSIONED_PREFIX):
+            return False
+        if self.unversioned_max_age is None:
+            return True
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            # another process removed it in the meantime
+            return True
+        return mtime < time.time() - self.unversioned_max_age.total_seconds()
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        path = self._get_path(key)
+        return path.is_file() and not self._is_expired(path)
+
+    def get(self, key: str | None) -> list[LiteralMapping] | None:
+        """Get the literal mappings for a key, if they're cached."""
+        if key is None:
+            self.misses += 1
+            return None
+        path = self._get_path(key)
+        if not path.is_file() or self._is_expired(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if not path.name.startswith(UNVERSIONED_PREFIX):
+            # update the modification time, which is used to evict the least recently
+            # used. Entries for unversioned inputs keep the time they were written, so
+            # they expire.
+            path.touch()
+        return ssslm.read_literal_mappings(path)
+
+    def put(self, key: str | None, literal_mappings: list[LiteralMapping]) -> None:
+        """Store the literal mappings for a key, then evict entries if necessary.
+
+        Entries are only evicted if ``evict_on_put`` was true when instantiating the
+        cache.
+        """
+        if key is None:
+            return
+        path = self._get_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # write to a temporary file, then move it, so a crash during writing
+        # doesn't leave a partial file that looks like a cache hit
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp.tsv.gz")
+        os.close(fd)
+        try:
+            ssslm.write_literal_mappings(literal_mappings, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if self.evict_on_put:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove expired and old entries, then least recently used entries.
+
+        Entries that another process removes in the meantime are skipped, so several
+        processes can evict from the same directory at once.
+
+        :returns: The number of entries removed
+        """
+        if self.max_size is None and self.max_age is None and self.unversioned_max_age is None:
+            return 0
+        entries = sorted(self._iter_entries(), key=lambda pair: pair[0].st_mtime)
+        removed = 0
+        if self.unversioned_max_age is not None:
+            for stat, path in list(entries):
+                if self._is_expired(path):
+                    entries.remove((stat, path))
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        if self.max_age is not None:
+            cutoff = time.time() - self.max_age.total_seconds()
+            while entries and entries[0][0].st_mtime < cutoff:
+                _, path = entries.pop(0)
+                path.unlink(missing_ok=True)
+                removed += 1
+        if self.max_size is not None:
+            total = sum(stat.st_size for stat, _ in entries)
+            while entries and total > self.max_size:
+                stat, path = entries.pop(0)
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+                removed += 1
+        if removed:
+            logger.info("evicted %d entries from the input cache in %s", removed, self.directory)
+        return removed
+
+    def _iter_entries(self) -> Iterable[tuple[os.stat_result, Path]]:
+        for path in self.directory.glob(f"*/*{SUFFIX}"):
+            try:
+                yield path.stat(), path
+            except FileNotFoundError:
+                continue
@@ -11,21 +11,216 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+workers_option = click.option(
+    "--workers",
+    type=int,
+    help="If given, the number of processes used to work in parallel",
+)
+
 
 @click.group()
 @click.version_option()
-@click.option("--configuration", type=Path)
-@click.option("--output", required=True, type=Path)
-def main(configuration: Path, output: Path) -> None:
+def main() -> None:
+    """Build and apply biomedical lexica."""
+
+
+@main.command()
+@click.option("--configuration", required=True, type=Path)
+@click.option(
+    "--output",
+    required=True,
+    type=Path,
+    help="Where to write literal mappings, either as TSV or, if it ends with .parquet, as Parquet",
+)
+@workers_option
+@click.option(
+    "--profile",
+    "profile_path",
+    type=Path,
+    help="If given, where to write a profile of the build, either as cProfile statistics or, if "
+    "it ends with .html, as a pyinstrument report",
+)
+def assemble(
+    configuration: Path, output: Path, workers: int | None, profile_path: Path | None
+) -> None:
     """Assemble a lexicon based on a configuration file."""
     import json
 
     import biolexica
 
+    from .instrument import profile
+
     configuration_model = biolexica.Configuration.model_validate(
         json.loads(configuration.read_text())
     )
-    biolexica.assemble_terms(configuration_model, processed_path=output)
+    with profile(profile_path):
+        if output.suffix == ".parquet":
+            biolexica.assemble_terms(configuration_model, parquet_path=output, workers=workers)
+        else:
+            biolexica.assemble_terms(configuration_model, processed_path=output, workers=workers)
+
+
+@main.command()
+@click.argument("lexica", nargs=-1, required=True)
+@click.option(
+    "--directory",
+    type=Path,
+    default=Path.cwd,
+    show_default="the current directory",
+    help="The directory in which to write each lexicon, in a subdirectory named after its key",
+)
+@workers_option
+@click.option("--no-cache", is_flag=True, help="Don't use the input cache")
+@click.option("--dry-run", is_flag=True, help="Only show what would be extracted")
+def build(
+    lexica: tuple[str, ...], directory: Path, workers: int | None, no_cache: bool, dry_run: bool
+) -> None:
+    """Build several lexica, extracting the inputs they share only once.
+
+    Each lexicon is either the key for a predefined lexicon (e.g., cell) or a path to a
+    JSON configuration file, in which case its key is the name of the file, without
+    extensions. Lexica are built incrementally if their files from a previous build
+    are in the directory (see biolexica.incremental).
+    """
+    import json
+
+    import biolexica
+    from biolexica.build import build_lexica, plan_extraction
+    from biolexica.configs import get_configuration
+
+    configurations = {}
+    for lexicon in lexica:
+        path = Path(lexicon)
+        if path.suffix == ".json":
+            key = path.name.split(".")[0]
+            configuration = biolexica.Configuration.model_validate(json.loads(path.read_text()))
+        else:
+            key = lexicon
+            try:
+                configuration = get_configuration(lexicon)
+            except ValueError as e:
+                raise click.BadParameter(str(e)) from e
+        if key in configurations:
+            raise click.BadParameter(f"duplicate lexicon key: {key}")
+        configurations[key] = configuration
+
+    cache = None if no_cache else biolexica.InputCache()
+    if dry_run:
+        inputs = [inp for configuration in configurations.values() for inp in configuration.inputs]
+        click.echo(plan_extraction(inputs, cache=cache).describe())
+        return
+
+    counts = build_lexica(configurations, directory, workers=workers, cache=cache)
+    for key, count in counts.items():
+        click.echo(f"built {key} with {count:,} literal mappings in {directory.joinpath(key)}")
+
+
+@main.command()
+@click.option(
+    "--grounder",
+    required=True,
+    help="The key for a predefined lexicon (e.g., cell) or a path to literal mappings",
+)
+@click.option(
+    "--input",
+    "input_path",
+    required=True,
+    type=Path,
+    help="A JSON Lines file with id and text keys, or a two column TSV file with no header",
+)
+@click.option(
+    "--output",
+    required=True,
+    type=Path,
+    help="Where to write annotations, either as JSON Lines or, if it ends with .parquet, as "
+    "Parquet",
+)
+@workers_option
+@click.option(
+    "--batch-size",
+    type=int,
+    default=64,
+    show_default=True,
+    help="The number of documents sent to a worker at a time",
+)
+def annotate(
+    grounder: str, input_path: Path, output: Path, workers: int | None, batch_size: int
+) -> None:
+    """Annotate a corpus of documents."""
+    from .annotate import annotate_corpus, read_corpus, write_annotations
+
+    count = write_annotations(
+        annotate_corpus(read_corpus(input_path), grounder, workers=workers, batch_size=batch_size),
+        output,
+    )
+    click.echo(f"annotated {count:,} documents to {output}")
+
+
+@main.command()
+@click.argument("lexica", nargs=-1)
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8000, show_default=True)
+@click.option(
+    "--idle-timeout",
+    type=float,
+    help="If given, the number of seconds after which a lexicon that hasn't been used is unloaded",
+)
+def serve(lexica: tuple[str, ...], host: str, port: int, idle_timeout: float | None) -> None:
+    """Serve several lexica from one process.
+
+    Each lexicon is either the key for a predefined lexicon (e.g., cell), a path to
+    literal mappings, or KEY=PATH to serve literal mappings under the given key. If none
+    are given, the predefined lexica whose literal mappings are available are served.
+    Lexica are loaded on their first request.
+    """
+    import uvicorn
+
+    from .web import get_multi_app
+
+    app = get_multi_app(
+        _parse_lexica(lexica) if lexica else _get_available_lexica(), idle_timeout=idle_timeout
+    )
+    uvicorn.run(app, host=host, port=port)
+
+
+def _get_available_lexica() -> dict[str, str]:
+    """Get the predefined lexica whose literal mappings are available, skipping the others."""
+    import typing as t
+
+    import requests
+
+    from .api import LEXICA, PREDEFINED
+    from .remote import ensure_lexicon
+
+    rv = {}
+    for key in t.get_args(PREDEFINED):
+        if LEXICA.is_dir():
+            # in a checkout of the repository, only lexica that were built have files
+            path = LEXICA.joinpath(key, f"{key}.ssslm.tsv.gz")
+            if not path.is_file():
+                logger.warning("skipping lexicon %s, which hasn't been built at %s", key, path)
+                continue
+        else:
+            try:
+                ensure_lexicon(key)
+            except (OSError, requests.RequestException) as e:
+                logger.warning("skipping lexicon %s, which isn't available: %s", key, e)
+                continue
+        rv[key] = key
+    return rv
+
+
+def _parse_lexica(lexica: tuple[str, ...]) -> dict[str, str]:
+    rv = {}
+    for lexicon in lexica:
+        key, sep, path = lexicon.partition("=")
+        if not sep:
+            # a bare path is served under the name of the file
+            key, path = Path(lexicon).name.split(".")[0], lexicon
+        if key in rv:
+            raise click.BadParameter(f"duplicate lexicon key: {key}")
+        rv[key] = path
+    return rv
 
 
 if __name__ == "__main__":
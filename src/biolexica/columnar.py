@@ -0,0 +1,287 @@
+"""Read and write literal mappings as Parquet files.
+
+Loading a ``*.ssslm.tsv.gz`` file means decompressing and parsing it row by row, then
+making a :class:`ssslm.LiteralMapping` for each row. Parquet files store the same
+columns compressed column by column, so they're read with memory-mapped, columnar reads,
+and a grounder can be built from the columns directly. This requires :mod:`pyarrow`,
+which can be installed with ``pip install biolexica[parquet]``.
+
+Besides the columns of a literal mappings file, each Parquet file has a ``prefix`` column
+with the prefix of each literal mapping's reference. Reads can be filtered by prefix or
+by source, and since literal mappings are assembled one input at a time, most row groups
+are skipped based on their statistics without being read at all.
+
+.. code-block:: python
+
+    import biolexica
+
+    grounder = biolexica.load_grounder("cell.ssslm.parquet", prefixes=["cl"])
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Collection, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+from ssslm.model import HEADER
+
+if TYPE_CHECKING:
+    import gilda
+    import pandas as pd
+    import pyarrow
+    import pyarrow.parquet
+    import ssslm
+    from typing_extensions import Self
+
+__all__ = [
+    "PARQUET_SUFFIX",
+    "ParquetWriter",
+    "read_parquet",
+    "read_parquet_grounder",
+    "read_parquet_literal_mappings",
+    "write_parquet",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The suffix for literal mappings files in Parquet format
+PARQUET_SUFFIX = ".ssslm.parquet"
+
+#: The column with the prefix of each literal mapping's reference
+PREFIX_COLUMN = "prefix"
+
+#: Columns with few distinct values, which are dictionary encoded
+DICTIONARY_COLUMNS = [PREFIX_COLUMN, "predicate", "type", "language", "source", "taxon"]
+
+#: The number of rows in each row group
+ROW_GROUP_SIZE = 100_000
+
+#: The columns needed to make Gilda terms
+GILDA_COLUMNS = ["text", "curie", "name", "predicate", "type", "source", "taxon", PREFIX_COLUMN]
+
+
+def _get_schema() -> pyarrow.Schema:
+    import pyarrow
+
+    return pyarrow.schema([(column, pyarrow.string()) for column in [*HEADER, PREFIX_COLUMN]])
+
+
+class ParquetWriter:
+    """Writes literal mappings to a Parquet file, one row group at a time."""
+
+    def __init__(self, path: str | Path, *, row_group_size: int = ROW_GROUP_SIZE) -> None:
+        """Open a Parquet file for writing.
+
+        :param path: The path to write to, which conventionally ends with
+            :data:`PARQUET_SUFFIX`
+        :param row_group_size: The number of rows in each row group, which bounds how
+            many rows are kept in memory at once
+        """
+        import pyarrow.parquet
+
+        self.row_group_size = row_group_size
+        self.rows: list[Sequence[str | None]] = []
+        self.schema = _get_schema()
+        self.writer = pyarrow.parquet.ParquetWriter(
+            path, self.schema, use_dictionary=DICTIONARY_COLUMNS, compression="zstd"
+        )
+
+    def add_row(self, row: Sequence[str | None]) -> None:
+        """Add a row, like from :meth:`ssslm.LiteralMapping._as_row`."""
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def write_df(self, df: pd.DataFrame) -> None:
+        """Write a dataframe from :func:`biolexica.summary.literal_mappings_to_df`."""
+        import pyarrow
+
+        self._flush()
+        df = df.assign(**{PREFIX_COLUMN: df["curie"].str.extract(r"^([^:]*)", expand=False)})
+        table = pyarrow.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+
+    def _flush(self) -> None:
+        if not self.rows:
+            return
+        import pyarrow
+
+        curie_index = HEADER.index("curie")
+        columns = [*zip(*self.rows, strict=True)]
+        prefixes = [(row[curie_index] or "").partition(":")[0] for row in self.rows]
+        self.rows = []
+        table = pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=pyarrow.string()) for column in [*columns, prefixes]],
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        """Write the remaining rows and close the file."""
+        self._flush()
+        self.writer.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def write_parquet(df: pd.DataFrame, path: str | Path) -> None:
+    """Write literal mappings to a Parquet file.
+
+    :param df: A dataframe from :func:`biolexica.summary.literal_mappings_to_df`
+    :param path: The path to write to, which conventionally ends with
+        :data:`PARQUET_SUFFIX`
+    """
+    with ParquetWriter(path) as writer:
+        writer.write_df(df)
+
+
+def read_parquet(
+    path: str | Path,
+    *,
+    prefixes: Collection[str] | None = None,
+    sources: Collection[str] | None = None,
+    columns: list[str] | None = None,
+) -> pyarrow.Table:
+    """Read literal mappings from a Parquet file as a table.
+
+    :param path: The path to a file written by :func:`write_parquet`
+    :param prefixes: If given, only read literal mappings whose references have these
+        prefixes
+    :param sources: If given, only read literal mappings from these sources
+    :param columns: If given, only read these columns
+
+    :returns: A table whose columns are backed by the memory-mapped file
+    """
+    import pyarrow.parquet
+
+    filters: list[tuple[str, str, Any]] = []
+    if prefixes is not None:
+        filters.append((PREFIX_COLUMN, "in", list(prefixes)))
+    if sources is not None:
+        filters.append(("source", "in", list(sources)))
+    return pyarrow.parquet.read_table(
+        path, columns=columns, filters=filters or None, memory_map=True
+    )
+
+
+def read_parquet_literal_mappings(
+    path: str | Path,
+    *,
+    prefixes: Collection[str] | None = None,
+    sources: Collection[str] | None = None,
+) -> list[ssslm.LiteralMapping]:
+    """Read literal mappings from a Parquet file.
+
+    :param path: The path to a file written by :func:`write_parquet`
+    :param prefixes: If given, only read literal mappings whose references have these
+        prefixes
+    :param sources: If given, only read literal mappings from these sources
+
+    :returns: The literal mappings, like from :func:`ssslm.read_literal_mappings`
+    """
+    from ssslm import LiteralMapping
+
+    table = read_parquet(path, prefixes=prefixes, sources=sources, columns=list(HEADER))
+    return [
+        LiteralMapping.from_row({key: value for key, value in record.items() if value})
+        for record in table.to_pylist()
+    ]
+
+
+def read_parquet_grounder(
+    path: str | Path,
+    *,
+    prefixes: Collection[str] | None = None,
+    sources: Collection[str] | None = None,
+) -> ssslm.GildaGrounder:
+    """Build a grounder from a Parquet file.
+
+    Gilda terms are made directly from the columns, without making a
+    :class:`ssslm.LiteralMapping` for each row first. The result is the same as from
+    :func:`ssslm.make_grounder` for the equivalent literal mappings file.
+
+    :param path: The path to a file written by :func:`write_parquet`
+    :param prefixes: If given, only use literal mappings whose references have these
+        prefixes
+    :param sources: If given, only use literal mappings from these sources
+
+    :returns: A grounder
+    """
+    import gilda
+    import ssslm
+    from curies import NamableReference
+    from gilda.term import filter_out_duplicates
+
+    table = read_parquet(path, prefixes=prefixes, sources=sources, columns=GILDA_COLUMNS)
+    terms = _get_gilda_terms(*(table.column(column).to_pylist() for column in GILDA_COLUMNS))
+    logger.debug("read %d Gilda terms from %s", len(terms), path)
+    if terms:
+        # suppress logging counting of terms, like ssslm.GildaGrounder.from_literal_mappings
+        logging.getLogger("gilda.term").setLevel(logging.WARNING)
+        terms = filter_out_duplicates(terms)  # type:ignore[no-untyped-call]
+    grounder = gilda.Grounder(terms)
+    return ssslm.GildaGrounder(grounder, reference_cls=NamableReference)
+
+
+def _get_gilda_terms(
+    texts: list[str],
+    curies: list[str],
+    names: list[str | None],
+    predicates: list[str],
+    types: list[str | None],
+    sources: list[str | None],
+    taxa: list[str | None],
+    prefixes: list[str],
+) -> list[gilda.Term]:
+    """Make Gilda terms the same way as :meth:`ssslm.LiteralMapping.to_gilda`.
+
+    Like the "ignore" policy in :func:`ssslm.literal_mappings_to_gilda`, rows that
+    can't be Gilda terms are skipped, i.e., ones without a name or with a taxon that's
+    not from NCBITaxon.
+    """
+    from curies.vocabulary import has_label, previous_name
+    from gilda import Term
+    from gilda.process import normalize
+
+    rv = []
+    for text, curie, name, predicate, type_, source, taxon, prefix in zip(
+        texts, curies, names, predicates, types, sources, taxa, prefixes, strict=True
+    ):
+        if not name:
+            continue
+        organism = None
+        if taxon:
+            taxon_prefix, _, organism = taxon.partition(":")
+            if taxon_prefix.lower() != "ncbitaxon":
+                continue
+        if predicate == has_label.curie:
+            status = "name"
+        elif type_ == previous_name.curie:
+            status = "former_name"
+        else:
+            status = "synonym"
+        rv.append(
+            Term(  # type:ignore[no-untyped-call]
+                normalize(text),  # type:ignore[no-untyped-call]
+                text=text,
+                db=prefix,
+                id=curie[len(prefix) + 1 :],
+                entry_name=name,
+                status=status,
+                source=source or prefix,
+                organism=organism,
+            )
+        )
+    return rv
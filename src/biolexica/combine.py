@@ -0,0 +1,103 @@
+"""Combine several grounders into one, so text is annotated in a single pass.
+
+Annotating a text with several lexica one after the other splits it into sentences and
+words once per lexicon. :func:`combine_grounders` instead makes a grounder that looks
+up each candidate span in all the lexica at once, so a text is only tokenized once.
+Like with a single lexicon, the longest span that matches in *any* lexicon wins, and its
+matches from all lexica are sorted by score.
+
+.. code-block:: python
+
+    import biolexica
+    from biolexica.combine import combine_grounders
+
+    grounder = combine_grounders(
+        [biolexica.load_grounder("cell"), biolexica.load_grounder("anatomy")]
+    )
+    annotations = grounder.annotate("B cells are made in the bone marrow.")
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+import ssslm
+
+if TYPE_CHECKING:
+    import gilda
+
+__all__ = [
+    "combine_grounders",
+]
+
+
+def combine_grounders(grounders: Iterable[ssslm.Grounder]) -> ssslm.Grounder:
+    """Combine several grounders backed by Gilda into one.
+
+    :param grounders: Grounders, e.g., from :func:`biolexica.load_grounder`
+
+    :returns: A grounder whose matches for a span come from all the grounders
+
+    :raises TypeError: If any of the grounders isn't backed by Gilda
+    """
+    gilda_grounders: list[gilda.Grounder] = []
+    for grounder in grounders:
+        if not isinstance(grounder, ssslm.GildaGrounder):
+            raise TypeError(f"can only combine grounders backed by Gilda, got {grounder}")
+        gilda_grounders.append(grounder._grounder)
+    return ssslm.GildaGrounder(_CombinedGildaGrounder(gilda_grounders))  # type:ignore[arg-type]
+
+
+class _CombinedGildaGrounder:
+    """Stand in for a :class:`gilda.Grounder` in :class:`ssslm.GildaGrounder`.
+
+    This implements the parts used by :func:`gilda.ner.annotate` and by
+    :class:`ssslm.GildaGrounder` itself.
+    """
+
+    def __init__(self, grounders: list[gilda.Grounder]) -> None:
+        self.grounders = grounders
+        self.prefix_index = _CombinedPrefixIndex([g.prefix_index for g in grounders])
+
+    @property
+    def entries(self) -> bool:
+        # this is only used to check if the grounder is empty
+        return any(grounder.entries for grounder in self.grounders)
+
+    def ground(
+        self,
+        raw_str: str,
+        context: str | None = None,
+        organisms: list[str] | None = None,
+        namespaces: list[str] | None = None,
+    ) -> list[gilda.ScoredMatch]:
+        matches = [
+            scored_match
+            for grounder in self.grounders
+            for scored_match in grounder.ground(  # type:ignore[no-untyped-call]
+                raw_str, context=context, organisms=organisms, namespaces=namespaces
+            )
+        ]
+        return sorted(matches, key=lambda scored_match: scored_match.score, reverse=True)
+
+
+class _CombinedPrefixIndex(Mapping[str, set[int]]):
+    """The union of the span lengths for each first word, from several prefix indexes."""
+
+    def __init__(self, prefix_indexes: list[Mapping[str, Any]]) -> None:
+        self.prefix_indexes = prefix_indexes
+
+    def __getitem__(self, word: str) -> set[int]:
+        rv: set[int] = set()
+        for prefix_index in self.prefix_indexes:
+            rv.update(prefix_index.get(word, ()))
+        if not rv:
+            raise KeyError(word)
+        return rv
+
+    def __iter__(self) -> Iterator[str]:
+        return iter({word for prefix_index in self.prefix_indexes for word in prefix_index})
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -1,11 +1,65 @@
-"""Configurations for constructing lexical indexes."""
+"""Configurations for constructing lexical indexes.
 
-from .anatomy import ANATOMY_CONFIGURATION
-from .cell import CELL_CONFIGURATION
-from .phenotype import PHENOTYPE_CONFIGURATION
+Each configuration is only constructed on first use, since some of them need to look
+up resources (e.g., the MeSH tree) to be defined.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import biolexica
+
+    from .anatomy import ANATOMY_CONFIGURATION
+    from .cell import CELL_CONFIGURATION
+    from .phenotype import PHENOTYPE_CONFIGURATION
 
 __all__ = [
     "ANATOMY_CONFIGURATION",
     "CELL_CONFIGURATION",
     "PHENOTYPE_CONFIGURATION",
+    "get_configuration",
+    "get_configuration_keys",
 ]
+
+#: The submodule that each configuration is defined in
+_SUBMODULES = {
+    "ANATOMY_CONFIGURATION": "anatomy",
+    "CELL_CONFIGURATION": "cell",
+    "PHENOTYPE_CONFIGURATION": "phenotype",
+}
+
+
+def get_configuration_keys() -> list[str]:
+    """Get the keys of the predefined lexica that are built from configurations."""
+    return sorted(_SUBMODULES.values())
+
+
+def get_configuration(key: str) -> biolexica.Configuration:
+    """Get the configuration for a predefined lexicon.
+
+    :param key: The key for a predefined lexicon, like ``cell``
+
+    :returns: The configuration for the lexicon
+
+    :raises ValueError: If there's no configuration for the key
+    """
+    for name, submodule in _SUBMODULES.items():
+        if submodule == key:
+            return __getattr__(name)  # type:ignore[no-any-return]
+    raise ValueError(f"no configuration for {key}. Use one of {get_configuration_keys()}")
+
+
+def __getattr__(name: str) -> Any:
+    submodule = _SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
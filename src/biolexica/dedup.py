@@ -0,0 +1,113 @@
+"""Deduplicate and compact assembled literal mappings.
+
+After remapping, many literal mappings from different inputs (or even the same input)
+have the same text for the same reference, e.g., when an ontology lists a term's label
+as an exact synonym too, or when a MeSH term is remapped onto a Cell Ontology term
+with the same label. :func:`deduplicate` merges these into a single literal mapping:
+
+1. Texts are compared after collapsing whitespace, which doesn't affect grounding.
+   Literal mappings in different languages or for different taxa are kept apart,
+   since Gilda filters on the taxon (i.e., the organism) of each term. Literal
+   mappings with different types are deliberately merged, since the only type that
+   affects grounding is a previous name, which is ranked last below.
+2. The literal mapping with the best predicate is kept, where labels come first, then
+   exact, narrow, broad, and related synonyms (see :data:`ssslm.model.PREDICATES`).
+   Previous names come after all others, and ties are broken in favor of the
+   resource the reference comes from, then by which came first.
+3. The provenance of all the merged literal mappings is combined.
+
+This is like what :func:`gilda.term.filter_out_duplicates` does when building a
+grounder, but it also makes the literal mappings files smaller and faster to load.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from collections.abc import Iterable
+
+from curies import Reference, vocabulary
+from ssslm import LiteralMapping
+from ssslm.model import PREDICATES
+
+__all__ = [
+    "deduplicate",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The priority of each predicate, where lower is better
+PREDICATE_PRIORITY = {predicate.pair: i for i, predicate in enumerate(PREDICATES)}
+
+DedupKey = tuple[str, str, str, str | None, tuple[str, str] | None]
+
+
+def _get_key(literal_mapping: LiteralMapping) -> DedupKey:
+    reference = literal_mapping.reference
+    taxon = literal_mapping.taxon
+    return (
+        " ".join(literal_mapping.text.split()),
+        reference.prefix,
+        reference.identifier,
+        literal_mapping.language,
+        (taxon.prefix.casefold(), taxon.identifier) if taxon is not None else None,
+    )
+
+
+def _get_source(literal_mapping: LiteralMapping) -> str:
+    return literal_mapping.source or literal_mapping.reference.prefix
+
+
+def _get_priority(literal_mapping: LiteralMapping) -> tuple[bool, int, bool]:
+    is_previous_name = (
+        literal_mapping.type is not None
+        and literal_mapping.type.pair == vocabulary.previous_name.pair
+    )
+    return (
+        is_previous_name,
+        PREDICATE_PRIORITY.get(literal_mapping.predicate.pair, len(PREDICATE_PRIORITY)),
+        _get_source(literal_mapping).casefold() != literal_mapping.reference.prefix.casefold(),
+    )
+
+
+def deduplicate(
+    literal_mappings: Iterable[LiteralMapping],
+) -> tuple[list[LiteralMapping], Counter[str]]:
+    """Merge literal mappings with the same text, reference, language, and taxon.
+
+    :param literal_mappings: Literal mappings, e.g., after remapping
+
+    :returns: A pair of the deduplicated literal mappings and a counter of how many
+        literal mappings were removed from each source (i.e., the
+        :attr:`ssslm.LiteralMapping.source`, or the prefix of its reference if none).
+        The literal mappings are in the order that their texts and references first
+        appeared.
+    """
+    groups: dict[DedupKey, list[LiteralMapping]] = {}
+    for literal_mapping in literal_mappings:
+        groups.setdefault(_get_key(literal_mapping), []).append(literal_mapping)
+
+    rv: list[LiteralMapping] = []
+    removed: Counter[str] = Counter()
+    for group in groups.values():
+        if len(group) == 1:
+            rv.append(group[0])
+            continue
+        # min() returns the first of several equally good literal mappings
+        best_index = min(range(len(group)), key=lambda i: _get_priority(group[i]))
+        best = group[best_index]
+        provenance = _union_provenance(group)
+        if provenance != best.provenance:
+            best = best.model_copy(update={"provenance": provenance})
+        rv.append(best)
+        for i, literal_mapping in enumerate(group):
+            if i != best_index:
+                removed[_get_source(literal_mapping)] += 1
+    return rv, removed
+
+
+def _union_provenance(literal_mappings: list[LiteralMapping]) -> list[Reference]:
+    rv: dict[Reference, None] = {}
+    for literal_mapping in literal_mappings:
+        rv.update(dict.fromkeys(literal_mapping.provenance))
+    return list(rv)
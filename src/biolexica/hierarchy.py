@@ -0,0 +1,397 @@
+"""An in-memory index of an ontology's hierarchy for taking subsets of literal mappings.
+
+Inputs with ancestors only keep the literal mappings for descendants of the ancestors,
+like :func:`pyobo.get_literal_mappings_subset`. That gets the descendants of each
+ancestor separately, each with a traversal of the hierarchy, so an input with dozens of
+ancestors (like MeSH categories) traverses overlapping parts of the hierarchy again and
+again. A :class:`HierarchyIndex` is built once for a source and gets the descendants
+of all ancestors of an input in a single traversal, which visits each term at most once.
+
+A :class:`ClosureIndex` goes further and precomputes the descendants of every term, so
+taking a subset doesn't traverse the hierarchy at all. Terms are numbered in the
+post-order of a depth-first traversal, so the descendants of a term are a few
+contiguous ranges of numbers (a single range if the hierarchy is a tree). The
+descendants of several ancestors are the union of their ranges, and checking whether a
+term is one of them is a binary search. Closure indexes are stored on disk for each
+version of an ontology, so they're only built once.
+
+.. code-block:: python
+
+    from biolexica.hierarchy import ClosureIndex
+
+    index = ClosureIndex.from_pyobo("mesh")
+    subset = index.get_subset(literal_mappings, ["mesh:D002477", "mesh:D001773"])
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from curies import Reference, ReferenceTuple
+from ssslm import LiteralMapping
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = [
+    "ClosureIndex",
+    "HierarchyIndex",
+]
+
+logger = logging.getLogger(__name__)
+
+#: A range of post-order numbers, including both ends
+Interval = tuple[int, int]
+
+#: Keyword arguments that don't change an ontology's hierarchy
+_SKIP_KWARGS = {"force", "force_process", "use_tqdm"}
+
+
+class HierarchyIndex:
+    """An index of the children of each term in an ontology's hierarchy."""
+
+    def __init__(self, edges: Iterable[tuple[ReferenceTuple, ReferenceTuple]]) -> None:
+        """Build the index.
+
+        :param edges: Pairs of a term and one of its parents, e.g., from
+            ``rdfs:subClassOf`` relations
+        """
+        self.children: dict[ReferenceTuple, list[ReferenceTuple]] = {}
+        for child, parent in edges:
+            self.children.setdefault(parent, []).append(child)
+
+    def __repr__(self) -> str:
+        return f"HierarchyIndex(parents={len(self.children):,})"
+
+    @classmethod
+    def from_pyobo(cls, prefix: str, **kwargs: Any) -> Self:
+        """Build an index from the hierarchy that :func:`pyobo.get_hierarchy` gets.
+
+        :param prefix: The prefix of the ontology
+        :param kwargs: Keyword arguments passed to :func:`pyobo.get_hierarchy`, like
+            in the ``kwargs`` of an input
+
+        :returns: An index of the same hierarchy that :func:`pyobo.get_descendants`
+            uses
+        """
+        import pyobo
+
+        hierarchy = pyobo.get_hierarchy(prefix, **kwargs)
+        rv = cls((child.pair, parent.pair) for child, parent in hierarchy.edges())
+        logger.debug("[%s] indexed %r", prefix, rv)
+        return rv
+
+    def get_descendants(self, ancestors: Iterable[ReferenceTuple]) -> set[ReferenceTuple]:
+        """Get the descendants of any of the given terms.
+
+        :param ancestors: Terms in the hierarchy
+
+        :returns: The terms that are below any of the given terms. Like
+            :func:`pyobo.get_descendants`, ancestors themselves are only included if
+            they're below another one of the ancestors.
+        """
+        rv: set[ReferenceTuple] = set()
+        stack = [child for ancestor in ancestors for child in self.children.get(ancestor, [])]
+        while stack:
+            term = stack.pop()
+            if term in rv:
+                continue
+            rv.add(term)
+            stack.extend(self.children.get(term, []))
+        return rv
+
+    def get_subset(
+        self,
+        literal_mappings: Iterable[LiteralMapping[Any]],
+        ancestors: Sequence[str | Reference],
+    ) -> list[LiteralMapping[Any]]:
+        """Get the literal mappings for descendants of any of the given terms.
+
+        :param literal_mappings: Literal mappings, e.g., for a whole ontology
+        :param ancestors: CURIEs or references for terms in the hierarchy, whose
+            prefixes need to be standardized like the ones in the hierarchy
+
+        :returns: The literal mappings whose references are below any of the given
+            terms, in the same order as they were given
+        """
+        descendants = self.get_descendants(_get_pairs(ancestors))
+        return [
+            literal_mapping
+            for literal_mapping in literal_mappings
+            if literal_mapping.reference.pair in descendants
+        ]
+
+
+def _get_pairs(ancestors: Sequence[str | Reference]) -> list[ReferenceTuple]:
+    return [
+        Reference.from_curie(ancestor).pair if isinstance(ancestor, str) else ancestor.pair
+        for ancestor in ancestors
+    ]
+
+
+def _merge(intervals: list[Interval]) -> list[Interval]:
+    """Merge overlapping and adjacent intervals, in order."""
+    rv: list[Interval] = []
+    for start, end in sorted(intervals):
+        if rv and start <= rv[-1][1] + 1:
+            if end > rv[-1][1]:
+                rv[-1] = (rv[-1][0], end)
+        else:
+            rv.append((start, end))
+    return rv
+
+
+class ClosureIndex:
+    """An index of the descendants of each term in an ontology's hierarchy.
+
+    Each term is numbered in the post-order of a depth-first traversal of the
+    hierarchy, and the descendants of each term are stored as the ranges of their
+    numbers. Hierarchies are expected to be acyclic. If they aren't, edges that close a
+    cycle are ignored.
+    """
+
+    def __init__(self, terms: list[ReferenceTuple], intervals: list[list[Interval]]) -> None:
+        """Instantiate the index.
+
+        :param terms: The terms in the hierarchy, in post-order
+        :param intervals: The ranges of the post-order numbers of the descendants of
+            each term, in the same order as the terms
+        """
+        if len(terms) != len(intervals):
+            raise ValueError(f"got {len(terms):,} terms but {len(intervals):,} intervals")
+        self.terms = terms
+        self.intervals = intervals
+        self.positions = {term: i for i, term in enumerate(terms)}
+
+    def __repr__(self) -> str:
+        return f"ClosureIndex(terms={len(self.terms):,})"
+
+    @classmethod
+    def from_hierarchy(cls, hierarchy: HierarchyIndex) -> Self:
+        """Build an index from the children of each term.
+
+        :param hierarchy: An index of the children of each term
+
+        :returns: An index of the descendants of each term
+        """
+        children = hierarchy.children
+        nodes = dict.fromkeys(
+            term
+            for parent, parent_children in children.items()
+            for term in (parent, *parent_children)
+        )
+        has_parent = {child for parent_children in children.values() for child in parent_children}
+        # starting from the roots gives ranges that follow the hierarchy, then
+        # whatever wasn't reached (i.e., in a cycle) is started from afterwards
+        starts = [node for node in nodes if node not in has_parent]
+        starts.extend(nodes)
+
+        positions: dict[ReferenceTuple, int] = {}
+        terms: list[ReferenceTuple] = []
+        intervals: list[list[Interval]] = []
+        visiting: set[ReferenceTuple] = set()
+        for start in starts:
+            if start in positions:
+                continue
+            stack = [(start, iter(children.get(start, [])))]
+            visiting.add(start)
+            while stack:
+                node, it = stack[-1]
+                child = next(it, None)
+                if child is not None:
+                    if child not in positions and child not in visiting:
+                        visiting.add(child)
+                        stack.append((child, iter(children.get(child, []))))
+                    continue
+                stack.pop()
+                visiting.discard(node)
+                node_intervals: list[Interval] = []
+                for child in children.get(node, []):
+                    # children that aren't numbered yet close a cycle
+                    if (position := positions.get(child)) is not None:
+                        node_intervals.extend(intervals[position])
+                        node_intervals.append((position, position))
+                positions[node] = len(terms)
+                terms.append(node)
+                intervals.append(_merge(node_intervals))
+        return cls(terms, intervals)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[ReferenceTuple, ReferenceTuple]]) -> Self:
+        """Build an index from pairs of a term and one of its parents.
+
+        :param edges: Pairs of a term and one of its parents, e.g., from
+            ``rdfs:subClassOf`` relations
+
+        :returns: An index of the descendants of each term
+        """
+        return cls.from_hierarchy(HierarchyIndex(edges))
+
+    @classmethod
+    def from_pyobo(
+        cls,
+        prefix: str,
+        *,
+        directory: str | Path | None = None,
+        **kwargs: Any,
+    ) -> Self:
+        """Get an index of the hierarchy that :func:`pyobo.get_hierarchy` gets.
+
+        :param prefix: The prefix of the ontology
+        :param directory: The directory in which indexes are stored. Defaults to
+            ``~/.data/biolexica/hierarchy``, which can be configured with :mod:`pystow`
+            using the ``BIOLEXICA_HOME`` environment variable.
+        :param kwargs: Keyword arguments passed to :func:`pyobo.get_hierarchy`, like
+            in the ``kwargs`` of an input. If ``force`` is true, the index is rebuilt.
+
+        :returns: An index of the same hierarchy that :func:`pyobo.get_descendants`
+            uses. It's read from the index stored for the ontology's version, if
+            there's one, otherwise it's built and stored. If the version of the
+            ontology can't be determined, the index isn't stored.
+        """
+        path = _get_pyobo_path(prefix, directory=directory, **kwargs)
+        if path is not None and path.is_file() and not kwargs.get("force"):
+            return cls.read(path)
+        rv = cls.from_hierarchy(HierarchyIndex.from_pyobo(prefix, **kwargs))
+        if path is not None:
+            rv.write(path)
+            logger.info("[%s] stored %r at %s", prefix, rv, path)
+        return rv
+
+    def get_intervals(self, ancestors: Iterable[ReferenceTuple]) -> list[Interval]:
+        """Get the ranges of the descendants of any of the given terms.
+
+        :param ancestors: Terms in the hierarchy. Ones that aren't are skipped.
+
+        :returns: The merged ranges of the post-order numbers of the descendants
+        """
+        return _merge(
+            [
+                interval
+                for ancestor in ancestors
+                if (position := self.positions.get(ancestor)) is not None
+                for interval in self.intervals[position]
+            ]
+        )
+
+    def get_descendants(self, ancestors: Iterable[ReferenceTuple]) -> set[ReferenceTuple]:
+        """Get the descendants of any of the given terms.
+
+        :param ancestors: Terms in the hierarchy
+
+        :returns: The terms that are below any of the given terms, like for
+            :meth:`HierarchyIndex.get_descendants`
+        """
+        return {
+            term
+            for start, end in self.get_intervals(ancestors)
+            for term in self.terms[start : end + 1]
+        }
+
+    def get_subset(
+        self,
+        literal_mappings: Iterable[LiteralMapping[Any]],
+        ancestors: Sequence[str | Reference],
+    ) -> list[LiteralMapping[Any]]:
+        """Get the literal mappings for descendants of any of the given terms.
+
+        :param literal_mappings: Literal mappings, e.g., for a whole ontology
+        :param ancestors: CURIEs or references for terms in the hierarchy, whose
+            prefixes need to be standardized like the ones in the hierarchy
+
+        :returns: The literal mappings whose references are below any of the given
+            terms, in the same order as they were given
+        """
+        intervals = self.get_intervals(_get_pairs(ancestors))
+        starts = [start for start, _ in intervals]
+        rv = []
+        for literal_mapping in literal_mappings:
+            position = self.positions.get(literal_mapping.reference.pair)
+            if position is None:
+                continue
+            i = bisect.bisect_right(starts, position) - 1
+            if i >= 0 and position <= intervals[i][1]:
+                rv.append(literal_mapping)
+        return rv
+
+    def write(self, path: str | Path) -> None:
+        """Write the index as a gzipped TSV file, with a row for each term in post-order.
+
+        :param path: The path to write to. A temporary file is written first, then
+            moved, so a crash doesn't leave a partial index.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp.tsv.gz")
+        os.close(fd)
+        try:
+            with gzip.open(tmp, "wt", newline="") as file:
+                writer = csv.writer(file, delimiter="\t")
+                writer.writerow(("prefix", "identifier", "intervals"))
+                for (prefix, identifier), intervals in zip(self.terms, self.intervals, strict=True):
+                    writer.writerow(
+                        (prefix, identifier, ",".join(f"{start}-{end}" for start, end in intervals))
+                    )
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def read(cls, path: str | Path) -> Self:
+        """Read an index that was written with :meth:`write`.
+
+        :param path: The path to read from
+
+        :returns: The index
+        """
+        terms: list[ReferenceTuple] = []
+        intervals: list[list[Interval]] = []
+        with gzip.open(path, "rt", newline="") as file:
+            reader = csv.reader(file, delimiter="\t")
+            next(reader)  # skip the header
+            for prefix, identifier, intervals_str in reader:
+                terms.append(ReferenceTuple(prefix, identifier))
+                intervals.append(
+                    [
+                        (int(start), int(end))
+                        for start, end in (
+                            interval.split("-") for interval in intervals_str.split(",")
+                        )
+                    ]
+                    if intervals_str
+                    else []
+                )
+        return cls(terms, intervals)
+
+
+def _get_pyobo_path(prefix: str, *, directory: str | Path | None, **kwargs: Any) -> Path | None:
+    """Get the path of the closure index for the version of an ontology, if it has one."""
+    version = kwargs.get("version")
+    if not version:
+        from pyobo.utils.ver import get_version
+
+        version = get_version(prefix, strict=False)
+    if not version:
+        return None
+    if directory is None:
+        import pystow
+
+        directory = pystow.join("biolexica", "hierarchy")
+    # other keyword arguments, like including part of relations, change the hierarchy
+    kwargs_hash = hashlib.sha256(
+        json.dumps(
+            {k: v for k, v in kwargs.items() if k not in _SKIP_KWARGS}, sort_keys=True, default=str
+        ).encode("utf-8")
+    ).hexdigest()[:16]
+    return Path(directory).joinpath(prefix, str(version), f"{kwargs_hash}.tsv.gz")
@@ -0,0 +1,383 @@
+"""Incremental rebuilds of a lexicon from a previous build and a manifest.
+
+When a lexicon is assembled with a manifest, the manifest records which rows of the
+processed literal mappings came from each input (as well as from the extra terms and
+:mod:`biosynonyms`), along with a key for each input that changes when a new version
+of its resource is released (see :func:`biolexica.cache.get_input_key`). On the next
+build, the rows of the inputs whose keys are unchanged are copied from the previous
+processed literal mappings, and only the other inputs are extracted again, then
+remapped and filtered.
+
+Remapping uses the names of literal mappings from *all* inputs, so the manifest also
+records, for each input, the names it contributes to the objects of mappings and which
+of its rows were remapped. This way, the names of remapped rows are recomputed exactly
+as in a full rebuild, even when the input that provided a name changed. If the
+prioritized mappings, excludes, or previous processed literal mappings don't match
+what the manifest was built with, everything is rebuilt.
+
+Since deduplication (see :mod:`biolexica.dedup`) merges literal mappings across
+inputs, the manifest refers to the literal mappings from before deduplication when
+it's used. These are kept in a file next to the manifest (see
+:func:`get_segments_path`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pickle
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import ssslm
+from curies import Reference, ReferenceTuple
+from pydantic import BaseModel, Field
+from ssslm import LiteralMapping
+
+from .api import Configuration, Input, _iter_input_literal_mappings
+from .cache import _hash_file, get_input_key
+from .instrument import timed
+
+if TYPE_CHECKING:
+    from .cache import InputCache
+    from .remapping import RemappingIndex
+
+__all__ = [
+    "Manifest",
+    "Segment",
+    "assemble_segments",
+    "get_reusable_inputs",
+    "get_segments_path",
+    "read_manifest",
+    "write_manifest",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Increment this when the manifest format changes so old manifests aren't used
+MANIFEST_FORMAT_VERSION = 1
+
+#: The key for the segment of extra literal mappings
+EXTRA_KEY = "extra"
+
+#: The key for the segment of literal mappings from :mod:`biosynonyms`
+BIOSYNONYMS_KEY = "biosynonyms"
+
+
+class Segment(BaseModel):
+    """The rows of processed literal mappings that came from one input."""
+
+    key: str = Field(..., description="A key identifying the input")
+    fingerprint: str | None = Field(
+        None,
+        description="A key that changes when the input's literal mappings could change. "
+        "If none, the input is always extracted again.",
+    )
+    start: int = Field(..., description="The first row from this input")
+    stop: int = Field(..., description="The row after the last row from this input")
+    names: dict[str, str] = Field(
+        default_factory=dict,
+        description="Names this input contributes to the objects of mappings, by CURIE",
+    )
+    remapped: list[tuple[int, str]] = Field(
+        default_factory=list,
+        description="The offsets of remapped rows in this input, with the CURIEs of "
+        "the subjects of the mappings used to remap them",
+    )
+
+
+class Manifest(BaseModel):
+    """A manifest of how a lexicon's processed literal mappings were built."""
+
+    format: int = MANIFEST_FORMAT_VERSION
+    fingerprint: str = Field(
+        ..., description="A hash of the prioritized mappings and excludes used for the build"
+    )
+    artifact_sha256: str | None = Field(
+        None, description="The SHA-256 hash of the processed literal mappings file"
+    )
+    segments: list[Segment]
+
+
+def get_segments_path(manifest_path: Path) -> Path:
+    """Get the path for literal mappings before deduplication, next to a manifest."""
+    return manifest_path.with_name(f"{manifest_path.stem}.segments.ssslm.tsv.gz")
+
+
+def write_manifest(
+    manifest: Manifest,
+    path: Path,
+    *,
+    artifact_path: Path | None,
+    literal_mappings: list[LiteralMapping] | None = None,
+) -> None:
+    """Write a manifest, with the hash of the literal mappings file it refers to.
+
+    :param manifest: The manifest
+    :param path: Where to write the manifest
+    :param artifact_path: The literal mappings file the manifest refers to
+    :param literal_mappings: If given, the literal mappings to write to the
+        artifact path first, e.g., when the processed literal mappings are
+        deduplicated and therefore don't match the manifest's segments
+    """
+    if artifact_path is not None and literal_mappings is not None:
+        ssslm.write_literal_mappings(literal_mappings, artifact_path)
+    if artifact_path is not None:
+        manifest.artifact_sha256 = _hash_file(artifact_path)
+    path.write_text(manifest.model_dump_json())
+
+
+def read_manifest(path: str | Path) -> Manifest | None:
+    """Read a manifest, if it exists and is in the current format."""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    try:
+        rv = Manifest.model_validate_json(path.read_text())
+    except ValueError:
+        logger.warning("could not read manifest from %s", path)
+        return None
+    if rv.format != MANIFEST_FORMAT_VERSION:
+        return None
+    return rv
+
+
+def _get_fingerprint(remapping_index: RemappingIndex, excludes: Iterable[Reference] | None) -> str:
+    """Hash the prioritized mappings and excludes, which affect the rows of all inputs."""
+    digest = hashlib.sha256()
+    digest.update(pickle.dumps(sorted(remapping_index.targets.items())))
+    digest.update(json.dumps(sorted(e.curie for e in excludes or [])).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _hash_literal_mappings(literal_mappings: Iterable[LiteralMapping]) -> str:
+    digest = hashlib.sha256()
+    for literal_mapping in literal_mappings:
+        digest.update(literal_mapping.model_dump_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _get_input_segment_key(inp: Input) -> str:
+    return inp.model_dump_json(exclude_none=True)
+
+
+def get_reusable_inputs(
+    configuration: Configuration,
+    remapping_index: RemappingIndex,
+    *,
+    previous_path: Path | None,
+    previous_manifest: Manifest | None,
+) -> list[Input]:
+    """Get the inputs whose rows would be reused by :func:`assemble_segments`.
+
+    :param configuration: The configuration for the lexicon
+    :param remapping_index: The prioritized mappings used for remapping
+    :param previous_path: The processed literal mappings from a previous build
+    :param previous_manifest: The manifest from the previous build
+
+    :returns: The inputs that haven't changed since the previous build, which don't
+        need to be extracted again
+    """
+    fingerprint = _get_fingerprint(remapping_index, configuration.excludes)
+    reusable = _get_reusable_segments(previous_path, previous_manifest, fingerprint)
+    if not reusable:
+        return []
+    return [
+        inp
+        for inp in configuration.inputs
+        if (segment := reusable.get(_get_input_segment_key(inp))) is not None
+        and segment.fingerprint == get_input_key(inp)
+    ]
+
+
+def assemble_segments(
+    configuration: Configuration,
+    remapping_index: RemappingIndex,
+    *,
+    extra_terms: Sequence[LiteralMapping] | None = None,
+    include_biosynonyms: bool = True,
+    workers: int | None = None,
+    cache: InputCache | None = None,
+    previous_path: Path | None = None,
+    previous_manifest: Manifest | None = None,
+) -> tuple[list[LiteralMapping], Manifest]:
+    """Assemble processed literal mappings, reusing rows from a previous build.
+
+    :param configuration: The configuration for the lexicon
+    :param remapping_index: The prioritized mappings used for remapping
+    :param extra_terms: Additional literal mappings to include
+    :param include_biosynonyms: Should literal mappings from :mod:`biosynonyms` be
+        included?
+    :param workers: The number of processes used to extract inputs
+    :param cache: An input cache for extracting inputs
+    :param previous_path: The processed literal mappings from a previous build
+    :param previous_manifest: The manifest from the previous build
+
+    :returns: The processed literal mappings, which are the same as from a full build,
+        and a manifest for them. The manifest's ``artifact_sha256`` should be filled in
+        once the literal mappings are written.
+    """
+    fingerprint = _get_fingerprint(remapping_index, configuration.excludes)
+
+    specs: list[tuple[str, str | None, Input | Sequence[LiteralMapping]]] = [
+        (_get_input_segment_key(inp), get_input_key(inp), inp) for inp in configuration.inputs
+    ]
+    if extra_terms:
+        specs.append((EXTRA_KEY, _hash_literal_mappings(extra_terms), extra_terms))
+    if include_biosynonyms:
+        import biosynonyms
+
+        # these are small, so they're always processed again
+        specs.append((BIOSYNONYMS_KEY, None, biosynonyms.get_positive_synonyms()))
+
+    reusable = _get_reusable_segments(previous_path, previous_manifest, fingerprint)
+    reused = {
+        key: segment
+        for key, fp, _ in specs
+        if (segment := reusable.get(key)) is not None and segment.fingerprint == fp
+    }
+    previous_rows: list[LiteralMapping] = []
+    if reused and previous_path is not None:
+        with timed("read_previous") as stage:
+            previous_rows = ssslm.read_literal_mappings(previous_path)
+            stage.count = len(previous_rows)
+
+    changed_inputs = [
+        source for key, _, source in specs if isinstance(source, Input) and key not in reused
+    ]
+    logger.info(
+        "extracting %d of %d inputs, reusing the rest from %s",
+        len(changed_inputs),
+        len(configuration.inputs),
+        previous_path,
+    )
+    extracted = {
+        _get_input_segment_key(inp): input_terms
+        for inp, input_terms in _iter_input_literal_mappings(
+            changed_inputs, workers=workers, cache=cache
+        )
+    }
+
+    target_curies = {
+        ReferenceTuple(prefix, identifier).curie
+        for prefix, identifier, _ in remapping_index.targets.values()
+    }
+    excludes = set(configuration.excludes or [])
+    parts: list[tuple[list[LiteralMapping], Segment]] = []
+    # excludes are applied along with remapping, so they're not timed separately
+    with timed("remap") as stage:
+        for key, fp, source in specs:
+            if key in reused:
+                segment = reused[key]
+                rows = previous_rows[segment.start : segment.stop]
+            else:
+                rows, segment = _process_segment(
+                    key,
+                    fp,
+                    extracted[key] if isinstance(source, Input) else source,
+                    remapping_index,
+                    target_curies,
+                    excludes,
+                )
+            parts.append((rows, segment))
+        _fill_names(parts, remapping_index)
+        stage.count = sum(len(rows) for rows, _ in parts)
+    literal_mappings: list[LiteralMapping] = []
+    segments: list[Segment] = []
+    for rows, segment in parts:
+        start = len(literal_mappings)
+        literal_mappings.extend(rows)
+        segments.append(segment.model_copy(update={"start": start, "stop": len(literal_mappings)}))
+
+    return literal_mappings, Manifest(fingerprint=fingerprint, segments=segments)
+
+
+def _fill_names(
+    parts: list[tuple[list[LiteralMapping], Segment]], remapping_index: RemappingIndex
+) -> None:
+    """Fill in names for remapped rows in place, like :meth:`RemappingIndex.remap`.
+
+    Names from literal mappings for the object of a mapping take precedence over
+    the name in the mapping itself.
+    """
+    names: dict[str, str] = {}
+    for _, segment in parts:
+        for curie, target_name in segment.names.items():
+            names.setdefault(curie, target_name)
+    for rows, segment in parts:
+        for offset, subject in segment.remapped:
+            reference = rows[offset].reference
+            _, _, mapping_name = remapping_index.targets[ReferenceTuple.from_curie(subject)]
+            name: str | None = names.get(reference.curie) or mapping_name
+            if name != reference.name:
+                rows[offset] = rows[offset].model_copy(
+                    update={"reference": reference.model_copy(update={"name": name})}
+                )
+
+
+def _get_reusable_segments(
+    previous_path: Path | None, previous_manifest: Manifest | None, fingerprint: str
+) -> dict[str, Segment]:
+    """Get the segments from the previous build that can be reused, by key."""
+    if previous_manifest is None or previous_path is None or not previous_path.is_file():
+        return {}
+    if previous_manifest.fingerprint != fingerprint:
+        logger.info("prioritized mappings or excludes changed, rebuilding all inputs")
+        return {}
+    if previous_manifest.artifact_sha256 != _hash_file(previous_path):
+        logger.info("%s doesn't match its manifest, rebuilding all inputs", previous_path)
+        return {}
+    rv: dict[str, Segment] = {}
+    for segment in previous_manifest.segments:
+        if segment.fingerprint is not None:
+            rv.setdefault(segment.key, segment)
+    return rv
+
+
+def _process_segment(
+    key: str,
+    fingerprint: str | None,
+    literal_mappings: Iterable[LiteralMapping],
+    remapping_index: RemappingIndex,
+    target_curies: set[str],
+    excludes: set[Reference],
+) -> tuple[list[LiteralMapping], Segment]:
+    """Remap and filter the literal mappings from one input.
+
+    Names of remapped rows are only filled in from the mappings themselves, since names
+    from other inputs are only available once all inputs are processed.
+    """
+    rows: list[LiteralMapping] = []
+    names: dict[str, str] = {}
+    remapped: list[tuple[int, str]] = []
+    for literal_mapping in literal_mappings:
+        reference = literal_mapping.reference
+        target = remapping_index.get(reference.prefix, reference.identifier)
+        if target is None:
+            if reference.name and reference.curie in target_curies:
+                names.setdefault(reference.curie, reference.name)
+        else:
+            prefix, identifier, name = target
+            literal_mapping = literal_mapping.model_copy(
+                update={
+                    "reference": reference.__class__(
+                        prefix=prefix, identifier=identifier, name=name
+                    )
+                }
+            )
+        if literal_mapping.reference in excludes:
+            continue
+        if target is not None:
+            remapped.append((len(rows), reference.curie))
+        rows.append(literal_mapping)
+    segment = Segment(
+        key=key,
+        fingerprint=fingerprint,
+        start=0,
+        stop=len(rows),
+        names=names,
+        remapped=remapped,
+    )
+    return rows, segment
@@ -0,0 +1,343 @@
+"""A read-only, memory-mapped grounder index that can be shared between processes.
+
+A grounder built from a ``*.ssslm.tsv.gz`` file (or loaded from a snapshot with
+:mod:`biolexica.snapshot`) lives in each process's private heap, so running a web
+application with several workers uses memory proportional to the number of workers
+times the size of the lexicon. The index here instead stores the normalized texts,
+CURIEs, names, predicates (statuses), and sources in flat arrays in a single file.
+Each process memory-maps the file, so the pages are shared through the operating
+system's page cache and Gilda terms are only created for the entries that are looked
+up.
+
+The file starts with a JSON header line that identifies the literal mappings file it
+was built from and where each array is, followed by the arrays themselves:
+
+- a string table holding each distinct string in the terms (i.e., texts, prefixes,
+  identifiers, names, statuses, sources, and organisms) once
+- the sorted normalized texts, which are searched with bisection
+- for each normalized text, the range of its rows
+- the rows, where each row has one integer for each field of a Gilda term other
+  than the normalized text, pointing into the string table (or -1 for missing values)
+- the sorted first words of the normalized texts and their span lengths, which Gilda
+  uses for named entity recognition
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
+
+from .snapshot import SSSLM_SUFFIX, _get_header
+
+if TYPE_CHECKING:
+    import gilda
+    import ssslm
+
+__all__ = [
+    "get_index_path",
+    "read_index",
+    "write_index",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Increment this when the index format changes so old indexes are considered stale
+INDEX_FORMAT_VERSION = 1
+
+#: The suffix for index files
+INDEX_SUFFIX = ".grounder.idx"
+
+#: The number of fields of a Gilda term that are stored in each row, i.e., all
+#: except for the normalized text
+ROW_WIDTH = 9
+
+#: Sections are aligned so they can be cast to arrays of 8-byte integers
+ALIGNMENT = 8
+
+
+def get_index_path(path: str | Path) -> Path:
+    """Get the path for the shared index of a literal mappings file.
+
+    >>> get_index_path("lexica/cell/cell.ssslm.tsv.gz").name
+    'cell.grounder.idx'
+    """
+    path = Path(path)
+    return path.with_name(path.name.removesuffix(SSSLM_SUFFIX) + INDEX_SUFFIX)
+
+
+def _encode_strings(strings: Iterable[str]) -> tuple[bytes, bytes]:
+    """Encode strings as a table of offsets and the concatenated UTF-8 data."""
+    offsets = array("q", [0])
+    data = bytearray()
+    for string in strings:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    return offsets.tobytes(), bytes(data)
+
+
+def write_index(
+    path: str | Path,
+    *,
+    grounder: ssslm.GildaGrounder | None = None,
+    index_path: str | Path | None = None,
+) -> Path:
+    """Write a shared index of the grounder built from a literal mappings file.
+
+    :param path: The path to a literal mappings file
+    :param grounder: The grounder built from the literal mappings file, if it's already
+        been built. Otherwise, it's built here.
+    :param index_path: Where to write the index. Defaults to :func:`get_index_path`.
+
+    :returns: The path to the index
+    """
+    path = Path(path).expanduser().resolve()
+    index_path = get_index_path(path) if index_path is None else Path(index_path).resolve()
+    if grounder is None:
+        import ssslm
+
+        built = ssslm.make_grounder(path)
+        if not isinstance(built, ssslm.GildaGrounder):
+            raise TypeError(f"indexes can only be written for Gilda grounders, got {built}")
+        grounder = built
+
+    gilda_grounder: gilda.Grounder = grounder._grounder
+
+    string_ids: dict[str, int] = {}
+    rows = array("i")
+    keys = sorted(gilda_grounder.entries)
+    key_starts = array("q", [0])
+    for key in keys:
+        for term in gilda_grounder.entries[key]:
+            for value in term.to_list()[1:]:  # type:ignore[no-untyped-call]
+                rows.append(-1 if value is None else string_ids.setdefault(value, len(string_ids)))
+        key_starts.append(len(rows) // ROW_WIDTH)
+
+    words = sorted(gilda_grounder.prefix_index)
+    word_starts = array("q", [0])
+    spans = array("i")
+    for word in words:
+        spans.extend(sorted(gilda_grounder.prefix_index[word]))
+        word_starts.append(len(spans))
+
+    strings_offsets, strings_data = _encode_strings(string_ids)
+    keys_offsets, keys_data = _encode_strings(keys)
+    words_offsets, words_data = _encode_strings(words)
+    sections = {
+        "strings_offsets": strings_offsets,
+        "strings_data": strings_data,
+        "keys_offsets": keys_offsets,
+        "keys_data": keys_data,
+        "key_starts": key_starts.tobytes(),
+        "rows": rows.tobytes(),
+        "words_offsets": words_offsets,
+        "words_data": words_data,
+        "word_starts": word_starts.tobytes(),
+        "spans": spans.tobytes(),
+    }
+    # offsets are relative to the end of the header, which is padded for alignment
+    layout: dict[str, tuple[int, int]] = {}
+    position = 0
+    for name, section in sections.items():
+        layout[name] = (position, len(section))
+        position += _pad(len(section))
+
+    header = {
+        **_get_header(path),
+        "index_format": INDEX_FORMAT_VERSION,
+        "itemsize": {"i": array("i").itemsize, "q": array("q").itemsize},
+        "byteorder": sys.byteorder,
+        "sections": layout,
+    }
+    header_bytes = json.dumps(header).encode("utf-8") + b"\n"
+    fd, tmp = tempfile.mkstemp(dir=index_path.parent, prefix=f".{index_path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(header_bytes + b"\0" * (_pad(len(header_bytes)) - len(header_bytes)))
+            for section in sections.values():
+                file.write(section + b"\0" * (_pad(len(section)) - len(section)))
+        # temporary files are only readable by their owner, but the index
+        # should be readable by server processes running as other users
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, index_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.info("wrote shared grounder index to %s", index_path)
+    return index_path
+
+
+def _pad(n: int) -> int:
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def read_index(
+    path: str | Path, *, index_path: str | Path | None = None
+) -> ssslm.GildaGrounder | None:
+    """Read the shared index of the grounder built from a literal mappings file.
+
+    :param path: The path to a literal mappings file
+    :param index_path: Where the index was written. Defaults to :func:`get_index_path`.
+
+    :returns: A grounder whose entries are read from a memory map of the index, or
+        None if there's no index or if it's stale, i.e., the literal mappings file or
+        the versions of :mod:`ssslm` or :mod:`gilda` changed since it was written.
+    """
+    path = Path(path).expanduser().resolve()
+    index_path = get_index_path(path) if index_path is None else Path(index_path).resolve()
+    if not index_path.is_file() or not index_path.stat().st_size:
+        return None
+
+    with index_path.open("rb") as file:
+        # the memory map stays valid after the file is closed
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    header_end = mm.find(b"\n") + 1
+    try:
+        header = json.loads(mm[:header_end])
+    except json.JSONDecodeError:
+        logger.warning("invalid grounder index header in %s", index_path)
+        mm.close()
+        return None
+    expected = {
+        **_get_header(path),
+        "index_format": INDEX_FORMAT_VERSION,
+        "itemsize": {"i": array("i").itemsize, "q": array("q").itemsize},
+        "byteorder": sys.byteorder,
+    }
+    if any(header.get(key) != value for key, value in expected.items()):
+        logger.info("grounder index is stale: %s", index_path)
+        mm.close()
+        return None
+
+    payload = memoryview(mm)[_pad(header_end) :]
+    sections = {
+        name: payload[offset : offset + length]
+        for name, (offset, length) in header["sections"].items()
+    }
+
+    import gilda
+    import ssslm
+
+    strings = _StringTable(sections["strings_offsets"], sections["strings_data"])
+    entries = _IndexEntries(
+        keys=_StringTable(sections["keys_offsets"], sections["keys_data"]),
+        key_starts=sections["key_starts"].cast("q"),
+        rows=sections["rows"].cast("i"),
+        strings=strings,
+    )
+    prefix_index = _PrefixIndex(
+        words=_StringTable(sections["words_offsets"], sections["words_data"]),
+        word_starts=sections["word_starts"].cast("q"),
+        spans=sections["spans"].cast("i"),
+    )
+    # passing a non-dict mapping to the constructor would be treated as a list of terms
+    gilda_grounder = gilda.Grounder({})
+    gilda_grounder.entries = entries
+    gilda_grounder._prefix_index = prefix_index  # type:ignore[assignment]
+    return ssslm.GildaGrounder(gilda_grounder)
+
+
+class _StringTable(Sequence[str]):
+    """A sequence of strings decoded on access from a table of offsets and UTF-8 data."""
+
+    def __init__(self, offsets: memoryview, data: memoryview) -> None:
+        self._offsets = offsets.cast("q")
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | Sequence[str]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self._data[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+
+    def index_of(self, value: str) -> int | None:
+        """Get the position of a string in a sorted table using bisection."""
+        i = bisect.bisect_left(self, value)
+        if i < len(self) and self[i] == value:
+            return i
+        return None
+
+
+class _IndexEntries(Mapping[str, list["gilda.Term"]]):
+    """A mapping from normalized text to Gilda terms backed by the arrays in an index."""
+
+    def __init__(
+        self,
+        *,
+        keys: _StringTable,
+        key_starts: memoryview,
+        rows: memoryview,
+        strings: _StringTable,
+    ) -> None:
+        self._keys = keys
+        self._key_starts = key_starts
+        self._rows = rows
+        self._strings = strings
+
+    def __getitem__(self, norm_text: str) -> list[gilda.Term]:
+        from gilda import Term
+
+        i = self._keys.index_of(norm_text)
+        if i is None:
+            raise KeyError(norm_text)
+        return [
+            Term(norm_text, *self._get_row(row))  # type:ignore[no-untyped-call]
+            for row in range(self._key_starts[i], self._key_starts[i + 1])
+        ]
+
+    def _get_row(self, row: int) -> list[str | None]:
+        start = row * ROW_WIDTH
+        return [
+            None if string_id < 0 else self._strings[string_id]
+            for string_id in self._rows[start : start + ROW_WIDTH]
+        ]
+
+    def __contains__(self, norm_text: Any) -> bool:
+        return isinstance(norm_text, str) and self._keys.index_of(norm_text) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class _PrefixIndex(Mapping[str, tuple[int, ...]]):
+    """A mapping from the first word of normalized texts to their numbers of words."""
+
+    def __init__(self, *, words: _StringTable, word_starts: memoryview, spans: memoryview) -> None:
+        self._words = words
+        self._word_starts = word_starts
+        self._spans = spans
+
+    def __getitem__(self, word: str) -> tuple[int, ...]:
+        i = self._words.index_of(word)
+        if i is None:
+            raise KeyError(word)
+        return tuple(self._spans[self._word_starts[i] : self._word_starts[i + 1]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._words)
+
+    def __len__(self) -> int:
+        return len(self._words)
@@ -0,0 +1,281 @@
+"""Measure where time goes when building and serving lexica.
+
+When a lexicon is built with :func:`biolexica.assemble_terms`, each stage of the build
+is timed and the number of records that came out of it is counted, e.g.,:
+
+1. ``extract[<source>]``, for each input that wasn't loaded from the input cache
+2. ``load_cached``, for the inputs that were loaded from the input cache
+3. ``remapping_index``, for assembling the mappings used for remapping
+4. ``remap`` and ``excludes``
+5. ``deduplicate``
+6. ``dataframe``, ``write_processed``, ``write_parquet``, ``write_gilda``, and
+   ``summarize``, for serialization and the summary
+
+The breakdown is written to the summary as :attr:`biolexica.summary.Summary.timings`.
+Stages can be timed elsewhere with :func:`timed` and collected with
+:func:`collect_timings`:
+
+.. code-block:: python
+
+    from biolexica.instrument import collect_timings, timed
+
+    with collect_timings() as timings:
+        with timed("my_stage") as stage:
+            stage.count = len(do_work())
+
+To find out where time goes within a stage, wrap it in :func:`profile`, which uses
+:mod:`cProfile` or, for HTML reports, :mod:`pyinstrument`. This is also available as
+``biolexica assemble --profile``.
+
+Finally, :class:`Metrics` keeps Prometheus-style counters and latency histograms, which
+the apps from :func:`biolexica.web.get_app` and :func:`biolexica.web.get_multi_app`
+serve in the Prometheus text format at ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "Metrics",
+    "Stage",
+    "StageTiming",
+    "collect_timings",
+    "profile",
+    "record",
+    "timed",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The upper bounds of the buckets for latency histograms, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#: The content type of the Prometheus text format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class StageTiming(BaseModel):
+    """The time spent in a stage and the number of records that came out of it."""
+
+    seconds: float = Field(..., description="The wall time spent in the stage, in seconds")
+    count: int | None = Field(
+        None, description="The number of records that came out of the stage, if counted"
+    )
+
+
+_timings: ContextVar[dict[str, StageTiming] | None] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[dict[str, StageTiming]]:
+    """Collect the timings of the stages run within this context.
+
+    :yields: A dictionary from the names of stages to their timings, in the order that
+        they first finished, which is filled in as stages finish. Stages with the same
+        name are added together.
+    """
+    timings: dict[str, StageTiming] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def record(name: str, seconds: float, count: int | None = None) -> None:
+    """Record the timing of a stage, if timings are being collected.
+
+    This is for stages that are timed elsewhere, e.g., in another process. Otherwise,
+    use :func:`timed`.
+
+    :param name: The name of the stage
+    :param seconds: The time spent in the stage
+    :param count: The number of records that came out of the stage
+    """
+    logger.debug("%s took %.3f seconds for %s records", name, seconds, count)
+    timings = _timings.get()
+    if timings is None:
+        return
+    existing = timings.get(name)
+    if existing is not None:
+        seconds += existing.seconds
+        if existing.count is not None:
+            count = existing.count + (count or 0)
+    timings[name] = StageTiming(seconds=seconds, count=count)
+
+
+class Stage:
+    """A stage that's being timed."""
+
+    def __init__(self, name: str, count: int | None = None) -> None:
+        """Initialize the stage.
+
+        :param name: The name of the stage
+        :param count: The number of records that came out of the stage, which can also
+            be set before the stage finishes
+        """
+        self.name = name
+        self.count = count
+
+
+@contextmanager
+def timed(name: str, count: int | None = None) -> Iterator[Stage]:
+    """Time a stage and record it with :func:`record` when it finishes.
+
+    :param name: The name of the stage
+    :param count: The number of records that came out of the stage, if it's already
+        known
+
+    :yields: The stage, whose ``count`` can be set before it finishes
+    """
+    stage = Stage(name, count)
+    start = time.perf_counter()
+    yield stage
+    record(name, time.perf_counter() - start, stage.count)
+
+
+@contextmanager
+def profile(path: str | Path | None) -> Iterator[None]:
+    """Profile the code run within this context.
+
+    :param path: Where to write the profile. If it ends with ``.html``, the code is
+        profiled with :mod:`pyinstrument` and an HTML report is written, which requires
+        ``pip install biolexica[profile]``. Otherwise, it's profiled with
+        :mod:`cProfile` and the statistics are written in the format of :mod:`pstats`,
+        which can be viewed with, e.g., ``snakeviz``. If none, nothing is profiled.
+
+    :yields: Nothing
+    """
+    if path is None:
+        yield
+        return
+
+    path = Path(path)
+    if path.suffix == ".html":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path.write_text(profiler.output_html())
+    else:
+        import cProfile
+
+        with cProfile.Profile() as c_profile:
+            try:
+                yield
+            finally:
+                c_profile.dump_stats(path)
+    logger.info("wrote profile to %s", path)
+
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """Prometheus-style counters and histograms.
+
+    This implements just enough of what :mod:`prometheus_client` does to count events
+    and observe latencies in a server, and to expose them in the Prometheus text format
+    with :meth:`render`. It's safe to use from several threads.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Initialize the metrics.
+
+        :param buckets: The upper bounds of the buckets for histograms, in increasing
+            order. There's always an extra bucket for all observations.
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._documentation: dict[str, str] = {}
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, list[float]]] = {}
+
+    def describe(self, name: str, documentation: str) -> None:
+        """Add the documentation for a metric, which is rendered as its ``HELP``."""
+        self._documentation[name] = documentation
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increment a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add an observation, like a latency in seconds, to a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {})
+            # the bucket counts, then the sum, then the count of all observations
+            values = histogram.get(key)
+            if values is None:
+                values = histogram[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def get(self, name: str, **labels: str) -> float:
+        """Get the value of a counter, or the number of observations in a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if name in self._histograms:
+                return self._histograms[name].get(key, [0.0])[-1]
+            return self._counters.get(name, {}).get(key, 0.0)
+
+    def render(self) -> str:
+        """Get all metrics in the Prometheus text format."""
+        lines: list[str] = []
+        with self._lock:
+            for name, counter in sorted(self._counters.items()):
+                lines.extend(self._get_header(name, "counter"))
+                for key, value in sorted(counter.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, histogram in sorted(self._histograms.items()):
+                lines.extend(self._get_header(name, "histogram"))
+                for key, values in sorted(histogram.items()):
+                    for bound, value in zip(self.buckets, values, strict=False):
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(key + le)} {value:.0f}")
+                    inf = (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(key + inf)} {values[-1]:.0f}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(values[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {values[-1]:.0f}")
+        return "".join(f"{line}\n" for line in lines)
+
+    def _get_header(self, name: str, kind: str) -> list[str]:
+        rv = [f"# TYPE {name} {kind}"]
+        if documentation := self._documentation.get(name):
+            rv.insert(0, f"# HELP {name} {documentation}")
+        return rv
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{{{inner}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
@@ -0,0 +1,305 @@
+"""Memoize grounding and annotation for corpora with repeated text.
+
+Across a corpus like PubMed abstracts, the same sentences (e.g., boilerplate about
+funding or ethics approval) and the same candidate noun phrases come up again and
+again, but a grounder normalizes and looks up each one every time. A
+:class:`CachingGrounder` wraps a grounder with two bounded, least-recently-used caches:
+
+1. a *span* cache from a text span to its matches, used by
+   :meth:`CachingGrounder.get_matches` and for each candidate span while annotating
+2. a *sentence* cache from a sentence to its annotations, relative to the start of the
+   sentence, used by :meth:`CachingGrounder.annotate`
+
+Gilda annotates each sentence of a text independently, so annotations from a cached
+sentence are the same as when annotating the whole text, shifted by where the sentence
+starts. The only exception is a span with a disambiguation model, whose matches depend
+on the whole text as context. Such spans (and the sentences containing them) are never
+cached. Both caches can be used from several threads at the same time.
+
+.. code-block:: python
+
+    import biolexica
+
+    grounder = biolexica.load_grounder("phenotype", cache=True)
+    for abstract in abstracts:
+        annotations = grounder.annotate(abstract)
+    print(grounder.cache_info()["sentence"].hit_rate)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar
+
+import ssslm
+
+if TYPE_CHECKING:
+    import gilda
+
+__all__ = [
+    "CacheInfo",
+    "CachingGrounder",
+]
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+#: An annotation of a sentence, as the start, end, and matches for the span
+SentenceAnnotation = tuple[int, int, tuple[ssslm.Match, ...]]
+
+#: Keyword arguments that can be part of a cache key. Others skip the caches.
+CACHEABLE_KWARGS = {"organisms", "namespaces"}
+
+
+class CacheInfo(NamedTuple):
+    """Statistics about a cache, like :func:`functools.lru_cache`'s ``cache_info()``."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the fraction of lookups that were hits."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _LRUCache(Generic[K, V]):
+    """A bounded, least-recently-used cache that's safe to use from several threads."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+class CachingGrounder(ssslm.Grounder):
+    """A grounder that memoizes the matches for spans and annotations for sentences."""
+
+    def __init__(
+        self,
+        grounder: ssslm.Grounder,
+        *,
+        span_cache_size: int = 100_000,
+        sentence_cache_size: int = 10_000,
+    ) -> None:
+        """Wrap a grounder.
+
+        :param grounder: The grounder to wrap
+        :param span_cache_size: The maximum number of spans to cache matches for
+        :param sentence_cache_size: The maximum number of sentences to cache
+            annotations for. If the grounder isn't backed by Gilda, whole texts are
+            cached instead, since they can't be split into sentences consistently with
+            how the grounder annotates.
+        """
+        self.grounder = grounder
+        self._span_cache: _LRUCache[Hashable, tuple[ssslm.Match, ...]] = _LRUCache(span_cache_size)
+        self._sentence_cache: _LRUCache[Hashable, tuple[SentenceAnnotation, ...]] = _LRUCache(
+            sentence_cache_size
+        )
+        self._sentence_tokenizer: Any = None
+        if isinstance(grounder, ssslm.GildaGrounder):
+            from nltk.tokenize import PunktSentenceTokenizer
+
+            # this is the same sentence splitter gilda uses by default
+            self._sentence_tokenizer = PunktSentenceTokenizer()
+
+    def cache_info(self) -> dict[str, CacheInfo]:
+        """Get statistics for the span and sentence caches."""
+        return {"span": self._span_cache.info(), "sentence": self._sentence_cache.info()}
+
+    def cache_clear(self) -> None:
+        """Clear both caches and reset their statistics."""
+        self._span_cache.clear()
+        self._sentence_cache.clear()
+
+    def not_empty(self) -> bool:
+        """Return if the wrapped grounder has lookups indexed in it."""
+        return self.grounder.not_empty()
+
+    def get_matches(self, text: str, **kwargs: Any) -> list[ssslm.Match]:
+        """Get matches for the text, using the span cache."""
+        key = _get_key(text, kwargs)
+        # without context, the matches can't depend on it, so disambiguation
+        # models only need to be checked (and loaded) when there's context
+        if key is None or (kwargs.get("context") and not self._is_context_free(text)):
+            return self.grounder.get_matches(text, **kwargs)
+        matches = self._span_cache.get(key)
+        if matches is None:
+            matches = tuple(self.grounder.get_matches(text, **kwargs))
+            self._span_cache.put(key, matches)
+        return list(matches)
+
+    def annotate(self, text: str, **kwargs: Any) -> list[ssslm.Annotation]:
+        """Annotate the text, using the sentence and span caches."""
+        key = _get_key(text, kwargs)
+        if key is None:
+            return self.grounder.annotate(text, **kwargs)
+        if self._sentence_tokenizer is None:
+            return self._annotate_whole(text, key, kwargs)
+        rv: list[ssslm.Annotation] = []
+        for sentence_start, sentence_end in self._sentence_tokenizer.span_tokenize(text):
+            sentence = text[sentence_start:sentence_end]
+            for start, end, matches in self._annotate_sentence(text, sentence, kwargs):
+                # the matches came from the grounder, so they don't need to be validated again
+                rv.extend(
+                    ssslm.Annotation.model_construct(
+                        text=text,
+                        match=match,
+                        start=sentence_start + start,
+                        end=sentence_start + end,
+                    )
+                    for match in matches
+                )
+        return rv
+
+    def _annotate_whole(
+        self, text: str, key: Hashable, kwargs: dict[str, Any]
+    ) -> list[ssslm.Annotation]:
+        """Annotate a text with a grounder that isn't backed by Gilda, caching the whole text."""
+        cached = self._sentence_cache.get(key)
+        if cached is None:
+            annotations = self.grounder.annotate(text, **kwargs)
+            self._sentence_cache.put(key, tuple((a.start, a.end, (a.match,)) for a in annotations))
+            return annotations
+        return [
+            ssslm.Annotation.model_construct(text=text, match=match, start=start, end=end)
+            for start, end, matches in cached
+            for match in matches
+        ]
+
+    def _annotate_sentence(
+        self, text: str, sentence: str, kwargs: dict[str, Any]
+    ) -> tuple[SentenceAnnotation, ...]:
+        key = _get_key(sentence, kwargs)
+        cached = self._sentence_cache.get(key)
+        if cached is not None:
+            return cached
+
+        import gilda.ner
+
+        span_grounder = _SpanGrounder(self, context=text)
+        # the span grounder gives ssslm matches, even though gilda expects its own
+        rv: tuple[SentenceAnnotation, ...] = tuple(
+            (annotation.start, annotation.end, tuple(annotation.matches))  # type:ignore[arg-type]
+            for annotation in gilda.ner.annotate(
+                sentence,
+                grounder=span_grounder,
+                sent_split_fun=_whole,
+                **kwargs,
+            )
+        )
+        if not span_grounder.context_dependent:
+            self._sentence_cache.put(key, rv)
+        return rv
+
+    def _is_context_free(self, text: str) -> bool:
+        """Check that the matches for a span don't depend on the context it appears in."""
+        gilda_grounder = _get_gilda_grounder(self.grounder)
+        if gilda_grounder is None:
+            # there's no way to know for other grounders
+            return False
+        if gilda_grounder.gilda_disambiguators is None:
+            from gilda.grounder import load_gilda_models
+
+            # gilda loads these lazily the first time it gets context, in the same way
+            gilda_grounder.gilda_disambiguators = load_gilda_models()  # type:ignore[no-untyped-call]
+        text = text.strip()
+        disambiguators: dict[str, Any] = gilda_grounder.gilda_disambiguators or {}
+        return text not in gilda_grounder.adeft_disambiguators and text not in disambiguators
+
+
+class _SpanGrounder:
+    """Stand in for a :class:`gilda.Grounder` in :func:`gilda.ner.annotate`.
+
+    This looks up each span in the span cache, and keeps track of whether any
+    span's matches depended on the context.
+    """
+
+    def __init__(self, caching_grounder: CachingGrounder, context: str) -> None:
+        self.caching_grounder = caching_grounder
+        self.context = context
+        self.context_dependent = False
+        gilda_grounder = _get_gilda_grounder(caching_grounder.grounder)
+        if gilda_grounder is None:
+            raise TypeError
+        self.prefix_index = gilda_grounder.prefix_index
+
+    def ground(
+        self,
+        raw_str: str,
+        context: str | None = None,
+        organisms: list[str] | None = None,
+        namespaces: list[str] | None = None,
+    ) -> list[ssslm.Match]:
+        # the context is the sentence being annotated, but it should be the whole text
+        if not self.caching_grounder._is_context_free(raw_str):
+            self.context_dependent = True
+        return self.caching_grounder.get_matches(
+            raw_str, context=self.context, organisms=organisms, namespaces=namespaces
+        )
+
+
+def _get_gilda_grounder(grounder: ssslm.Grounder) -> gilda.Grounder | None:
+    if isinstance(grounder, ssslm.GildaGrounder):
+        return grounder._grounder
+    return None
+
+
+def _whole(text: str) -> list[tuple[int, int]]:
+    """Split a text into a single sentence."""
+    return [(0, len(text))]
+
+
+def _get_key(text: str, kwargs: dict[str, Any]) -> Hashable | None:
+    """Get a cache key for a text and keyword arguments, or none if it can't be cached.
+
+    The ``context`` keyword argument is left out, since it only matters for spans that
+    have a disambiguation model, which are never cached.
+    """
+    parts: list[tuple[str, Hashable]] = []
+    for name, value in sorted(kwargs.items()):
+        if name == "context" or value is None:
+            continue
+        if name not in CACHEABLE_KWARGS:
+            return None
+        parts.append((name, tuple(value) if isinstance(value, list) else value))
+    return text, tuple(parts)
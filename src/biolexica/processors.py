@@ -0,0 +1,241 @@
+"""A registry of processors, which get the literal mappings for inputs to a lexicon.
+
+Each :class:`biolexica.Input` names the processor that gets its literal mappings. The
+built-in processors are ``pyobo`` and ``bioontologies`` for ontologies and ``ssslm`` and
+``gilda`` for files. Other packages can add processors without changing biolexica by
+declaring a :class:`ProcessorSpec` under the ``biolexica.processors`` entry point group,
+e.g., in their ``pyproject.toml``:
+
+.. code-block:: toml
+
+    [project.entry-points."biolexica.processors"]
+    internal = "my_package.lexica:INTERNAL_PROCESSOR"
+
+Each processor declares whether getting literal mappings is I/O-bound, like calling a
+web API, or CPU-bound, like parsing an ontology. When inputs are extracted in parallel
+(see the ``workers`` argument of :func:`biolexica.assemble_terms`), I/O-bound processors
+run concurrently on threads and CPU-bound ones run in a pool of processes. A CPU-bound
+processor can also have a separate, I/O-bound ``fetch`` step, e.g., downloading a file,
+which runs on a thread so downloads overlap with parsing other inputs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+if TYPE_CHECKING:
+    from importlib.metadata import EntryPoint
+
+    from ssslm import LiteralMapping
+
+    from .api import Input
+
+__all__ = [
+    "ENTRY_POINT_GROUP",
+    "Bound",
+    "ProcessorSpec",
+    "get_processor",
+    "get_processor_names",
+    "register_processor",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The entry point group for processors from other packages
+ENTRY_POINT_GROUP = "biolexica.processors"
+
+#: What limits how fast a processor runs, which decides where it runs
+Bound = Literal["io", "cpu"]
+
+
+class ProcessorSpec(NamedTuple):
+    """A processor that gets the literal mappings for inputs."""
+
+    #: The name of the processor, which is used in :class:`biolexica.Input`
+    name: str
+    #: A function that gets the literal mappings for an input. For CPU-bound
+    #: processors, this needs to be importable, since it runs in another process.
+    func: Callable[[Input], Iterable[LiteralMapping]]
+    #: Is the function I/O-bound, so it runs on a thread, or CPU-bound, so it runs in a
+    #: process?
+    bound: Bound = "cpu"
+    #: A function that fetches anything the input needs, e.g., downloads a file, and
+    #: returns the input to pass to ``func``. This always runs on a thread.
+    fetch: Callable[[Input], Input] | None = None
+    #: A function that gets the version of the resource behind an input, which is used
+    #: for caching. If not given, the version of a local file is its hash and remote
+    #: resources aren't cached. See :func:`biolexica.cache.get_input_version`.
+    get_version: Callable[[Input], str | None] | None = None
+    #: A function that gets the literal mappings for several inputs that only differ by
+    #: their ancestors from the literal mappings for the same source without ancestors,
+    #: in the same order as the inputs. If given, when several lexica are built
+    #: together, these inputs share a single extraction of their source. See
+    #: :func:`biolexica.build.plan_extraction`.
+    get_subsets: (
+        Callable[[list[Input], list[LiteralMapping]], list[list[LiteralMapping]]] | None
+    ) = None
+
+
+_REGISTRY: dict[str, ProcessorSpec] = {}
+_loaded_entry_points = False
+
+
+def register_processor(spec: ProcessorSpec) -> None:
+    """Register a processor.
+
+    :param spec: The processor
+
+    :raises ValueError: If a different processor with the same name is registered
+
+    .. note::
+
+        Processors registered this way are only available in worker processes if they
+        are forked. Use an entry point for processors that need to work everywhere.
+    """
+    existing = _REGISTRY.get(spec.name)
+    if existing is not None and existing != spec:
+        raise ValueError(f"a different processor is already registered as {spec.name}")
+    _REGISTRY[spec.name] = spec
+
+
+def get_processor(name: str) -> ProcessorSpec:
+    """Get a processor by name.
+
+    :param name: The name of a built-in processor or one from an entry point
+
+    :returns: The processor
+
+    :raises ValueError: If there's no processor with the given name
+    """
+    _ensure_entry_points()
+    spec = _REGISTRY.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown processor: {name}. Use one of {get_processor_names()}")
+    return spec
+
+
+def get_processor_names() -> list[str]:
+    """Get the names of all processors."""
+    _ensure_entry_points()
+    return sorted(_REGISTRY)
+
+
+def _ensure_entry_points() -> None:
+    global _loaded_entry_points
+    if _loaded_entry_points:
+        return
+    _loaded_entry_points = True
+
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            spec = _load_entry_point(entry_point)
+        # a broken plugin shouldn't make all the other processors unavailable
+        except Exception as e:  # noqa:BLE001
+            logger.warning("could not load processor %s: %s", entry_point.name, e)
+        else:
+            register_processor(spec)
+
+
+def _load_entry_point(entry_point: EntryPoint) -> ProcessorSpec:
+    """Load a processor from an entry point.
+
+    The entry point can either refer to a :class:`ProcessorSpec` or to a function,
+    which is treated as a CPU-bound processor named after the entry point.
+    """
+    value = entry_point.load()
+    if isinstance(value, ProcessorSpec):
+        if value.name != entry_point.name:
+            raise ValueError(f"processor {value.name} is declared as {entry_point.name}")
+        return value
+    if callable(value):
+        return ProcessorSpec(entry_point.name, value)
+    raise TypeError(f"expected a processor or a function, got {value}")
+
+
+def _get_ontology_literal_mappings(inp: Input) -> list[LiteralMapping]:
+    from .api import get_literal_mappings
+
+    return get_literal_mappings(
+        inp.source, ancestors=inp.ancestors, processor=inp.processor, **(inp.kwargs or {})
+    )
+
+
+def _get_ontology_version(inp: Input) -> str | None:
+    if version := (inp.kwargs or {}).get("version"):
+        return str(version)
+
+    from pyobo.utils.ver import get_version
+
+    return get_version(inp.source, strict=False)
+
+
+def _get_pyobo_subsets(
+    inputs: list[Input], literal_mappings: list[LiteralMapping]
+) -> list[list[LiteralMapping]]:
+    """Take subsets like :func:`pyobo.get_literal_mappings_subset`, with one index."""
+    import pyobo
+
+    from .hierarchy import ClosureIndex
+
+    index: ClosureIndex | None = None
+    rv = []
+    for inp in inputs:
+        if inp.ancestors is None:
+            rv.append(literal_mappings)
+            continue
+        if index is None:
+            index = ClosureIndex.from_pyobo(inp.source, **{"strict": False, **(inp.kwargs or {})})
+        ancestors = [inp.ancestors] if isinstance(inp.ancestors, str) else inp.ancestors
+        # pyobo references have standardized prefixes, like the ones in the hierarchy
+        references = [pyobo.Reference.from_curie(ancestor) for ancestor in ancestors]
+        rv.append(index.get_subset(literal_mappings, references))
+    return rv
+
+
+def _fetch_remote(inp: Input) -> Input:
+    """Download a remote file, so it can be parsed in another process."""
+    if not inp.source.startswith(("https://", "http://")):
+        return inp
+
+    import pystow
+
+    # prefix the file name with the URL's hash, since different URLs can have the same
+    # file name
+    url_hash = hashlib.sha256(inp.source.encode("utf-8")).hexdigest()[:16]
+    name = f"{url_hash}-{Path(inp.source.split('?')[0]).name}"
+    path = pystow.ensure("biolexica", "sources", url=inp.source, name=name, force=True)
+    return inp.model_copy(update={"source": path.as_posix()})
+
+
+def _read_ssslm(inp: Input) -> list[LiteralMapping]:
+    import ssslm
+
+    return ssslm.read_literal_mappings(inp.source)
+
+
+def _read_gilda(inp: Input) -> list[LiteralMapping]:
+    import ssslm
+
+    return ssslm.read_gilda_terms(inp.source)
+
+
+for _spec in [
+    ProcessorSpec(
+        "pyobo",
+        _get_ontology_literal_mappings,
+        get_version=_get_ontology_version,
+        get_subsets=_get_pyobo_subsets,
+    ),
+    ProcessorSpec(
+        "bioontologies", _get_ontology_literal_mappings, get_version=_get_ontology_version
+    ),
+    ProcessorSpec("ssslm", _read_ssslm, fetch=_fetch_remote),
+    ProcessorSpec("gilda", _read_gilda, fetch=_fetch_remote),
+]:
+    register_processor(_spec)
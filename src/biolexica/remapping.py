@@ -0,0 +1,346 @@
+"""An index of prioritized semantic mappings for remapping literal mappings.
+
+Remapping with :func:`ssslm.remap_literal_mappings` requires reading all prioritized
+mappings from :mod:`semra`, checking that they form a projection, then grouping all
+literal mappings by reference on every build. Instead, a :class:`RemappingIndex` is a
+hash table from each subject to its object that is built once, saved next to the
+prioritized mappings, and reused by later builds until the :mod:`semra`
+configuration or the prioritized mappings change. Loading it skips reading the
+prioritized mappings with :mod:`semra` entirely. Remapping with it is a single pass
+over the literal mappings that skips any literal mapping whose prefix doesn't appear
+as the subject of a mapping.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from curies import ReferenceTuple
+from ssslm import LiteralMapping
+
+if TYPE_CHECKING:
+    import semra
+    import semra.pipeline
+
+__all__ = [
+    "RemappingIndex",
+    "get_configuration_hashes",
+    "get_remapping_index",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Increment this when the on-disk format changes so old indexes are considered stale
+INDEX_FORMAT_VERSION = 1
+
+#: The name of the file, next to the prioritized mappings, where the index is saved
+INDEX_NAME = "priority_remapping.pkl"
+
+#: The object of a mapping, as a prefix, identifier, and optional name
+Target = tuple[str, str, str | None]
+
+
+class RemappingIndex:
+    """A hash table from the subject of each prioritized mapping to its object."""
+
+    def __init__(self, targets: dict[ReferenceTuple, Target] | None = None) -> None:
+        """Instantiate the index.
+
+        :param targets: A dictionary from subjects to objects
+        """
+        self.targets: dict[ReferenceTuple, Target] = {}
+        self.prefixes: set[str] = set()
+        if targets:
+            self._update(targets.items())
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def __repr__(self) -> str:
+        return f"RemappingIndex(mappings={len(self):,}, prefixes={len(self.prefixes):,})"
+
+    @classmethod
+    def from_mappings(cls, mappings: Iterable[semra.Mapping]) -> RemappingIndex:
+        """Build an index from prioritized mappings.
+
+        :param mappings: Prioritized mappings, e.g., from :mod:`semra`
+
+        :returns: An index
+
+        :raises ValueError: If a subject appears in more than one mapping, since then
+            the mappings don't form a projection
+        """
+        rv = cls()
+        rv.add_mappings(mappings)
+        return rv
+
+    def add_mappings(self, mappings: Iterable[semra.Mapping]) -> None:
+        """Add prioritized mappings to the index.
+
+        :param mappings: Prioritized mappings, e.g., from :mod:`semra`
+
+        :raises ValueError: If a subject appears in more than one mapping, including
+            the ones already in the index, since then the mappings don't form a
+            projection
+        """
+        self._update(
+            (
+                ReferenceTuple(mapping.subject.prefix, mapping.subject.identifier),
+                (
+                    mapping.object.prefix,
+                    mapping.object.identifier,
+                    getattr(mapping.object, "name", None),
+                ),
+            )
+            for mapping in mappings
+        )
+
+    def _update(self, pairs: Iterable[tuple[ReferenceTuple, Target]]) -> None:
+        duplicates: set[ReferenceTuple] = set()
+        for subject, target in pairs:
+            if self.targets.setdefault(subject, target) is not target:
+                duplicates.add(subject)
+            self.prefixes.add(subject.prefix)
+        if duplicates:
+            raise ValueError(
+                f"Some subjects appear in multiple mappings, therefore this is not a "
+                f"valid projection. Showing up to 5: {sorted(duplicates)[:5]}"
+            )
+
+    def get(self, prefix: str, identifier: str) -> Target | None:
+        """Get the object of the mapping for a subject, if it exists."""
+        if prefix not in self.prefixes:
+            return None
+        return self.targets.get(ReferenceTuple(prefix, identifier))
+
+    def remap(self, literal_mappings: list[LiteralMapping]) -> int:
+        """Rewrite the references of literal mappings in place.
+
+        :param literal_mappings: A list of literal mappings, whose elements are
+            replaced when they're remapped
+
+        :returns: The number of literal mappings that were remapped
+
+        The name of each new reference comes from a literal mapping for the object of
+        the mapping, if one exists, and otherwise from the mapping itself. Up to the
+        order, which is kept the same as the input, this gives the same literal mappings
+        as :func:`ssslm.remap_literal_mappings`.
+        """
+        names: dict[ReferenceTuple, str] = {}
+        remapped: list[int] = []
+        for i, literal_mapping in enumerate(literal_mappings):
+            reference = literal_mapping.reference
+            if (
+                reference.prefix not in self.prefixes
+                or (target := self.targets.get(reference.pair)) is None
+            ):
+                if reference.name:
+                    names.setdefault(reference.pair, reference.name)
+                continue
+            prefix, identifier, name = target
+            literal_mappings[i] = literal_mapping.model_copy(
+                update={
+                    "reference": reference.__class__(
+                        prefix=prefix, identifier=identifier, name=name
+                    )
+                }
+            )
+            remapped.append(i)
+
+        # names from literal mappings for the target take precedence, but those might
+        # only come after the literal mapping was remapped, so they're filled in last
+        for i in remapped:
+            reference = literal_mappings[i].reference
+            name = names.get(reference.pair)
+            if name is not None and name != reference.name:
+                literal_mappings[i] = literal_mappings[i].model_copy(
+                    update={"reference": reference.model_copy(update={"name": name})}
+                )
+        return len(remapped)
+
+    def write(self, path: str | Path, *, fingerprint: Any = None) -> None:
+        """Write the index atomically.
+
+        :param path: The path to write to
+        :param fingerprint: Data identifying the mappings from which the index was
+            built, which is checked by :meth:`read`
+        """
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                # the header is pickled separately so it can be checked
+                # without loading the whole index
+                pickle.dump((INDEX_FORMAT_VERSION, fingerprint), file)
+                pickle.dump(self.targets, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def read(cls, path: str | Path, *, fingerprint: Any = None) -> RemappingIndex | None:
+        """Read an index, if it exists and was built from the same mappings.
+
+        :param path: The path to read from
+        :param fingerprint: Data identifying the mappings from which the index should
+            have been built
+
+        :returns: An index, or None if it doesn't exist or is stale
+        """
+        path = Path(path)
+        if not path.is_file():
+            return None
+        with path.open("rb") as file:
+            try:
+                version, actual_fingerprint = pickle.load(file)  # noqa:S301
+                if version != INDEX_FORMAT_VERSION or actual_fingerprint != fingerprint:
+                    logger.info("remapping index is stale: %s", path)
+                    return None
+                targets = pickle.load(file)  # noqa:S301
+            except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                logger.warning("could not read remapping index from %s", path)
+                return None
+        rv = cls()
+        # the targets were already checked to be a projection when the index was built
+        rv.targets = targets
+        rv.prefixes = {subject.prefix for subject in targets}
+        return rv
+
+
+def _read_fingerprint(path: Path) -> Any:
+    """Read the fingerprint of a saved index, if it exists."""
+    if not path.is_file():
+        return None
+    with path.open("rb") as file:
+        try:
+            version, fingerprint = pickle.load(file)  # noqa:S301
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+    if version != INDEX_FORMAT_VERSION:
+        return None
+    return fingerprint
+
+
+#: Fields of a :mod:`semra` configuration that don't affect the prioritized mappings
+METADATA_FIELDS = {
+    "name",
+    "description",
+    "creators",
+    "directory",
+    "write_raw_neo4j",
+    "neo4j_gzip",
+    "zenodo_record",
+    "purl_base",
+}
+
+#: Fields of a :mod:`semra` configuration that determine its raw mappings
+INPUT_FIELDS = {"inputs", "negative_inputs"}
+
+
+def get_configuration_hashes(configuration: semra.pipeline.Configuration) -> dict[str, str]:
+    """Hash the parts of a :mod:`semra` configuration that affect its mappings.
+
+    :param configuration: A :mod:`semra` configuration
+
+    :returns: A dictionary with the hash of the inputs, which determine the raw
+        mappings, and the hash of the whole configuration (except for metadata, like its
+        name and directory) along with the version of :mod:`semra`, which determines the
+        processed and prioritized mappings
+    """
+    from semra.version import get_version as get_semra_version
+
+    def _hash(data: Any) -> str:
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    return {
+        "inputs": _hash(configuration.model_dump(mode="json", include=INPUT_FIELDS)),
+        "configuration": _hash(
+            {
+                "semra": get_semra_version(),
+                **configuration.model_dump(mode="json", exclude=METADATA_FIELDS),
+            }
+        ),
+    }
+
+
+def _get_priority_fingerprint(configuration: semra.pipeline.Configuration) -> Any:
+    """Get the size and modification time of the prioritized mappings, if they exist."""
+    for path in [
+        configuration.priority_pickle_path,
+        configuration.priority_jsonl_path,
+        configuration.priority_sssom_path,
+    ]:
+        if path.is_file():
+            stat = path.stat()
+            return path.name, stat.st_size, stat.st_mtime_ns
+    return None
+
+
+def get_remapping_index(
+    configuration: semra.pipeline.Configuration, *, refresh: bool = False
+) -> RemappingIndex:
+    """Get a remapping index for the prioritized mappings from a :mod:`semra` configuration.
+
+    :param configuration: A :mod:`semra` configuration
+    :param refresh: If true, assemble the mappings again from the raw mappings,
+        even if the configuration hasn't changed
+
+    :returns: A remapping index, which is read from the configuration's directory if it
+        was already built from the current configuration and prioritized mappings.
+        Otherwise, the prioritized mappings are assembled (if necessary), and the index
+        is built then saved in the configuration's directory.
+
+    The index is keyed on the hashes from :func:`get_configuration_hashes`. When
+    they've changed since the index was built, :mod:`semra`'s own cached artifacts
+    are stale, too, so only the stages that are affected are run again: the raw
+    mappings are regenerated if the inputs changed, otherwise only the processing
+    and prioritization.
+    """
+    path = configuration.directory.joinpath(INDEX_NAME)
+    hashes = get_configuration_hashes(configuration)
+    if not refresh and (priority := _get_priority_fingerprint(configuration)) is not None:
+        rv = RemappingIndex.read(path, fingerprint={**hashes, "priority": priority})
+        if rv is not None:
+            logger.debug("loaded %r from %s", rv, path)
+            return rv
+
+    refresh_raw = refresh_processed = refresh
+    previous = _read_fingerprint(path)
+    if isinstance(previous, dict):
+        if previous.get("inputs") != hashes["inputs"]:
+            logger.info("[%s] mapping inputs changed, reassembling", configuration.key)
+            refresh_raw = True
+        elif previous.get("configuration") != hashes["configuration"]:
+            logger.info("[%s] mapping configuration changed, reprocessing", configuration.key)
+            refresh_processed = True
+
+    from semra.pipeline import AssembleReturnType
+
+    rv = RemappingIndex.from_mappings(
+        configuration.get_mappings(
+            return_type=AssembleReturnType.priority,
+            refresh_raw=refresh_raw,
+            refresh_processed=refresh_processed,
+        )
+    )
+    # get the fingerprint again, in case the prioritized mappings were just assembled
+    priority = _get_priority_fingerprint(configuration)
+    if priority is not None:
+        try:
+            rv.write(path, fingerprint={**hashes, "priority": priority})
+        except OSError as e:
+            logger.warning("could not write remapping index to %s: %s", path, e)
+        else:
+            logger.info("wrote %r to %s", rv, path)
+    return rv
@@ -0,0 +1,150 @@
+"""A local on-disk cache for predefined lexica that are downloaded from GitHub."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+__all__ = [
+    "OFFLINE_ENVVAR",
+    "ensure_lexicon",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The environment variable that, if set to a truthy value, disables all network access
+OFFLINE_ENVVAR = "BIOLEXICA_OFFLINE"
+
+#: The URL format for the literal mappings of predefined lexica
+URL_FMT = "https://github.com/biopragmatics/biolexica/raw/main/lexica/{key}/{key}.ssslm.tsv.gz"
+
+#: Increment this when the on-disk layout of the cache changes
+CACHE_FORMAT_VERSION = 1
+
+
+def _is_offline() -> bool:
+    return os.getenv(OFFLINE_ENVVAR, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def ensure_lexicon(
+    key: str,
+    *,
+    url: str | None = None,
+    directory: str | Path | None = None,
+    offline: bool | None = None,
+    force: bool = False,
+    timeout: float = 60,
+) -> Path:
+    """Ensure the literal mappings for a predefined lexicon are available locally.
+
+    :param key: The key for the lexicon, e.g., ``cell``
+    :param url: The URL from which the lexicon is downloaded. Defaults to the file in
+        the biolexica GitHub repository.
+    :param directory: The directory in which lexica are cached. Defaults to
+        ``~/.data/biolexica/lexica/v1``, where the root can be configured with
+        :mod:`pystow` using the ``BIOLEXICA_HOME`` environment variable.
+    :param offline: If true, never access the network and only use a previously
+        cached file. Defaults to the value of the ``BIOLEXICA_OFFLINE`` environment
+        variable.
+    :param force: If true, download the lexicon, even if it was cached and has not
+        changed.
+    :param timeout: The timeout in seconds for network requests
+
+    :returns: The path to the local copy of the lexicon's literal mappings
+
+    :raises FileNotFoundError: If offline mode is enabled and the lexicon has not been
+        cached before
+
+    If the lexicon was cached before, it's revalidated with the remote server using
+    its ETag and Last-Modified headers, so it's only downloaded again if it changed.
+    If the remote server can't be reached, the cached file is used. Downloads are
+    written to a temporary file, then moved into place, so concurrent processes never
+    see a partially written file.
+    """
+    if url is None:
+        url = URL_FMT.format(key=key)
+    if offline is None:
+        offline = _is_offline()
+    if directory is None:
+        import pystow
+
+        directory = pystow.join("biolexica", "lexica", f"v{CACHE_FORMAT_VERSION}")
+    directory = Path(directory).expanduser().resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory.joinpath(f"{key}.ssslm.tsv.gz")
+    metadata_path = directory.joinpath(f"{key}.json")
+
+    if offline:
+        if not path.is_file():
+            raise FileNotFoundError(
+                f"[{key}] lexicon is not cached in {directory} and offline mode is enabled"
+            )
+        return path
+
+    import requests
+
+    headers = _get_revalidation_headers(metadata_path, url) if path.is_file() and not force else {}
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as res:
+            if res.status_code == 304:
+                logger.debug("[%s] cached lexicon is up-to-date at %s", key, path)
+                return path
+            res.raise_for_status()
+            _atomic_write_chunks(path, res.iter_content(chunk_size=1 << 20))
+            _atomic_write_text(
+                metadata_path,
+                json.dumps(
+                    {
+                        "url": url,
+                        "etag": res.headers.get("ETag"),
+                        "last_modified": res.headers.get("Last-Modified"),
+                    },
+                    indent=2,
+                ),
+            )
+    except requests.RequestException as e:
+        if path.is_file():
+            logger.warning("[%s] could not revalidate lexicon, using cached: %s", key, e)
+            return path
+        raise
+
+    logger.info("[%s] downloaded lexicon to %s", key, path)
+    return path
+
+
+def _get_revalidation_headers(metadata_path: Path, url: str) -> dict[str, str]:
+    """Get headers for a conditional request based on the metadata from the last download."""
+    if not metadata_path.is_file():
+        return {}
+    try:
+        metadata = json.loads(metadata_path.read_text())
+    except json.JSONDecodeError:
+        return {}
+    if metadata.get("url") != url:
+        return {}
+    headers = {}
+    if etag := metadata.get("etag"):
+        headers["If-None-Match"] = etag
+    if last_modified := metadata.get("last_modified"):
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def _atomic_write_chunks(path: Path, chunks: Iterable[bytes]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    _atomic_write_chunks(path, [text.encode("utf-8")])
@@ -0,0 +1,235 @@
+"""Binary snapshots of fully built grounders, for fast loading.
+
+Building a grounder from a ``*.ssslm.tsv.gz`` file means parsing every literal mapping,
+converting it to a Gilda term, and indexing it, which takes tens of seconds for the
+larger predefined lexica. A snapshot stores the Gilda index that results from this, so
+it can be loaded directly.
+
+Snapshots are pickles, so they're only ever read from a cache directory managed by
+:mod:`pystow` (``~/.data/biolexica/snapshots`` by default, which can be configured
+with the ``BIOLEXICA_HOME`` environment variable), never from next to the literal
+mappings file, which could be a read-only or shared directory that anyone can write
+to. Each snapshot is named after the SHA-256 hash of the literal mappings file's
+contents, so a changed file gets a new snapshot.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gc
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import gilda
+    import ssslm
+
+__all__ = [
+    "get_snapshot_path",
+    "read_snapshot",
+    "write_snapshot",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Increment this when the snapshot format changes so old snapshots are considered stale
+SNAPSHOT_FORMAT_VERSION = 1
+
+#: The suffix for literal mappings files, which is replaced for snapshots
+SSSLM_SUFFIX = ".ssslm.tsv.gz"
+
+#: The suffix for snapshot files
+SNAPSHOT_SUFFIX = ".grounder.pkl"
+
+#: A row in a snapshot, corresponding to all fields of a Gilda term except the normalized
+#: text, which is the key it's stored under
+SnapshotRow = tuple[str | None, ...]
+
+
+def get_snapshot_path(path: str | Path, *, directory: str | Path | None = None) -> Path:
+    """Get the path for the snapshot of a literal mappings file.
+
+    :param path: The path to a literal mappings file
+    :param directory: The directory in which snapshots are stored. Defaults to
+        ``~/.data/biolexica/snapshots``.
+
+    :returns: The path of the snapshot in the directory, named after the SHA-256 hash
+        of the literal mappings file's contents
+    """
+    return _get_snapshot_path(_hash_path(Path(path).expanduser()), directory)
+
+
+def _get_snapshot_path(source_sha256: str, directory: str | Path | None) -> Path:
+    if directory is None:
+        import pystow
+
+        directory = pystow.join("biolexica", "snapshots")
+    return Path(directory).joinpath(f"{source_sha256}{SNAPSHOT_SUFFIX}")
+
+
+def _hash_path(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_header(path: Path, *, source_sha256: str | None = None) -> dict[str, Any]:
+    """Get the metadata that identifies the inputs to a snapshot."""
+    import gilda
+    from ssslm.version import get_version as get_ssslm_version
+
+    return {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "source_sha256": _hash_path(path) if source_sha256 is None else source_sha256,
+        "gilda": gilda.__version__,
+        "ssslm": get_ssslm_version(),
+    }
+
+
+def write_snapshot(
+    path: str | Path,
+    *,
+    grounder: ssslm.GildaGrounder | None = None,
+    snapshot_path: str | Path | None = None,
+) -> Path:
+    """Write a snapshot of the grounder built from a literal mappings file.
+
+    :param path: The path to a literal mappings file
+    :param grounder: The grounder built from the literal mappings file, if it's already
+        been built. Otherwise, it's built here.
+    :param snapshot_path: Where to write the snapshot. Defaults to
+        :func:`get_snapshot_path`.
+
+    :returns: The path to the snapshot
+    """
+    path = Path(path).expanduser().resolve()
+    source_sha256 = _hash_path(path)
+    snapshot_path = (
+        _get_snapshot_path(source_sha256, None)
+        if snapshot_path is None
+        else Path(snapshot_path).resolve()
+    )
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    if grounder is None:
+        import ssslm
+
+        built = ssslm.make_grounder(path)
+        if not isinstance(built, ssslm.GildaGrounder):
+            raise TypeError(f"snapshots can only be written for Gilda grounders, got {built}")
+        grounder = built
+
+    gilda_grounder: gilda.Grounder = grounder._grounder
+    # Terms are stored as plain tuples, which are much faster to unpickle than
+    # objects. They're converted back into terms lazily in _SnapshotEntries
+    rows: dict[str, list[SnapshotRow]] = {
+        norm_text: [tuple(term.to_list()[1:]) for term in terms]  # type:ignore[no-untyped-call]
+        for norm_text, terms in gilda_grounder.entries.items()
+    }
+    prefix_index = {
+        word: tuple(sorted(spans)) for word, spans in gilda_grounder.prefix_index.items()
+    }
+
+    header = json.dumps(_get_header(path, source_sha256=source_sha256)).encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=snapshot_path.parent, prefix=f".{snapshot_path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(header + b"\n")
+            pickle.dump((rows, prefix_index), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snapshot_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.info("wrote grounder snapshot to %s", snapshot_path)
+    return snapshot_path
+
+
+def read_snapshot(
+    path: str | Path, *, snapshot_path: str | Path | None = None
+) -> ssslm.GildaGrounder | None:
+    """Read the snapshot of the grounder built from a literal mappings file.
+
+    :param path: The path to a literal mappings file
+    :param snapshot_path: Where the snapshot was written. Defaults to
+        :func:`get_snapshot_path`. Since snapshots are unpickled, this should only ever
+        be a file written by :func:`write_snapshot` in a trusted location.
+
+    :returns: A grounder, or None if there's no snapshot or if it's stale, i.e., the
+        literal mappings file or the versions of :mod:`ssslm` or :mod:`gilda` changed
+        since it was written.
+    """
+    path = Path(path).expanduser().resolve()
+    source_sha256 = _hash_path(path)
+    snapshot_path = (
+        _get_snapshot_path(source_sha256, None)
+        if snapshot_path is None
+        else Path(snapshot_path).resolve()
+    )
+    if not snapshot_path.is_file() or not snapshot_path.stat().st_size:
+        return None
+
+    with (
+        snapshot_path.open("rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        header_end = mm.find(b"\n")
+        try:
+            header = json.loads(mm[:header_end])
+        except json.JSONDecodeError:
+            logger.warning("invalid grounder snapshot header in %s", snapshot_path)
+            return None
+        if header != _get_header(path, source_sha256=source_sha256):
+            logger.info("grounder snapshot is stale: %s", snapshot_path)
+            return None
+        # unpickling directly from the memory map avoids copying the whole
+        # file into memory first. Garbage collection is paused, since it
+        # otherwise runs many times over all the newly created containers
+        with _paused_gc(), memoryview(mm) as view, view[header_end + 1 :] as payload:
+            rows, prefix_index = pickle.loads(payload)  # noqa:S301
+
+    import gilda
+    import ssslm
+
+    # passing a non-dict mapping to the constructor would be treated as a list of terms
+    gilda_grounder = gilda.Grounder({})
+    gilda_grounder.entries = _SnapshotEntries(rows)
+    gilda_grounder._prefix_index = prefix_index
+    return ssslm.GildaGrounder(gilda_grounder)
+
+
+@contextlib.contextmanager
+def _paused_gc() -> Iterator[None]:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _SnapshotEntries(Mapping[str, list["gilda.Term"]]):
+    """A mapping from normalized text to Gilda terms that creates the terms on access."""
+
+    def __init__(self, rows: dict[str, list[SnapshotRow]]) -> None:
+        self._rows = rows
+
+    def __getitem__(self, norm_text: str) -> list[gilda.Term]:
+        from gilda import Term
+
+        return [Term(norm_text, *row) for row in self._rows[norm_text]]  # type:ignore[no-untyped-call]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
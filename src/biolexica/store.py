@@ -0,0 +1,224 @@
+"""A compact, column-oriented store of literal mappings for lexica kept in memory.
+
+Each :class:`ssslm.LiteralMapping` is a pydantic model with nested
+:class:`curies.Reference` models for its reference, predicate, and type, so a lexicon
+with hundreds of thousands of literal mappings spends most of its memory on object
+overhead and on the same prefixes, predicates, and sources repeated in each of them.
+A :class:`LexiconStore` instead keeps one list for each of the texts, identifiers, and
+names. Prefixes, predicates, types, languages, sources, and taxa are interned, so each
+distinct value is stored once and each literal mapping only has small integer codes
+for them in :class:`array.array` columns. The remaining fields (provenance,
+contributor, date, and comment) are rarely filled in, so they're only kept for the
+literal mappings that have them.
+
+A store is a sequence of literal mappings, which are made on access, so it can be
+used anywhere a list of literal mappings is read. It's summarized and written
+without making literal mappings at all (see :meth:`LexiconStore.to_df`).
+
+.. code-block:: python
+
+    import biolexica
+    from biolexica.configs import CELL_CONFIGURATION
+
+    store = biolexica.assemble_terms(CELL_CONFIGURATION, compact=True)
+    summary = biolexica.summarize_terms(store)
+"""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any, overload
+
+from curies import NamableReference
+from ssslm import LiteralMapping
+from ssslm.model import HEADER
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    "LexiconStore",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Fields of literal mappings that are rarely filled in, which are stored sparsely
+SPARSE_FIELDS = ("provenance", "contributor", "date", "comment")
+
+
+def _get_intern_key(value: Any) -> Any:
+    """Get a key for interning a value.
+
+    References that only differ by their names or classes are equal, so the key needs
+    to distinguish them to get the same value back.
+    """
+    if value is None or isinstance(value, str):
+        return value.__class__, value
+    return value.__class__, value.prefix, value.identifier, getattr(value, "name", None)
+
+
+class LexiconStore(Sequence[LiteralMapping]):
+    """A sequence of literal mappings stored in columns, with interned values."""
+
+    __slots__ = (
+        "_codes",
+        "_identifiers",
+        "_names",
+        "_namespace_codes",
+        "_namespace_index",
+        "_namespaces",
+        "_sparse",
+        "_texts",
+        "_value_index",
+        "_values",
+    )
+
+    def __init__(self, literal_mappings: Iterable[LiteralMapping] = ()) -> None:
+        """Instantiate the store.
+
+        :param literal_mappings: Literal mappings to add to the store
+        """
+        self._texts: list[str] = []
+        self._identifiers: list[str] = []
+        self._names: list[str | None] = []
+        # the prefix and class of each reference
+        self._namespaces: list[tuple[str, type[NamableReference]]] = []
+        self._namespace_index: dict[tuple[str, type[NamableReference]], int] = {}
+        self._namespace_codes = array("I")
+        # the predicates, types, languages, sources, and taxa, which share one pool
+        self._values: list[Any] = []
+        self._value_index: dict[Any, int] = {}
+        self._codes = {
+            field: array("I") for field in ("predicate", "type", "language", "source", "taxon")
+        }
+        self._sparse: dict[int, dict[str, Any]] = {}
+        self.extend(literal_mappings)
+
+    def __repr__(self) -> str:
+        return f"LexiconStore(literal_mappings={len(self):,}, prefixes={len(self._namespaces):,})"
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _intern(self, value: Any) -> int:
+        key = _get_intern_key(value)
+        code = self._value_index.get(key)
+        if code is None:
+            code = self._value_index[key] = len(self._values)
+            self._values.append(value)
+        return code
+
+    def append(self, literal_mapping: LiteralMapping) -> None:
+        """Add a literal mapping to the store."""
+        reference = literal_mapping.reference
+        namespace = reference.prefix, reference.__class__
+        namespace_code = self._namespace_index.get(namespace)
+        if namespace_code is None:
+            namespace_code = self._namespace_index[namespace] = len(self._namespaces)
+            self._namespaces.append(namespace)
+        sparse = {
+            field: value for field in SPARSE_FIELDS if (value := getattr(literal_mapping, field))
+        }
+        if sparse:
+            self._sparse[len(self)] = sparse
+        self._texts.append(literal_mapping.text)
+        self._identifiers.append(reference.identifier)
+        self._names.append(reference.name)
+        self._namespace_codes.append(namespace_code)
+        for field, codes in self._codes.items():
+            codes.append(self._intern(getattr(literal_mapping, field)))
+
+    def extend(self, literal_mappings: Iterable[LiteralMapping]) -> None:
+        """Add literal mappings to the store."""
+        for literal_mapping in literal_mappings:
+            self.append(literal_mapping)
+
+    @property
+    def prefixes(self) -> list[str]:
+        """Get the distinct prefixes of the references, in the order they were added."""
+        return list(dict.fromkeys(prefix for prefix, _ in self._namespaces))
+
+    def get_provenance_prefixes(self) -> list[str]:
+        """Get the prefixes of the provenance of all literal mappings, in order."""
+        return [
+            reference.prefix
+            for sparse in self._sparse.values()
+            for reference in sparse.get("provenance", ())
+        ]
+
+    @overload
+    def __getitem__(self, index: int) -> LiteralMapping: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[LiteralMapping]: ...
+
+    def __getitem__(self, index: int | slice) -> LiteralMapping | list[LiteralMapping]:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[LiteralMapping]:
+        for i in range(len(self)):
+            yield self._get(i)
+
+    def _get(self, i: int) -> LiteralMapping:
+        prefix, reference_cls = self._namespaces[self._namespace_codes[i]]
+        values = self._values
+        sparse = self._sparse.get(i, {})
+        # the values were validated when the literal mapping was added
+        return LiteralMapping.model_construct(
+            reference=reference_cls.model_construct(
+                prefix=prefix,  # type:ignore[arg-type]
+                identifier=self._identifiers[i],
+                name=self._names[i],
+            ),
+            predicate=values[self._codes["predicate"][i]],
+            text=self._texts[i],
+            language=values[self._codes["language"][i]],
+            type=values[self._codes["type"][i]],
+            provenance=list(sparse.get("provenance", [])),
+            contributor=sparse.get("contributor"),
+            comment=sparse.get("comment"),
+            source=values[self._codes["source"][i]],
+            date=sparse.get("date"),
+            taxon=values[self._codes["taxon"][i]],
+        )
+
+    def to_df(self) -> pd.DataFrame:
+        """Get a dataframe like :func:`biolexica.summary.literal_mappings_to_df`.
+
+        The columns are made from the stored columns, with each interned value
+        converted once, so no literal mappings are made except for the ones with
+        sparse fields.
+        """
+        import pandas as pd
+
+        namespace_curies = [f"{prefix}:" for prefix, _ in self._namespaces]
+        value_curies = [
+            value.curie if hasattr(value, "curie") else (value or None) for value in self._values
+        ]
+        columns: dict[str, list[Any]] = {
+            "text": self._texts,
+            "curie": [
+                namespace_curies[code] + identifier
+                for code, identifier in zip(self._namespace_codes, self._identifiers, strict=True)
+            ],
+            "name": self._names,
+            **{
+                field: [value_curies[code] for code in codes]
+                for field, codes in self._codes.items()
+            },
+            **{column: [None] * len(self) for column in SPARSE_FIELDS},
+        }
+        # the sparse fields are converted from the few literal mappings that have them
+        for i in self._sparse:
+            row = self._get(i)._as_row()
+            for column in SPARSE_FIELDS:
+                columns[column][i] = getattr(row, column)
+        return pd.DataFrame({column: columns[column] for column in HEADER}, columns=HEADER)
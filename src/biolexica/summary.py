@@ -0,0 +1,278 @@
+"""Summarize literal mappings with :mod:`pandas`.
+
+Summaries are computed column-wise from the same table of rows that's written to the
+processed literal mappings file, so they cost little on top of writing it. When literal
+mappings are streamed, :class:`SummaryBuilder` collects their rows in chunks and
+summarizes each chunk as it fills up, so memory stays bounded.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, Field
+from ssslm import LiteralMapping
+from ssslm.model import HEADER
+
+from .instrument import StageTiming
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    "TEXT_LENGTH_BINS",
+    "WORD_COUNT_BINS",
+    "Summary",
+    "SummaryBuilder",
+    "get_provenance_prefixes",
+    "literal_mappings_to_df",
+    "summarize_df",
+    "summarize_terms",
+    "write_literal_mappings_df",
+]
+
+#: The lower bounds of the bins for the histogram of the lengths of texts
+TEXT_LENGTH_BINS = (0, 5, 10, 20, 40, 80, 160)
+#: The lower bounds of the bins for the histogram of the number of words in texts
+WORD_COUNT_BINS = (0, 1, 2, 3, 4, 5, 10)
+
+#: Fields of :class:`Summary` that count values, which are sorted by count
+COUNTER_FIELDS = (
+    "provenance_counter",
+    "type_counter",
+    "source_counter",
+    "prefix_counter",
+    "predicate_counter",
+    "language_counter",
+)
+#: Fields of :class:`Summary` that are histograms, which are in the order of their bins
+HISTOGRAM_FIELDS = ("text_length_histogram", "word_count_histogram")
+
+
+class Summary(BaseModel):
+    """A model for summaries."""
+
+    count: int
+    provenance_counter: dict[str, int]
+    type_counter: dict[str, int]
+    source_counter: dict[str, int] = Field(
+        default_factory=dict, description="The number of literal mappings from each source"
+    )
+    prefix_counter: dict[str, int] = Field(
+        default_factory=dict,
+        description="The number of literal mappings whose references have each prefix",
+    )
+    predicate_counter: dict[str, int] = Field(
+        default_factory=dict, description="The number of literal mappings with each predicate"
+    )
+    language_counter: dict[str, int] = Field(
+        default_factory=dict, description="The number of literal mappings in each language"
+    )
+    text_length_histogram: dict[str, int] = Field(
+        default_factory=dict,
+        description="The number of literal mappings whose texts' lengths are in each bin",
+    )
+    word_count_histogram: dict[str, int] = Field(
+        default_factory=dict,
+        description="The number of literal mappings whose texts' numbers of words are in each bin",
+    )
+    removed_duplicates: dict[str, int] = Field(
+        default_factory=dict,
+        description="The number of duplicate literal mappings removed from each source",
+    )
+    timings: dict[str, StageTiming] = Field(
+        default_factory=dict,
+        description="The time spent in each stage of building the lexicon and the number of "
+        "records that came out of it. See biolexica.instrument.",
+    )
+
+
+def literal_mappings_to_df(literal_mappings: Iterable[LiteralMapping]) -> pd.DataFrame:
+    """Get a dataframe with a row for each literal mapping and all columns.
+
+    This is like :func:`ssslm.literal_mappings_to_df`, but it doesn't remove columns
+    that are fully blank, so it can always be summarized with :func:`summarize_df`.
+    A :class:`biolexica.store.LexiconStore` is converted from its columns directly.
+    """
+    import pandas as pd
+
+    from .store import LexiconStore
+
+    if isinstance(literal_mappings, LexiconStore):
+        return literal_mappings.to_df()
+
+    return pd.DataFrame(
+        (literal_mapping._as_row() for literal_mapping in literal_mappings), columns=HEADER
+    )
+
+
+def write_literal_mappings_df(df: pd.DataFrame, path: Path) -> None:
+    """Write a dataframe from :func:`literal_mappings_to_df`.
+
+    The output is the same as from :func:`ssslm.write_literal_mappings`.
+    """
+    df.loc[:, df.notna().any()].to_csv(path, index=False, sep="\t")
+
+
+def summarize_df(df: pd.DataFrame, provenance_prefixes: Iterable[str] | None = None) -> Summary:
+    """Summarize a dataframe from :func:`literal_mappings_to_df`.
+
+    :param df: A dataframe from :func:`literal_mappings_to_df`
+    :param provenance_prefixes: The prefixes of the provenance of all literal mappings
+        in the dataframe (see :func:`get_provenance_prefixes`). If not given, they're
+        taken from the provenance column, where CURIEs are joined with commas, so
+        they're wrong for identifiers that have commas in them.
+
+    :returns: A summary
+    """
+    return _build_summary(len(df), _count_df(df, provenance_prefixes))
+
+
+def summarize_terms(literal_mappings: Iterable[LiteralMapping]) -> Summary:
+    """Summarize terms, e.g., from a list or a :class:`biolexica.store.LexiconStore`."""
+    if not isinstance(literal_mappings, Sequence):
+        literal_mappings = list(literal_mappings)
+    return summarize_df(
+        literal_mappings_to_df(literal_mappings), get_provenance_prefixes(literal_mappings)
+    )
+
+
+def get_provenance_prefixes(literal_mappings: Iterable[LiteralMapping]) -> list[str]:
+    """Get the prefixes of the provenance of literal mappings, from the references."""
+    from .store import LexiconStore
+
+    if isinstance(literal_mappings, LexiconStore):
+        return literal_mappings.get_provenance_prefixes()
+    return [
+        reference.prefix
+        for literal_mapping in literal_mappings
+        for reference in literal_mapping.provenance
+    ]
+
+
+class SummaryBuilder:
+    """Accumulates a summary, one row at a time.
+
+    Rows are what :meth:`ssslm.LiteralMapping._as_row` returns. They're collected
+    until there are ``chunk_size`` of them, then counted together.
+    """
+
+    def __init__(self, chunk_size: int = 100_000) -> None:
+        """Initialize the summary builder.
+
+        :param chunk_size: The number of rows to count together, which bounds how
+            many rows are kept in memory at once
+        """
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.rows: list[Sequence[str | None]] = []
+        self.provenance_prefixes: list[str] = []
+        self.counters: dict[str, Counter[str]] = {}
+
+    def add_row(
+        self, row: Sequence[str | None], provenance_prefixes: Iterable[str] | None = None
+    ) -> None:
+        """Add the row for a literal mapping to the summary.
+
+        :param row: The row for a literal mapping
+        :param provenance_prefixes: The prefixes of the literal mapping's provenance. If
+            not given, they're taken from the row, like in :func:`summarize_df`.
+        """
+        if provenance_prefixes is None:
+            provenance = row[HEADER.index("provenance")]
+            provenance_prefixes = _split_provenance_prefixes(provenance) if provenance else ()
+        self.rows.append(row)
+        self.provenance_prefixes.extend(provenance_prefixes)
+        if len(self.rows) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.rows:
+            return
+        import pandas as pd
+
+        df = pd.DataFrame(self.rows, columns=HEADER)
+        self.count += len(df)
+        self.rows = []
+        counts_by_key = _count_df(df, self.provenance_prefixes)
+        self.provenance_prefixes = []
+        for key, counts in counts_by_key.items():
+            self.counters.setdefault(key, Counter()).update(counts)
+
+    def build(self) -> Summary:
+        """Build the summary."""
+        self._flush()
+        if not self.counters:
+            return summarize_terms([])
+        return _build_summary(self.count, self.counters)
+
+
+def _build_summary(count: int, counters: Mapping[str, Mapping[str, int]]) -> Summary:
+    return Summary(
+        count=count,
+        **{key: _sort_counts(counters[key]) for key in COUNTER_FIELDS},
+        **{key: dict(counters[key]) for key in HISTOGRAM_FIELDS},
+    )
+
+
+def _sort_counts(counts: Mapping[str, int]) -> dict[str, int]:
+    """Sort from most to least common, then by value."""
+    return dict(sorted(counts.items(), key=lambda pair: (-pair[1], pair[0])))
+
+
+def _count_df(
+    df: pd.DataFrame, provenance_prefixes: Iterable[str] | None
+) -> dict[str, dict[str, int]]:
+    if provenance_prefixes is None:
+        provenance_counts = Counter(
+            prefix
+            for provenance in df["provenance"].dropna()
+            for prefix in _split_provenance_prefixes(provenance)
+        )
+    else:
+        provenance_counts = Counter(provenance_prefixes)
+    return {
+        "provenance_counter": dict(provenance_counts),
+        "type_counter": _value_counts(df["type"]),
+        "source_counter": _value_counts(df["source"]),
+        "prefix_counter": _value_counts(_get_prefixes(df["curie"])),
+        "predicate_counter": _value_counts(df["predicate"]),
+        "language_counter": _value_counts(df["language"]),
+        "text_length_histogram": _histogram(df["text"].str.len(), TEXT_LENGTH_BINS),
+        "word_count_histogram": _histogram(df["text"].str.count(r"\S+"), WORD_COUNT_BINS),
+    }
+
+
+def _split_provenance_prefixes(provenance: str) -> list[str]:
+    """Get prefixes from provenance CURIEs joined with commas, as in a row."""
+    return [curie.split(":", 1)[0] for curie in provenance.split(",") if curie.strip()]
+
+
+def _get_prefixes(curies: pd.Series) -> pd.Series:
+    return curies.str.extract(r"^([^:]*)", expand=False)
+
+
+def _value_counts(series: pd.Series) -> dict[str, int]:
+    return {str(key): int(value) for key, value in series.value_counts(dropna=True).items()}
+
+
+def _histogram(values: pd.Series, bins: Sequence[int]) -> dict[str, int]:
+    """Count the values in each bin, given the lower bounds of the bins.
+
+    Bins are labeled by the range of values they contain, like ``5-9``, except for the
+    last, which is labeled like ``160+``.
+    """
+    import numpy as np
+
+    indexes = np.searchsorted(bins, values.to_numpy(dtype=np.int64), side="right") - 1
+    counts = np.bincount(indexes, minlength=len(bins))
+    labels = [
+        str(low) if high - low == 1 else f"{low}-{high - 1}"
+        for low, high in itertools.pairwise(bins)
+    ]
+    labels.append(f"{bins[-1]}+")
+    return {label: int(count) for label, count in zip(labels, counts, strict=True)}
@@ -0,0 +1,610 @@
+"""A web application for grounding and annotating many texts per request.
+
+The application from :func:`ssslm.web.get_app` handles one text per request, so when
+grounding millions of short mentions, most of the time is spent on HTTP overhead.
+:func:`get_app` serves the same endpoints, as well as ``/api/ground/batch`` and
+``/api/annotate/batch``, which each accept thousands of texts at a time:
+
+.. code-block:: console
+
+    $ curl --json '{"texts": ["B cell", "T cell"]}' http://localhost:8000/api/ground/batch
+    [[{"curie": "cl:0000236", "name": "B cell", "score": 0.7778}], ...]
+
+The response is a JSON array with one entry for each text, in order. For grounding,
+each entry is a list of matches. For annotation, it's a list of annotations, each with
+the start and end of the span, the text of the span, and the match. If the request's
+``Accept`` header is ``application/x-ndjson``, the entries are instead streamed as
+newline-delimited JSON while they're being computed. Requests can be gzipped by setting
+``Content-Encoding: gzip``, and responses are gzipped if the client accepts it. A
+gzipped request whose body is more than :data:`MAX_BODY_SIZE` bytes once decompressed
+gets a 413 response, and one that isn't valid gzip gets a 400 response.
+
+Texts are grounded in chunks, either in a thread (so the server stays responsive) or,
+if ``workers`` is given, in a pool of worker processes that share the grounder (see
+:mod:`biolexica.annotate`).
+
+To serve several lexica from one process, use :func:`get_multi_app` (or ``biolexica
+serve`` on the command line), which loads each lexicon the first time it's used and
+can unload lexica that haven't been used for a while.
+
+Both apps serve metrics at ``/metrics`` in the Prometheus text format, so they can be
+scraped by Prometheus. These count requests and texts, and have histograms of the
+latency of requests and of grounding or annotating each chunk of texts (see
+:class:`biolexica.instrument.Metrics`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Coroutine,
+    Iterable,
+    Mapping,
+)
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import ssslm
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from ssslm.web import api_router
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .annotate import (
+    AnnotationTuple,
+    MatchTuple,
+    _annotate_batch,
+    _annotate_texts,
+    _ground_batch,
+    _ground_texts,
+    _load,
+    _worker_pool,
+)
+from .instrument import PROMETHEUS_CONTENT_TYPE, Metrics
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+__all__ = [
+    "BatchRequest",
+    "CombinedBatchRequest",
+    "LexiconPool",
+    "get_app",
+    "get_multi_app",
+    "run_app",
+]
+
+logger = logging.getLogger(__name__)
+
+X = TypeVar("X")
+
+#: The media type for newline-delimited JSON
+NDJSON = "application/x-ndjson"
+#: The largest body of a gzipped request, in bytes after decompressing it
+MAX_BODY_SIZE = 256 * 1024 * 1024
+#: The window bits for :func:`zlib.decompressobj` to read the gzip format
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class BatchRequest(BaseModel):
+    """A request to ground or annotate several texts."""
+
+    texts: list[str] = Field(..., description="The texts to ground or annotate")
+
+
+def _match_to_dict(match_tuple: MatchTuple) -> dict[str, Any]:
+    prefix, identifier, name, score = match_tuple
+    return {"curie": f"{prefix}:{identifier}", "name": name, "score": score}
+
+
+def _annotation_to_dict(text: str, annotation_tuple: AnnotationTuple) -> dict[str, Any]:
+    start, end, prefix, identifier, name, score = annotation_tuple
+    return {
+        "start": start,
+        "end": end,
+        "text": text[start:end],
+        "curie": f"{prefix}:{identifier}",
+        "name": name,
+        "score": score,
+    }
+
+
+def _dump_matches(_text: str, match_tuples: list[MatchTuple]) -> str:
+    return json.dumps([_match_to_dict(t) for t in match_tuples], ensure_ascii=False)
+
+
+def _dump_annotations(text: str, annotation_tuples: list[AnnotationTuple]) -> str:
+    return json.dumps([_annotation_to_dict(text, t) for t in annotation_tuples], ensure_ascii=False)
+
+
+#: The name of the counter of requests
+REQUESTS_TOTAL = "biolexica_requests_total"
+#: The name of the histogram of the latency of requests
+REQUEST_DURATION = "biolexica_request_duration_seconds"
+#: The name of the counter of texts that were grounded or annotated
+TEXTS_TOTAL = "biolexica_texts_total"
+#: The name of the histogram of the latency of grounding or annotating a chunk of texts
+CHUNK_DURATION = "biolexica_chunk_duration_seconds"
+#: The lexicon label of requests for lexica that aren't served
+UNKNOWN_LEXICON = "unknown"
+
+
+def _get_metrics() -> Metrics:
+    metrics = Metrics()
+    metrics.describe(REQUESTS_TOTAL, "The number of requests")
+    metrics.describe(REQUEST_DURATION, "The time until a response is fully sent, in seconds")
+    metrics.describe(TEXTS_TOTAL, "The number of texts that were grounded or annotated")
+    metrics.describe(CHUNK_DURATION, "The time to ground or annotate a chunk of texts, in seconds")
+    return metrics
+
+
+class _MetricsMiddleware:
+    """Count requests and observe their latency, including streaming their responses."""
+
+    def __init__(
+        self, app: ASGIApp, metrics: Metrics, lexica: Collection[str] | None = None
+    ) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.lexica = frozenset(lexica or ())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the router adds the matched route to the scope, whose path is used rather
+            # than the request's path, so there's one series per endpoint
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            if lexicon := scope.get("path_params", {}).get("lexicon"):
+                # the key comes from the client, so only configured lexica get their own
+                # series. Otherwise, any client could add series without bound.
+                labels["lexicon"] = lexicon if lexicon in self.lexica else UNKNOWN_LEXICON
+            self.metrics.inc(REQUESTS_TOTAL, status=str(status), **labels)
+            self.metrics.observe(REQUEST_DURATION, time.perf_counter() - start, **labels)
+
+
+def _add_metrics(app: FastAPI, metrics: Metrics, lexica: Collection[str] | None = None) -> None:
+    app.add_middleware(_MetricsMiddleware, metrics=metrics, lexica=lexica)
+
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics() -> Response:
+        """Get metrics in the Prometheus text format."""
+        return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class _BatchService:
+    """Ground or annotate texts in chunks, in a thread or a pool of worker processes."""
+
+    def __init__(
+        self,
+        grounder: ssslm.Grounder,
+        *,
+        chunk_size: int,
+        metrics: Metrics | None = None,
+        lexicon: str | None = None,
+    ) -> None:
+        self.grounder = grounder
+        self.chunk_size = chunk_size
+        self.executor: ProcessPoolExecutor | None = None
+        self.workers = 0
+        self.metrics = metrics
+        self.labels = {"lexicon": lexicon} if lexicon else {}
+
+    async def iter_lines(
+        self,
+        operation: str,
+        texts: list[str],
+        function: Callable[[ssslm.Grounder, list[str]], list[X]],
+        worker_function: Callable[[list[str]], list[X]],
+        dump: Callable[[str, X], str],
+    ) -> AsyncIterator[str]:
+        """Yield one line of JSON per text, in order."""
+        if self.metrics is not None:
+            self.metrics.inc(TEXTS_TOTAL, len(texts), operation=operation, **self.labels)
+        chunks = [texts[i : i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        if self.executor is None:
+            for chunk in chunks:
+                start = time.perf_counter()
+                results = await run_in_threadpool(function, self.grounder, chunk)
+                self._observe(operation, start)
+                for line in _dump_chunk(chunk, results, dump):
+                    yield line
+            return
+
+        # keep a few chunks per worker in flight, like annotate_corpus. The latency of
+        # each chunk includes the time it waited for a worker.
+        loop = asyncio.get_running_loop()
+        pending: deque[tuple[list[str], float, Awaitable[list[X]]]] = deque()
+        for chunk in chunks:
+            future = loop.run_in_executor(self.executor, worker_function, chunk)
+            pending.append((chunk, time.perf_counter(), future))
+            if len(pending) >= 2 * self.workers:
+                oldest, start, oldest_future = pending.popleft()
+                results = await oldest_future
+                self._observe(operation, start)
+                for line in _dump_chunk(oldest, results, dump):
+                    yield line
+        while pending:
+            oldest, start, oldest_future = pending.popleft()
+            results = await oldest_future
+            self._observe(operation, start)
+            for line in _dump_chunk(oldest, results, dump):
+                yield line
+
+    def _observe(self, operation: str, start: float) -> None:
+        if self.metrics is not None:
+            seconds = time.perf_counter() - start
+            self.metrics.observe(CHUNK_DURATION, seconds, operation=operation, **self.labels)
+
+
+def _dump_chunk(chunk: list[str], results: list[X], dump: Callable[[str, X], str]) -> Iterable[str]:
+    for text, result in zip(chunk, results, strict=True):
+        yield dump(text, result)
+
+
+async def _respond(accept: str, lines: AsyncIterator[str]) -> Response:
+    if NDJSON in accept:
+        return StreamingResponse((line + "\n" async for line in lines), media_type=NDJSON)
+    body = "[" + ",".join([line async for line in lines]) + "]"
+    return Response(body, media_type="application/json")
+
+
+async def _ground(service: _BatchService, batch: BatchRequest, accept: str) -> Response:
+    return await _respond(
+        accept,
+        service.iter_lines("ground", batch.texts, _ground_texts, _ground_batch, _dump_matches),
+    )
+
+
+async def _annotate(service: _BatchService, batch: BatchRequest, accept: str) -> Response:
+    return await _respond(
+        accept,
+        service.iter_lines(
+            "annotate", batch.texts, _annotate_texts, _annotate_batch, _dump_annotations
+        ),
+    )
+
+
+def _get_batch_router(service: _BatchService) -> APIRouter:
+    router = APIRouter(route_class=_GzipRoute)
+
+    @router.post("/ground/batch")
+    async def ground_batch(batch: BatchRequest, accept: str = Header("")) -> Response:
+        """Ground several texts."""
+        return await _ground(service, batch, accept)
+
+    @router.post("/annotate/batch")
+    async def annotate_batch(batch: BatchRequest, accept: str = Header("")) -> Response:
+        """Annotate several texts."""
+        return await _annotate(service, batch, accept)
+
+    return router
+
+
+class _GzipRequest(Request):
+    """A request whose body is gzipped."""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            try:
+                self._body = await self._decompress()
+            except (OSError, EOFError, zlib.error) as e:
+                raise HTTPException(400, detail=f"invalid gzipped body: {e}") from e
+        return self._body
+
+    async def _decompress(self) -> bytes:
+        """Decompress the body while it's received, up to :data:`MAX_BODY_SIZE` bytes."""
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        started = False
+        parts: list[bytes] = []
+        size = 0
+        async for chunk in self.stream():
+            while chunk:
+                started = True
+                part = decompressor.decompress(chunk, MAX_BODY_SIZE + 1 - size)
+                size += len(part)
+                if size > MAX_BODY_SIZE:
+                    raise HTTPException(413, detail=f"body is larger than {MAX_BODY_SIZE:,} bytes")
+                parts.append(part)
+                if decompressor.eof:
+                    # like gzip.decompress, read any further members after this one
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(GZIP_WBITS)
+                    started = False
+                else:
+                    chunk = decompressor.unconsumed_tail
+        if started:
+            raise EOFError("compressed body ended before the end-of-stream marker")
+        return b"".join(parts)
+
+
+class _GzipRoute(APIRoute):
+    """A route that decompresses gzipped request bodies."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def gzip_handler(request: Request) -> Response:
+            if request.headers.get("content-encoding") == "gzip":
+                request = _GzipRequest(request.scope, request.receive)
+            return await handler(request)
+
+        return gzip_handler
+
+
+def get_app(
+    grounder: ssslm.GrounderHint,
+    *,
+    workers: int | None = None,
+    chunk_size: int = 256,
+    title: str = "Biolexica Grounder",
+    metrics: Metrics | None = None,
+) -> FastAPI:
+    """Construct a FastAPI app for grounding and annotating texts in batches.
+
+    :param grounder: A grounder, or anything that can be passed to
+        :func:`biolexica.load_grounder`. Lexica from files are loaded from a
+        memory-mapped index, so several server processes share the same memory.
+    :param workers: If given and more than one, the number of worker processes used
+        for batch requests. Otherwise, batches are handled in a thread.
+    :param chunk_size: The number of texts handled at a time in a batch request
+    :param title: The title of the app
+    :param metrics: Where to keep the metrics served at ``/metrics``. If not given,
+        new metrics are made.
+
+    :returns: A FastAPI app, which also has the single-text endpoints from
+        :func:`ssslm.web.get_app`
+    """
+    if metrics is None:
+        metrics = _get_metrics()
+    loaded = _load(grounder, shared=True)
+    service = _BatchService(loaded, chunk_size=chunk_size, metrics=metrics)
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+        if not workers or workers <= 1:
+            yield
+            return
+        # workers load the lexicon themselves from a path, rather than it being pickled
+        pool_grounder = grounder if isinstance(grounder, str | Path) else loaded
+        with _worker_pool(pool_grounder, workers) as executor:
+            service.executor, service.workers = executor, workers
+            yield
+            service.executor, service.workers = None, 0
+
+    app = FastAPI(title=title, lifespan=lifespan)
+    # this is where the endpoints from ssslm look for the grounder
+    app.state = loaded  # type:ignore
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    _add_metrics(app, metrics)
+    app.include_router(api_router, prefix="/api")
+    app.include_router(_get_batch_router(service), prefix="/api")
+    return app
+
+
+def run_app(
+    grounder: ssslm.GrounderHint,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int | None = None,
+) -> None:
+    """Construct an app with :func:`get_app` and run it with :mod:`uvicorn`."""
+    import uvicorn
+
+    uvicorn.run(get_app(grounder, workers=workers), host=host, port=port)
+
+
+class LexiconPool:
+    """Lexica that are loaded the first time they're used, and unloaded when idle."""
+
+    def __init__(
+        self, lexica: Mapping[str, ssslm.GrounderHint], *, idle_timeout: float | None = None
+    ) -> None:
+        """Initialize the pool.
+
+        :param lexica: A mapping from keys used in URLs to anything that can be passed to
+            :func:`biolexica.load_grounder`, like the key for a predefined lexicon
+        :param idle_timeout: If given, the number of seconds after which a lexicon that
+            hasn't been used is unloaded by :meth:`unload_idle`
+        """
+        self.lexica = dict(lexica)
+        self.idle_timeout = idle_timeout
+        self._grounders: dict[str, ssslm.Grounder] = {}
+        self._last_used: dict[str, float] = {}
+        self._locks = {key: threading.Lock() for key in self.lexica}
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.lexica
+
+    def is_loaded(self, key: str) -> bool:
+        """Check if a lexicon is loaded."""
+        return key in self._grounders
+
+    def get(self, key: str) -> ssslm.Grounder:
+        """Get a lexicon's grounder, loading it if necessary.
+
+        :raises KeyError: If the lexicon isn't in the pool
+        """
+        self._last_used[key] = time.monotonic()
+        grounder = self._grounders.get(key)
+        if grounder is not None:
+            return grounder
+        # only one thread loads each lexicon, and the others wait for it
+        with self._locks[key]:
+            grounder = self._grounders.get(key)
+            if grounder is None:
+                logger.info("loading lexicon %s", key)
+                grounder = self._grounders[key] = _load(self.lexica[key], shared=True)
+        return grounder
+
+    def unload_idle(self) -> list[str]:
+        """Unload the lexica that haven't been used within the idle timeout.
+
+        :returns: The keys of the lexica that were unloaded
+        """
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic()
+        rv = []
+        for key in list(self._grounders):
+            with self._locks[key]:
+                if now - self._last_used.get(key, now) > self.idle_timeout:
+                    logger.info("unloading idle lexicon %s", key)
+                    del self._grounders[key]
+                    rv.append(key)
+        return rv
+
+
+class CombinedBatchRequest(BatchRequest):
+    """A request to annotate several texts with several lexica."""
+
+    lexica: list[str] | None = Field(
+        None, description="The lexica to annotate with. If not given, all lexica are used."
+    )
+
+
+def get_multi_app(
+    lexica: Mapping[str, ssslm.GrounderHint] | Iterable[str],
+    *,
+    idle_timeout: float | None = None,
+    chunk_size: int = 256,
+    title: str = "Biolexica Grounders",
+    metrics: Metrics | None = None,
+) -> FastAPI:
+    """Construct a FastAPI app that serves several lexica from one process.
+
+    Each lexicon has the batch endpoints from :func:`get_app` under its key, e.g.,
+    ``/api/cell/ground/batch``, as well as ``/api/cell/ground/{text}`` for grounding a
+    single text, which can have slashes in it. The ``/api/annotate/batch`` endpoint
+    annotates texts with several lexica at once, in a single pass over each text (see
+    :func:`biolexica.combine.combine_grounders`), and ``/api/lexica`` lists the lexica.
+    Batches are handled in a thread.
+
+    :param lexica: A mapping from keys used in URLs to anything that can be passed to
+        :func:`biolexica.load_grounder`, or the keys of predefined lexica
+    :param idle_timeout: If given, the number of seconds after which a lexicon that
+        hasn't been used is unloaded. It's loaded again on the next request for it.
+    :param chunk_size: The number of texts handled at a time in a batch request
+    :param title: The title of the app
+    :param metrics: Where to keep the metrics served at ``/metrics``. If not given,
+        new metrics are made.
+
+    :returns: A FastAPI app. Lexica are only loaded the first time they're used.
+    """
+    if metrics is None:
+        metrics = _get_metrics()
+    if not isinstance(lexica, Mapping):
+        lexica = {key: key for key in lexica}
+    pool = LexiconPool(lexica, idle_timeout=idle_timeout)
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+        if idle_timeout is None:
+            yield
+            return
+        task = asyncio.create_task(_unload_idle_forever(pool, idle_timeout))
+        yield
+        task.cancel()
+
+    app = FastAPI(title=title, lifespan=lifespan)
+    app.state.pool = pool
+    app.state.metrics = metrics
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    _add_metrics(app, metrics, lexica=pool.lexica)
+    app.include_router(
+        _get_multi_router(pool, chunk_size=chunk_size, metrics=metrics), prefix="/api"
+    )
+    return app
+
+
+async def _unload_idle_forever(pool: LexiconPool, idle_timeout: float) -> None:
+    while True:
+        await asyncio.sleep(min(max(idle_timeout / 2, 1.0), 60.0))
+        pool.unload_idle()
+
+
+def _get_multi_router(pool: LexiconPool, *, chunk_size: int, metrics: Metrics) -> APIRouter:
+    router = APIRouter(route_class=_GzipRoute)
+
+    async def get_service(lexicon: str) -> _BatchService:
+        if lexicon not in pool:
+            raise HTTPException(404, detail=f"lexicon not found: {lexicon}")
+        grounder = await run_in_threadpool(pool.get, lexicon)
+        return _BatchService(grounder, chunk_size=chunk_size, metrics=metrics, lexicon=lexicon)
+
+    @router.get("/lexica")
+    def get_lexica() -> dict[str, Any]:
+        """List the lexica and whether they're loaded."""
+        return {key: {"loaded": pool.is_loaded(key)} for key in pool.lexica}
+
+    # the text can have slashes in it, e.g., "N/A"
+    @router.get("/{lexicon}/ground/{text:path}")
+    async def ground(lexicon: str, text: str) -> Response:
+        """Ground a text with a lexicon."""
+        service = await get_service(lexicon)
+        return await _ground(service, BatchRequest(texts=[text]), "")
+
+    @router.post("/{lexicon}/ground/batch")
+    async def ground_batch(lexicon: str, batch: BatchRequest, accept: str = Header("")) -> Response:
+        """Ground several texts with a lexicon."""
+        return await _ground(await get_service(lexicon), batch, accept)
+
+    @router.post("/{lexicon}/annotate/batch")
+    async def annotate_batch(
+        lexicon: str, batch: BatchRequest, accept: str = Header("")
+    ) -> Response:
+        """Annotate several texts with a lexicon."""
+        return await _annotate(await get_service(lexicon), batch, accept)
+
+    @router.post("/annotate/batch")
+    async def annotate_combined_batch(
+        batch: CombinedBatchRequest, accept: str = Header("")
+    ) -> Response:
+        """Annotate several texts with several lexica in a single pass."""
+        from .combine import combine_grounders
+
+        keys = batch.lexica or list(pool.lexica)
+        missing = [key for key in keys if key not in pool]
+        if missing:
+            raise HTTPException(404, detail=f"lexica not found: {', '.join(missing)}")
+        grounders = [await run_in_threadpool(pool.get, key) for key in keys]
+        try:
+            grounder = combine_grounders(grounders)
+        except TypeError as e:
+            raise HTTPException(400, detail=str(e)) from e
+        service = _BatchService(
+            grounder, chunk_size=chunk_size, metrics=metrics, lexicon=",".join(sorted(set(keys)))
+        )
+        return await _annotate(service, batch, accept)
+
+    return router
@@ -0,0 +1,80 @@
+"""Shared fixtures for tests."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import semra
+import ssslm
+from curies import NamableReference, Reference
+from ssslm import LiteralMapping
+
+import biolexica
+
+# the semra configuration is only imported by biolexica for type checking
+biolexica.Configuration.model_rebuild(_types_namespace={"semra": semra})
+
+B_CELL = NamableReference(prefix="cl", identifier="0000236", name="B cell")
+B_CELL_MESH = NamableReference(prefix="mesh", identifier="D001402", name="B-Lymphocytes")
+EXACT = Reference(prefix="oboInOwl", identifier="hasExactSynonym")
+PREVIOUS_NAME = Reference(prefix="OMO", identifier="0003008")
+PMID_1 = Reference(prefix="pubmed", identifier="1")
+PMID_2 = Reference(prefix="pubmed", identifier="2")
+DOI = Reference(prefix="doi", identifier="10.1234/5678")
+
+TERMS_1 = [
+    LiteralMapping(
+        reference=NamableReference(prefix="cl", identifier="0000000", name="cell"),
+        text="cell",
+    ),
+    LiteralMapping(reference=B_CELL, text="B lymphocyte"),
+]
+TERMS_2 = [
+    LiteralMapping(reference=B_CELL_MESH, text="B-Lymphocytes"),
+]
+MAPPINGS = [
+    semra.Mapping(
+        subject=semra.Reference(prefix="mesh", identifier="D001402"),
+        predicate=semra.EXACT_MATCH,
+        object=semra.Reference(prefix="cl", identifier="0000236"),
+    ),
+]
+
+#: Literal mappings with all optional fields, for summarizing and storing
+LITERAL_MAPPINGS = [
+    LiteralMapping(reference=B_CELL, text="B cell", source="cl", provenance=[PMID_1, DOI]),
+    LiteralMapping(
+        reference=B_CELL,
+        text="B lymphocyte",
+        predicate=EXACT,
+        source="cl",
+        language="en",
+        provenance=[PMID_2],
+    ),
+    LiteralMapping(reference=B_CELL_MESH, text="B-Lymphocytes", type=PREVIOUS_NAME),
+]
+
+
+class TemporaryDirectoryTestCase(unittest.TestCase):
+    """A test case with a temporary directory."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory, which is cleaned up after the test."""
+        directory_obj = tempfile.TemporaryDirectory()
+        self.addCleanup(directory_obj.cleanup)
+        self.directory = Path(directory_obj.name)
+
+
+class LiteralMappingsTestCase(TemporaryDirectoryTestCase):
+    """A test case with two literal mappings files and a configuration for them."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with literal mappings files."""
+        super().setUp()
+        self.path_1 = self.directory.joinpath("1.ssslm.tsv")
+        self.path_2 = self.directory.joinpath("2.ssslm.tsv")
+        ssslm.write_literal_mappings(TERMS_1, self.path_1)
+        ssslm.write_literal_mappings(TERMS_2, self.path_2)
+        self.input_1 = biolexica.Input(processor="ssslm", source=self.path_1.as_posix())
+        self.input_2 = biolexica.Input(processor="ssslm", source=self.path_2.as_posix())
+        self.configuration = biolexica.Configuration(inputs=[self.input_1, self.input_2])
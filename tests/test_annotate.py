@@ -0,0 +1,81 @@
+"""Test annotating corpora."""
+
+import gzip
+import json
+
+import ssslm
+from click.testing import CliRunner
+
+import biolexica
+from biolexica.annotate import read_corpus, write_annotations
+from biolexica.cli import main
+from tests.cases import TERMS_1, TemporaryDirectoryTestCase
+
+TEXTS = [
+    "The B lymphocyte is a kind of cell.",
+    "Nothing to see here.",
+    "A cell, another cell, and a B lymphocyte.",
+]
+CORPUS = [(str(i), TEXTS[i % len(TEXTS)]) for i in range(20)]
+
+
+class TestAnnotate(TemporaryDirectoryTestCase):
+    """Test annotating corpora."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with a literal mappings file."""
+        super().setUp()
+        self.path = self.directory.joinpath("test.ssslm.tsv.gz")
+        ssslm.write_literal_mappings(TERMS_1, self.path)
+
+    def test_workers(self) -> None:
+        """Test that annotating in parallel gives the same results, in order."""
+        grounder = ssslm.make_grounder(self.path)
+        expected = [(document_id, grounder.annotate(text)) for document_id, text in CORPUS]
+        self.assertEqual(expected, list(biolexica.annotate_corpus(CORPUS, self.path.as_posix())))
+        self.assertEqual(
+            expected,
+            list(biolexica.annotate_corpus(CORPUS, self.path.as_posix(), workers=2, batch_size=3)),
+        )
+
+    def test_io(self) -> None:
+        """Test reading a corpus and writing annotations."""
+        corpus_path = self.directory.joinpath("corpus.tsv")
+        corpus_path.write_text("".join(f"{i}\t{text}\n" for i, text in CORPUS))
+        self.assertEqual(CORPUS, list(read_corpus(corpus_path)))
+
+        output_path = self.directory.joinpath("annotations.jsonl.gz")
+        count = write_annotations(
+            biolexica.annotate_corpus(read_corpus(corpus_path), self.path.as_posix()),
+            output_path,
+        )
+        self.assertEqual(len(CORPUS), count)
+        with gzip.open(output_path, "rt") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([i for i, _ in CORPUS], [record["id"] for record in records])
+        self.assertEqual(
+            {"B lymphocyte": "cl:0000236"},
+            {a["text"]: a["curie"] for a in records[0]["annotations"] if a["text"] != "cell"},
+        )
+
+    def test_cli(self) -> None:
+        """Test the command line interface."""
+        corpus_path = self.directory.joinpath("corpus.jsonl")
+        corpus_path.write_text(
+            "".join(json.dumps({"id": i, "text": text}) + "\n" for i, text in CORPUS)
+        )
+        output_path = self.directory.joinpath("annotations.jsonl")
+        result = CliRunner().invoke(
+            main,
+            [
+                "annotate",
+                "--grounder",
+                self.path.as_posix(),
+                "--input",
+                corpus_path.as_posix(),
+                "--output",
+                output_path.as_posix(),
+            ],
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertEqual(len(CORPUS), len(output_path.read_text().splitlines()))
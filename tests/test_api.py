@@ -0,0 +1,88 @@
+"""Test assembling lexica."""
+
+from unittest import mock
+
+import ssslm
+
+import biolexica
+import biolexica.api
+from tests.cases import MAPPINGS, TERMS_1, TERMS_2, LiteralMappingsTestCase
+
+
+class TestAssemble(LiteralMappingsTestCase):
+    """Test assembling lexica."""
+
+    def test_workers(self) -> None:
+        """Test that a parallel build gives the same output as a serial build."""
+        serial_path = self.directory.joinpath("serial.ssslm.tsv")
+        parallel_path = self.directory.joinpath("parallel.ssslm.tsv")
+        serial = biolexica.assemble_terms(
+            self.configuration, include_biosynonyms=False, processed_path=serial_path
+        )
+        parallel = biolexica.assemble_terms(
+            self.configuration,
+            include_biosynonyms=False,
+            processed_path=parallel_path,
+            workers=2,
+        )
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial_path.read_bytes(), parallel_path.read_bytes())
+
+    def test_workers_failure(self) -> None:
+        """Test that a failing input is reported with its source, with or without workers."""
+        missing = self.directory.joinpath("missing.ssslm.tsv").as_posix()
+        configuration = biolexica.Configuration(
+            inputs=[
+                *self.configuration.inputs,
+                biolexica.Input(processor="ssslm", source=missing),
+            ]
+        )
+        for workers in [None, 2]:
+            with self.subTest(workers=workers), self.assertRaises(ValueError) as ctx:
+                biolexica.assemble_terms(configuration, include_biosynonyms=False, workers=workers)
+            self.assertIn(f"[{missing}] failed to get literal mappings", str(ctx.exception))
+            self.assertIsInstance(ctx.exception.__cause__, FileNotFoundError)
+
+    def test_workers_window(self) -> None:
+        """Test that inputs are submitted through a bounded window when using workers."""
+        inputs = [
+            biolexica.Input(processor="ssslm", source=path.as_posix())
+            for path in [self.path_1, self.path_2] * 3
+        ]
+        with mock.patch.object(biolexica.api, "_submit", wraps=biolexica.api._submit) as submit:
+            it = iter(biolexica.api._iter_input_literal_mappings(inputs, workers=2))
+            self.assertEqual(TERMS_1, next(it)[1])
+            # the first window has four inputs, and one more is submitted per yield
+            self.assertEqual(5, submit.call_count)
+            rest = list(it)
+        self.assertEqual(6, submit.call_count)
+        self.assertEqual([TERMS_2, TERMS_1] * 2 + [TERMS_2], [terms for _, terms in rest])
+
+    def test_stream(self) -> None:
+        """Test that a streaming build gives the same literal mappings as a regular build."""
+        processed_path = self.directory.joinpath("processed.ssslm.tsv.gz")
+        gilda_path = self.directory.joinpath("terms.tsv.gz")
+        summary_path = self.directory.joinpath("summary.json")
+        expected = biolexica.assemble_terms(
+            self.configuration, mappings=MAPPINGS, include_biosynonyms=False
+        )
+        summary = biolexica.stream_terms(
+            self.configuration,
+            mappings=MAPPINGS,
+            include_biosynonyms=False,
+            processed_path=processed_path,
+            gilda_path=gilda_path,
+            summary_path=summary_path,
+        )
+        self.assertEqual(biolexica.summarize_terms(expected), summary)
+        self.assertEqual(summary.model_dump_json(indent=2), summary_path.read_text())
+
+        actual = ssslm.read_literal_mappings(processed_path)
+        self.assertEqual(sorted(expected), sorted(actual))
+        self.assertIn(
+            ("B-Lymphocytes", "cl:0000236", "B cell"),
+            {(lm.text, lm.curie, lm.name) for lm in actual},
+        )
+        self.assertEqual(
+            len(expected), len(ssslm.read_gilda_terms(gilda_path)), msg="all have names"
+        )
@@ -0,0 +1,177 @@
+"""Test building several lexica together."""
+
+import ssslm
+from click.testing import CliRunner
+from ssslm import LiteralMapping
+
+import biolexica
+from biolexica.build import build_lexica, extract_inputs, get_lexicon_paths, plan_extraction
+from biolexica.cache import InputCache
+from biolexica.cli import main
+from biolexica.processors import ProcessorSpec, register_processor
+from biolexica.store import LexiconStore
+from tests.cases import TERMS_1, TERMS_2, TemporaryDirectoryTestCase
+
+#: The sources that were read by the test processor
+EXTRACTED: list[str] = []
+
+
+def _get_prefix_subset(
+    inp: biolexica.Input, literal_mappings: list[LiteralMapping]
+) -> list[LiteralMapping]:
+    """Get the literal mappings whose prefixes are the prefixes of the ancestors."""
+    if inp.ancestors is None:
+        return literal_mappings
+    ancestors = [inp.ancestors] if isinstance(inp.ancestors, str) else inp.ancestors
+    prefixes = {ancestor.split(":")[0] for ancestor in ancestors}
+    return [lm for lm in literal_mappings if lm.reference.prefix in prefixes]
+
+
+def _get_prefix_subsets(
+    inputs: list[biolexica.Input], literal_mappings: list[LiteralMapping]
+) -> list[list[LiteralMapping]]:
+    return [_get_prefix_subset(inp, literal_mappings) for inp in inputs]
+
+
+def _read_subset(inp: biolexica.Input) -> list[LiteralMapping]:
+    EXTRACTED.append(inp.source)
+    return _get_prefix_subset(inp, ssslm.read_literal_mappings(inp.source))
+
+
+register_processor(
+    ProcessorSpec("test-subset", _read_subset, bound="io", get_subsets=_get_prefix_subsets)
+)
+
+
+class TestBuild(TemporaryDirectoryTestCase):
+    """Test building several lexica together."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with literal mappings files and configurations."""
+        super().setUp()
+        self.path_1 = self.directory.joinpath("1.ssslm.tsv")
+        self.path_2 = self.directory.joinpath("2.ssslm.tsv")
+        ssslm.write_literal_mappings(TERMS_1, self.path_1)
+        ssslm.write_literal_mappings([*TERMS_1, *TERMS_2], self.path_2)
+        shared = biolexica.Input(processor="ssslm", source=self.path_1.as_posix())
+        self.configurations = {
+            "a": biolexica.Configuration(
+                inputs=[
+                    shared,
+                    biolexica.Input(
+                        processor="test-subset", source=self.path_2.as_posix(), ancestors="cl:1"
+                    ),
+                ]
+            ),
+            "b": biolexica.Configuration(
+                inputs=[
+                    biolexica.Input(
+                        processor="test-subset", source=self.path_2.as_posix(), ancestors="mesh:1"
+                    ),
+                    shared,
+                ]
+            ),
+        }
+        EXTRACTED.clear()
+
+    def test_plan(self) -> None:
+        """Test planning to extract inputs from several configurations."""
+        inputs = [inp for c in self.configurations.values() for inp in c.inputs]
+        plan = plan_extraction(inputs)
+        self.assertEqual(3, len(plan.inputs))
+        self.assertEqual([], plan.cached)
+        self.assertEqual([inputs[0]], plan.extracted)
+        self.assertEqual(1, len(plan.shared))
+        self.assertIsNone(plan.shared[0].source.ancestors)
+        self.assertEqual([inputs[1], inputs[2]], plan.shared[0].inputs)
+
+        cache = InputCache(self.directory.joinpath("cache"))
+        extract_inputs(inputs, cache=cache)
+        plan = plan_extraction(inputs, cache=cache)
+        self.assertEqual(3, len(plan.cached))
+        self.assertEqual([], plan.shared)
+
+    def test_extract_inputs(self) -> None:
+        """Test that inputs with the same source are extracted once."""
+        inputs = [inp for c in self.configurations.values() for inp in c.inputs]
+        extracted = extract_inputs(inputs)
+        self.assertEqual([self.path_2.as_posix()], EXTRACTED)
+        self.assertEqual(3, len(extracted))
+        for inp in inputs:
+            expected = biolexica.processors.get_processor(inp.processor).func(inp)
+            self.assertEqual(expected, extracted[inp.model_dump_json(exclude_none=True)])
+
+        compacted = extract_inputs(inputs, compact=True)
+        self.assertEqual(extracted.keys(), compacted.keys())
+        for key, store in compacted.items():
+            self.assertIsInstance(store, LexiconStore)
+            self.assertEqual(extracted[key], list(store))
+
+    def test_build(self) -> None:
+        """Test that lexica built together are the same as ones built separately."""
+        output = self.directory.joinpath("output")
+        counts = build_lexica(self.configurations, output, include_biosynonyms=False)
+        self.assertEqual([self.path_2.as_posix()], EXTRACTED)
+        for key, configuration in self.configurations.items():
+            expected = biolexica.assemble_terms(configuration, include_biosynonyms=False)
+            self.assertEqual(len(expected), counts[key])
+            paths = get_lexicon_paths(output, key)
+            self.assertEqual(expected, ssslm.read_literal_mappings(paths.processed))
+            self.assertTrue(paths.summary.is_file())
+            self.assertTrue(paths.manifest.is_file())
+
+    def test_build_incremental(self) -> None:
+        """Test that inputs that haven't changed since the previous build aren't extracted."""
+        output = self.directory.joinpath("output")
+        counts = build_lexica(self.configurations, output, include_biosynonyms=False)
+        expected = {
+            key: ssslm.read_literal_mappings(get_lexicon_paths(output, key).processed)
+            for key in self.configurations
+        }
+        EXTRACTED.clear()
+        self.assertEqual(
+            counts, build_lexica(self.configurations, output, include_biosynonyms=False)
+        )
+        self.assertEqual([], EXTRACTED)
+        for key in self.configurations:
+            self.assertEqual(
+                expected[key], ssslm.read_literal_mappings(get_lexicon_paths(output, key).processed)
+            )
+
+        # a changed source is extracted once for both lexica
+        ssslm.write_literal_mappings(TERMS_2, self.path_2)
+        build_lexica(self.configurations, output, include_biosynonyms=False)
+        self.assertEqual([self.path_2.as_posix()], EXTRACTED)
+
+    def test_build_workers(self) -> None:
+        """Test that lexica assembled in a process pool are the same as on threads."""
+        output = self.directory.joinpath("output")
+        workers_output = self.directory.joinpath("workers")
+        counts = build_lexica(self.configurations, output, include_biosynonyms=False)
+        self.assertEqual(
+            counts,
+            build_lexica(self.configurations, workers_output, include_biosynonyms=False, workers=2),
+        )
+        for key in self.configurations:
+            self.assertEqual(
+                ssslm.read_literal_mappings(get_lexicon_paths(output, key).processed),
+                ssslm.read_literal_mappings(get_lexicon_paths(workers_output, key).processed),
+            )
+
+    def test_cli(self) -> None:
+        """Test building lexica from configuration files on the command line."""
+        path = self.directory.joinpath("a.json")
+        path.write_text(self.configurations["a"].model_dump_json())
+        output = self.directory.joinpath("output")
+        result = CliRunner().invoke(
+            main, ["build", path.as_posix(), "--directory", output.as_posix(), "--no-cache"]
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertTrue(get_lexicon_paths(output, "a").processed.is_file())
+
+        result = CliRunner().invoke(main, ["build", path.as_posix(), "--dry-run", "--no-cache"])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn("2 distinct inputs", result.output)
+
+        result = CliRunner().invoke(main, ["build", "nope", "--directory", output.as_posix()])
+        self.assertNotEqual(0, result.exit_code)
@@ -0,0 +1,119 @@
+"""Test the input cache."""
+
+import datetime
+import os
+import time
+from unittest import mock
+
+import ssslm
+
+import biolexica
+from biolexica.cache import UNVERSIONED_PREFIX
+from tests.cases import TERMS_1, TERMS_2, LiteralMappingsTestCase
+
+
+class TestInputCache(LiteralMappingsTestCase):
+    """Test the input cache."""
+
+    def test_key(self) -> None:
+        """Test the key changes with the contents of the source file and the arguments."""
+        cache = biolexica.InputCache(self.directory.joinpath("cache"))
+        key = cache.get_key(self.input_1)
+        self.assertIsNotNone(key)
+        self.assertEqual(key, cache.get_key(self.input_1.model_copy()))
+        self.assertNotEqual(
+            key, cache.get_key(self.input_1.model_copy(update={"kwargs": {"x": 1}}))
+        )
+        ssslm.write_literal_mappings(TERMS_2, self.path_1)
+        self.assertNotEqual(key, cache.get_key(self.input_1))
+
+        missing = biolexica.Input(processor="ssslm", source="https://example.com/x.tsv")
+        self.assertIsNone(cache.get_key(missing))
+
+    def test_assemble(self) -> None:
+        """Test only changed inputs are re-extracted."""
+        cache_directory = self.directory.joinpath("cache")
+
+        cache = biolexica.InputCache(cache_directory)
+        expected = biolexica.assemble_terms(
+            self.configuration, include_biosynonyms=False, cache=cache
+        )
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+        cache = biolexica.InputCache(cache_directory)
+        actual = biolexica.assemble_terms(
+            self.configuration, include_biosynonyms=False, cache=cache
+        )
+        self.assertEqual((2, 0), (cache.hits, cache.misses))
+        self.assertEqual([(t.text, t.curie) for t in expected], [(t.text, t.curie) for t in actual])
+
+        ssslm.write_literal_mappings(TERMS_1[:1], self.path_2)
+        cache = biolexica.InputCache(cache_directory)
+        biolexica.assemble_terms(self.configuration, include_biosynonyms=False, cache=cache)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_evict(self) -> None:
+        """Test evicting by size and age."""
+        cache = biolexica.InputCache(self.directory.joinpath("cache"))
+        key_1, key_2 = cache.get_key(self.input_1), cache.get_key(self.input_2)
+        assert key_1 is not None and key_2 is not None  # noqa:S101
+        cache.put(key_1, TERMS_1)
+        cache.put(key_2, TERMS_2)
+        path_1 = cache._get_path(key_1)
+        self.assertTrue(path_1.is_file())
+
+        # make the first one look old
+        old = time.time() - 3600
+        os.utime(path_1, (old, old))
+
+        cache.max_age = datetime.timedelta(minutes=5)
+        self.assertEqual(1, cache.evict())
+        self.assertIsNone(cache.get(key_1))
+        self.assertIsNotNone(cache.get(key_2))
+
+        cache.max_size = 0
+        self.assertEqual(1, cache.evict())
+        self.assertIsNone(cache.get(key_2))
+
+    def test_evict_concurrently(self) -> None:
+        """Test evicting entries that another process removed in the meantime."""
+        cache = biolexica.InputCache(self.directory.joinpath("cache"), evict_on_put=False)
+        key_1, key_2 = cache.get_key(self.input_1), cache.get_key(self.input_2)
+        cache.put(key_1, TERMS_1)
+        cache.put(key_2, TERMS_2)
+        cache.max_size = 0
+        # nothing is evicted when storing literal mappings
+        cache.put(key_2, TERMS_2)
+        self.assertIn(key_1, cache)
+
+        entries = list(cache._iter_entries())
+        self.assertEqual(2, len(entries))
+        entries[0][1].unlink()
+        with mock.patch.object(cache, "_iter_entries", return_value=entries):
+            self.assertEqual(2, cache.evict())
+        self.assertEqual([], list(cache._iter_entries()))
+
+    def test_unversioned(self) -> None:
+        """Test caching inputs whose versions can't be resolved for a limited time."""
+        missing = biolexica.Input(processor="ssslm", source="https://example.org/x.ssslm.tsv")
+        cache = biolexica.InputCache(self.directory.joinpath("cache"))
+        self.assertIsNone(cache.get_key(missing))
+
+        cache.unversioned_max_age = datetime.timedelta(minutes=5)
+        key = cache.get_key(missing)
+        assert key is not None  # noqa:S101
+        self.assertTrue(key.startswith(UNVERSIONED_PREFIX))
+        # inputs with versions are still keyed on them
+        self.assertFalse(str(cache.get_key(self.input_1)).startswith(UNVERSIONED_PREFIX))
+        cache.put(key, TERMS_1)
+        self.assertIn(key, cache)
+        self.assertEqual(TERMS_1, cache.get(key))
+
+        # using the entry doesn't keep it from expiring
+        path = cache._get_path(key)
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+        self.assertNotIn(key, cache)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(1, cache.evict())
+        self.assertFalse(path.is_file())
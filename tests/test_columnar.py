@@ -0,0 +1,104 @@
+"""Test reading and writing literal mappings as Parquet files."""
+
+import importlib.util
+import unittest
+
+import ssslm
+from curies import NamableReference, Reference
+from ssslm import LiteralMapping
+
+import biolexica
+from tests.cases import MAPPINGS, TERMS_1, TERMS_2, TemporaryDirectoryTestCase
+
+LITERAL_MAPPINGS = [
+    *TERMS_1,
+    *TERMS_2,
+    LiteralMapping(
+        reference=NamableReference(prefix="cl", identifier="0000236", name="B cell"),
+        text="B-cell",
+        predicate=Reference(prefix="oboInOwl", identifier="hasExactSynonym"),
+        type=Reference(prefix="OMO", identifier="0003008"),
+        source="efo",
+        provenance=[Reference(prefix="pubmed", identifier="1")],
+    ),
+]
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestColumnar(TemporaryDirectoryTestCase):
+    """Test reading and writing literal mappings as Parquet files."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with a Parquet file."""
+        from biolexica.columnar import write_parquet
+        from biolexica.summary import literal_mappings_to_df
+
+        super().setUp()
+        self.path = self.directory.joinpath("test.ssslm.parquet")
+        write_parquet(literal_mappings_to_df(LITERAL_MAPPINGS), self.path)
+
+    def test_read_literal_mappings(self) -> None:
+        """Test reading literal mappings, optionally filtered by prefix or source."""
+        from biolexica.columnar import read_parquet_literal_mappings
+
+        self.assertEqual(LITERAL_MAPPINGS, read_parquet_literal_mappings(self.path))
+        self.assertEqual(
+            TERMS_2, read_parquet_literal_mappings(self.path, prefixes=["mesh", "efo"])
+        )
+        self.assertEqual(
+            LITERAL_MAPPINGS[-1:], read_parquet_literal_mappings(self.path, sources=["efo"])
+        )
+        self.assertEqual(
+            [], read_parquet_literal_mappings(self.path, prefixes=["mesh"], sources=["efo"])
+        )
+
+    def test_grounder(self) -> None:
+        """Test a grounder from a Parquet file is the same as from literal mappings."""
+        expected = ssslm.make_grounder(LITERAL_MAPPINGS)
+        grounder = biolexica.load_grounder(self.path)
+        self.assertEqual(self._get_entries(expected), self._get_entries(grounder))
+
+        grounder = biolexica.load_grounder(self.path, prefixes=["cl"])
+        self.assertIsNotNone(grounder.get_best_match("B lymphocyte"))
+        self.assertIsNone(grounder.get_best_match("B-Lymphocytes"))
+
+    def _get_entries(self, grounder: ssslm.Grounder) -> dict[str, list[dict[str, str]]]:
+        if not isinstance(grounder, ssslm.GildaGrounder):
+            raise self.failureException(f"not backed by Gilda: {grounder}")
+        return {
+            key: [term.to_json() for term in terms]  # type:ignore[no-untyped-call]
+            for key, terms in grounder._grounder.entries.items()
+        }
+
+    def test_filter_without_parquet(self) -> None:
+        """Test that filtering a grounder that's not from a Parquet file fails."""
+        path = self.directory.joinpath("test.ssslm.tsv")
+        ssslm.write_literal_mappings(LITERAL_MAPPINGS, path)
+        with self.assertRaises(ValueError):
+            biolexica.load_grounder(path, prefixes=["cl"])
+
+    def test_assemble(self) -> None:
+        """Test writing a Parquet file when assembling or streaming literal mappings."""
+        from biolexica.columnar import read_parquet_literal_mappings
+
+        path_1 = self.directory.joinpath("1.ssslm.tsv")
+        path_2 = self.directory.joinpath("2.ssslm.tsv")
+        ssslm.write_literal_mappings(TERMS_1, path_1)
+        ssslm.write_literal_mappings(TERMS_2, path_2)
+        configuration = biolexica.Configuration(
+            inputs=[
+                biolexica.Input(processor="ssslm", source=path_1.as_posix()),
+                biolexica.Input(processor="ssslm", source=path_2.as_posix()),
+            ]
+        )
+        parquet_path = self.directory.joinpath("assembled.ssslm.parquet")
+        expected = biolexica.assemble_terms(
+            configuration, mappings=MAPPINGS, include_biosynonyms=False, parquet_path=parquet_path
+        )
+        self.assertEqual(expected, read_parquet_literal_mappings(parquet_path))
+
+        streamed_path = self.directory.joinpath("streamed.ssslm.parquet")
+        biolexica.stream_terms(
+            configuration, mappings=MAPPINGS, include_biosynonyms=False, parquet_path=streamed_path
+        )
+        self.assertEqual(expected, read_parquet_literal_mappings(streamed_path))
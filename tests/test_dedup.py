@@ -0,0 +1,94 @@
+"""Test deduplicating literal mappings."""
+
+import unittest
+
+from curies import NamableReference, Reference, vocabulary
+from ssslm import LiteralMapping
+
+from biolexica.dedup import deduplicate
+
+B_CELL = NamableReference(prefix="cl", identifier="0000236", name="B cell")
+CELL = NamableReference(prefix="cl", identifier="0000000", name="cell")
+LABEL = Reference(prefix="rdfs", identifier="label")
+EXACT = Reference(prefix="oboInOwl", identifier="hasExactSynonym")
+PMID_1 = Reference(prefix="pubmed", identifier="1")
+PMID_2 = Reference(prefix="pubmed", identifier="2")
+HUMAN = Reference(prefix="NCBITaxon", identifier="9606")
+MOUSE = Reference(prefix="NCBITaxon", identifier="10090")
+
+
+class TestDeduplicate(unittest.TestCase):
+    """Test deduplicating literal mappings."""
+
+    def test_deduplicate(self) -> None:
+        """Test merging literal mappings with the same text and reference."""
+        literal_mappings = [
+            LiteralMapping(
+                reference=B_CELL, text="B lymphocyte", source="mesh", provenance=[PMID_1]
+            ),
+            LiteralMapping(reference=CELL, text="cell", predicate=LABEL, source="cl"),
+            LiteralMapping(
+                reference=B_CELL,
+                text="B  lymphocyte",
+                predicate=EXACT,
+                source="cl",
+                provenance=[PMID_2, PMID_1],
+            ),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", predicate=EXACT, source="efo"),
+            LiteralMapping(reference=B_CELL, text="B lymphocytes", source="cl"),
+        ]
+        actual, removed = deduplicate(literal_mappings)
+        self.assertEqual(
+            [
+                # the exact synonym from the CL is the best, and keeps its own text
+                LiteralMapping(
+                    reference=B_CELL,
+                    text="B  lymphocyte",
+                    predicate=EXACT,
+                    source="cl",
+                    provenance=[PMID_1, PMID_2],
+                ),
+                literal_mappings[1],
+                literal_mappings[4],
+            ],
+            actual,
+        )
+        self.assertEqual({"mesh": 1, "efo": 1}, dict(removed))
+
+    def test_no_duplicates(self) -> None:
+        """Test literal mappings without duplicates are unchanged."""
+        literal_mappings = [
+            LiteralMapping(reference=B_CELL, text="B lymphocyte"),
+            LiteralMapping(reference=CELL, text="B lymphocyte"),
+        ]
+        actual, removed = deduplicate(literal_mappings)
+        self.assertEqual(literal_mappings, actual)
+        self.assertEqual(0, sum(removed.values()))
+
+    def test_language_and_taxon(self) -> None:
+        """Test literal mappings in different languages or for different taxa aren't merged."""
+        literal_mappings = [
+            LiteralMapping(reference=B_CELL, text="B lymphocyte"),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", language="en"),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", language="de"),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", taxon=HUMAN),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", taxon=MOUSE),
+        ]
+        actual, removed = deduplicate(literal_mappings)
+        self.assertEqual(literal_mappings, actual)
+        self.assertEqual(0, sum(removed.values()))
+
+    def test_type(self) -> None:
+        """Test literal mappings with different types are merged, ranking previous names last."""
+        literal_mappings = [
+            LiteralMapping(
+                reference=B_CELL,
+                text="B lymphocyte",
+                predicate=LABEL,
+                type=vocabulary.previous_name,
+            ),
+            LiteralMapping(reference=B_CELL, text="B lymphocyte", type=vocabulary.abbreviation),
+        ]
+        actual, removed = deduplicate(literal_mappings)
+        self.assertEqual([literal_mappings[1]], actual)
+        self.assertEqual({"cl": 1}, dict(removed))
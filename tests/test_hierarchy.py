@@ -0,0 +1,110 @@
+"""Test the hierarchy index."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import networkx as nx
+from curies import NamableReference, ReferenceTuple
+from ssslm import LiteralMapping
+
+from biolexica.hierarchy import ClosureIndex, HierarchyIndex
+
+
+def _r(identifier: str) -> ReferenceTuple:
+    return ReferenceTuple("x", identifier)
+
+
+#: Pairs of a term and its parent, where 4 has two parents
+EDGES = [
+    (_r("2"), _r("1")),
+    (_r("3"), _r("1")),
+    (_r("4"), _r("2")),
+    (_r("4"), _r("3")),
+    (_r("5"), _r("4")),
+    (_r("7"), _r("6")),
+]
+
+#: Sets of ancestors, including ones below each other and ones not in the hierarchy
+ANCESTORS = [[_r("1")], [_r("2"), _r("3")], [_r("1"), _r("4")], [_r("6"), _r("9")], [_r("5")]]
+
+
+class TestHierarchyIndex(unittest.TestCase):
+    """Test the hierarchy index."""
+
+    def test_descendants(self) -> None:
+        """Test getting descendants is the same as with :mod:`networkx`, like in pyobo."""
+        index = HierarchyIndex(EDGES)
+        graph: nx.DiGraph[ReferenceTuple] = nx.DiGraph(EDGES)
+        for ancestors in ANCESTORS:
+            with self.subTest(ancestors=ancestors):
+                expected = set().union(*(nx.ancestors(graph, a) for a in ancestors if a in graph))
+                self.assertEqual(expected, index.get_descendants(ancestors))
+
+    def test_subset(self) -> None:
+        """Test getting the literal mappings under some ancestors, in order."""
+        literal_mappings = [
+            LiteralMapping(
+                reference=NamableReference(prefix="x", identifier=str(i), name=f"term {i}"),
+                text=f"term {i}",
+            )
+            for i in [5, 1, 7, 4, 2]
+        ]
+        index = HierarchyIndex(EDGES)
+        self.assertEqual(
+            ["term 5", "term 4", "term 2"],
+            [lm.text for lm in index.get_subset(literal_mappings, ["x:1"])],
+        )
+
+
+class TestClosureIndex(unittest.TestCase):
+    """Test the descendant closure index."""
+
+    def test_descendants(self) -> None:
+        """Test getting descendants is the same as with the hierarchy index."""
+        hierarchy = HierarchyIndex(EDGES)
+        index = ClosureIndex.from_hierarchy(hierarchy)
+        self.assertEqual(7, len(index.terms))
+        # 4 is below both 2 and 3, but its descendants are still a single range
+        self.assertEqual(1, len(index.intervals[index.positions[_r("3")]]))
+        for ancestors in ANCESTORS:
+            with self.subTest(ancestors=ancestors):
+                self.assertEqual(
+                    hierarchy.get_descendants(ancestors), index.get_descendants(ancestors)
+                )
+
+    def test_cycle(self) -> None:
+        """Test that edges closing a cycle are ignored."""
+        index = ClosureIndex.from_edges(
+            [(_r("2"), _r("1")), (_r("1"), _r("2")), (_r("3"), _r("2"))]
+        )
+        self.assertEqual({_r("2"), _r("3")}, index.get_descendants([_r("1")]))
+
+    def test_subset(self) -> None:
+        """Test getting the literal mappings under some ancestors, in order."""
+        literal_mappings = [
+            LiteralMapping(
+                reference=NamableReference(prefix="x", identifier=str(i), name=f"term {i}"),
+                text=f"term {i}",
+            )
+            for i in [5, 1, 7, 4, 2, 8]
+        ]
+        index = ClosureIndex.from_edges(EDGES)
+        self.assertEqual(
+            ["term 5", "term 4", "term 2"],
+            [lm.text for lm in index.get_subset(literal_mappings, ["x:1"])],
+        )
+        self.assertEqual(
+            ["term 5", "term 7"],
+            [lm.text for lm in index.get_subset(literal_mappings, ["x:6", "x:4"])],
+        )
+
+    def test_io(self) -> None:
+        """Test writing and reading an index."""
+        index = ClosureIndex.from_edges(EDGES)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("x", "1.0", "index.tsv.gz")
+            index.write(path)
+            loaded = ClosureIndex.read(path)
+        self.assertEqual(index.terms, loaded.terms)
+        self.assertEqual(index.intervals, loaded.intervals)
@@ -0,0 +1,50 @@
+"""Test that importing :mod:`biolexica` stays lightweight."""
+
+import subprocess
+import sys
+import unittest
+
+import biolexica
+import biolexica.api
+
+#: Modules that shouldn't be imported until they're needed
+HEAVY = {"curies", "gilda", "pydantic", "pyobo", "semra", "ssslm"}
+
+
+def _get_import_times(module: str) -> dict[str, int]:
+    """Get the cumulative import time in microseconds for each module imported by a module."""
+    result = subprocess.run(  # noqa:S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rv = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rv[name.strip()] = int(cumulative)
+    return rv
+
+
+class TestImport(unittest.TestCase):
+    """Test that importing :mod:`biolexica` stays lightweight."""
+
+    def test_lightweight(self) -> None:
+        """Test importing the package and its CLI doesn't import heavy dependencies."""
+        for module in ["biolexica", "biolexica.cli", "biolexica.configs"]:
+            with self.subTest(module=module):
+                import_times = _get_import_times(module)
+                self.assertEqual(
+                    set(), HEAVY.intersection(name.split(".")[0] for name in import_times)
+                )
+                # this is generous, since the heavy dependencies take several hundred milliseconds
+                self.assertLess(import_times[module], 100_000)
+
+    def test_lazy(self) -> None:
+        """Test the public API is available from the package."""
+        self.assertIs(biolexica.api.load_grounder, biolexica.load_grounder)
+        self.assertIn("load_grounder", dir(biolexica))
+        with self.assertRaises(AttributeError):
+            _ = biolexica.nope
@@ -0,0 +1,100 @@
+"""Test incremental rebuilds of lexica."""
+
+from typing import Any
+from unittest import mock
+
+import ssslm
+from curies import NamableReference
+from ssslm import LiteralMapping
+
+import biolexica
+import biolexica.api
+from biolexica.incremental import get_segments_path
+from tests.cases import MAPPINGS, TERMS_1, LiteralMappingsTestCase
+
+TERMS_1_RENAMED = [
+    TERMS_1[0],
+    LiteralMapping(
+        reference=NamableReference(prefix="cl", identifier="0000236", name="B-cell"),
+        text="B lymphocyte",
+    ),
+]
+
+
+class TestIncremental(LiteralMappingsTestCase):
+    """Test incremental rebuilds of lexica."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with literal mappings files."""
+        super().setUp()
+        self.processed_path = self.directory.joinpath("processed.ssslm.tsv.gz")
+        self.manifest_path = self.directory.joinpath("manifest.json")
+
+    def _build(self, **kwargs: Any) -> list[LiteralMapping]:
+        terms: list[LiteralMapping] = biolexica.assemble_terms(
+            self.configuration, mappings=MAPPINGS, include_biosynonyms=False, **kwargs
+        )
+        return terms
+
+    def _build_incremental(self) -> tuple[list[LiteralMapping], list[str]]:
+        """Build incrementally, and return the sources of the inputs that were extracted."""
+        with mock.patch.object(
+            biolexica.api,
+            "_get_input_literal_mappings",
+            wraps=biolexica.api._get_input_literal_mappings,
+        ) as get_input_literal_mappings:
+            rv = self._build(processed_path=self.processed_path, manifest_path=self.manifest_path)
+        return rv, [call.args[0].source for call in get_input_literal_mappings.call_args_list]
+
+    def _assert_same_as_full(self, actual: list[LiteralMapping]) -> None:
+        full_path = self.directory.joinpath("full.ssslm.tsv.gz")
+        expected = self._build(processed_path=full_path)
+        self.assertEqual(expected, actual)
+        self.assertEqual(
+            ssslm.read_literal_mappings(full_path),
+            ssslm.read_literal_mappings(self.processed_path),
+        )
+
+    def test_unchanged(self) -> None:
+        """Test nothing is extracted again when nothing changed."""
+        self._build_incremental()
+        self.assertTrue(self.manifest_path.is_file())
+        actual, extracted = self._build_incremental()
+        self.assertEqual([], extracted)
+        self._assert_same_as_full(actual)
+
+    def test_changed(self) -> None:
+        """Test only a changed input is extracted again, including names from it."""
+        self._build_incremental()
+        ssslm.write_literal_mappings(TERMS_1_RENAMED, self.path_1)
+        actual, extracted = self._build_incremental()
+        self.assertEqual([self.path_1.as_posix()], extracted)
+        self._assert_same_as_full(actual)
+        # the remapped literal mapping from the reused input gets the new name
+        self.assertIn(("B-Lymphocytes", "B-cell"), {(lm.text, lm.reference.name) for lm in actual})
+
+    def test_stale_artifact(self) -> None:
+        """Test everything is extracted again if the previous artifact doesn't match."""
+        self._build_incremental()
+        ssslm.write_literal_mappings(TERMS_1, get_segments_path(self.manifest_path))
+        actual, extracted = self._build_incremental()
+        self.assertEqual([self.path_1.as_posix(), self.path_2.as_posix()], extracted)
+        self._assert_same_as_full(actual)
+
+    def test_previous_is_processed(self) -> None:
+        """Test the processed literal mappings can't be the previous ones when deduplicating."""
+        with self.assertRaises(ValueError):
+            self._build(
+                processed_path=self.processed_path,
+                manifest_path=self.manifest_path,
+                previous_path=self.processed_path,
+            )
+        self.assertFalse(self.processed_path.exists())
+        # without deduplication, the processed literal mappings are the previous ones
+        self._build(
+            processed_path=self.processed_path,
+            manifest_path=self.manifest_path,
+            previous_path=self.processed_path,
+            deduplicate=False,
+        )
+        self.assertTrue(self.manifest_path.is_file())
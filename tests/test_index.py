@@ -0,0 +1,62 @@
+"""Test memory-mapped grounder indexes."""
+
+import ssslm
+from curies import NamableReference
+from ssslm import LiteralMapping
+
+import biolexica
+from biolexica.index import get_index_path, read_index, write_index
+from tests.cases import TERMS_1, TERMS_2, TemporaryDirectoryTestCase
+
+TERMS = [
+    *TERMS_1,
+    *TERMS_2,
+    LiteralMapping(
+        reference=NamableReference(prefix="cl", identifier="0000084", name="T cell"),
+        text="T-lymphocyte",
+        source="cl",
+    ),
+    LiteralMapping(
+        reference=NamableReference(prefix="cl", identifier="0000540", name="neuron"),
+        text="nerve cell",
+    ),
+]
+
+
+class TestIndex(TemporaryDirectoryTestCase):
+    """Test memory-mapped grounder indexes."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with a literal mappings file."""
+        super().setUp()
+        self.path = self.directory.joinpath("test.ssslm.tsv.gz")
+        ssslm.write_literal_mappings(TERMS, self.path)
+
+    def test_roundtrip(self) -> None:
+        """Test a grounder loaded from an index gives the same results."""
+        self.assertIsNone(read_index(self.path), msg="no index written yet")
+        expected = ssslm.make_grounder(self.path)
+        self.assertEqual(get_index_path(self.path), write_index(self.path))
+
+        actual = read_index(self.path)
+        if actual is None:
+            raise self.failureException("no grounder was loaded")
+        for text in ["cell", "B lymphocyte", "b-lymphocytes", "T lymphocyte", "nope", ""]:
+            self.assertEqual(expected.get_matches(text), actual.get_matches(text), msg=text)
+        text = "The B lymphocyte and the nerve cell are cells, unlike a T-lymphocyte."
+        self.assertEqual(expected.annotate(text), actual.annotate(text))
+
+    def test_stale(self) -> None:
+        """Test an index isn't used after the literal mappings file changes."""
+        write_index(self.path)
+        ssslm.write_literal_mappings(TERMS_1, self.path)
+        self.assertIsNone(read_index(self.path))
+
+    def test_load_grounder(self) -> None:
+        """Test loading a shared grounder writes an index, then uses it."""
+        index_path = get_index_path(self.path)
+        grounder = biolexica.load_grounder(self.path.as_posix(), shared=True)
+        self.assertTrue(index_path.is_file())
+        self.assertEqual(
+            ["mesh:D001402"], [match.curie for match in grounder.get_matches("B-Lymphocytes")]
+        )
@@ -0,0 +1,100 @@
+"""Test instrumenting builds and servers."""
+
+import pstats
+import unittest
+
+import biolexica
+from biolexica.instrument import Metrics, collect_timings, profile, record, timed
+from biolexica.summary import Summary
+from tests.cases import MAPPINGS, TERMS_1, LiteralMappingsTestCase
+
+
+class TestTimings(LiteralMappingsTestCase):
+    """Test timing the stages of a build."""
+
+    def test_collect(self) -> None:
+        """Test that stages with the same name are added together."""
+        record("ignored", 1.0, 1)
+        with collect_timings() as timings:
+            record("a", 1.0, 2)
+            record("a", 0.5, 3)
+            with timed("b") as stage:
+                stage.count = 4
+            with timed("c"):
+                pass
+        record("ignored", 1.0, 1)
+        self.assertEqual(["a", "b", "c"], list(timings))
+        self.assertEqual(1.5, timings["a"].seconds)
+        self.assertEqual(5, timings["a"].count)
+        self.assertEqual(4, timings["b"].count)
+        self.assertIsNone(timings["c"].count)
+
+    def test_summary(self) -> None:
+        """Test that the timings of a build are written to its summary."""
+        summary_path = self.directory.joinpath("summary.json")
+        terms = biolexica.assemble_terms(
+            self.configuration,
+            mappings=MAPPINGS,
+            include_biosynonyms=False,
+            processed_path=self.directory.joinpath("processed.ssslm.tsv"),
+            summary_path=summary_path,
+        )
+        timings = Summary.model_validate_json(summary_path.read_text()).timings
+        self.assertEqual(
+            [
+                f"extract[{self.path_1.as_posix()}]",
+                f"extract[{self.path_2.as_posix()}]",
+                "remapping_index",
+                "remap",
+                "deduplicate",
+                "dataframe",
+                "write_processed",
+                "summarize",
+                "total",
+            ],
+            list(timings),
+        )
+        self.assertEqual(len(TERMS_1), timings[f"extract[{self.path_1.as_posix()}]"].count)
+        self.assertEqual(len(MAPPINGS), timings["remapping_index"].count)
+        self.assertEqual(len(terms), timings["total"].count)
+        self.assertTrue(all(timing.seconds >= 0 for timing in timings.values()))
+
+    def test_profile(self) -> None:
+        """Test profiling with :mod:`cProfile`."""
+        path = self.directory.joinpath("assemble.prof")
+        with profile(path):
+            biolexica.assemble_terms(self.configuration, include_biosynonyms=False)
+        stats = pstats.Stats(path.as_posix())
+        self.assertTrue(
+            any(function == "assemble_terms" for _, _, function in stats.stats)  # type:ignore
+        )
+
+
+class TestMetrics(unittest.TestCase):
+    """Test Prometheus-style metrics."""
+
+    def test_render(self) -> None:
+        """Test rendering counters and histograms in the Prometheus text format."""
+        metrics = Metrics(buckets=[0.1, 1.0])
+        metrics.describe("requests_total", "The number of requests")
+        metrics.inc("requests_total", route="/a")
+        metrics.inc("requests_total", 2, route="/a")
+        metrics.observe("latency_seconds", 0.5, route='/"b"')
+        metrics.observe("latency_seconds", 2.0, route='/"b"')
+        self.assertEqual(3, metrics.get("requests_total", route="/a"))
+        self.assertEqual(2, metrics.get("latency_seconds", route='/"b"'))
+        self.assertEqual(0, metrics.get("requests_total", route="/b"))
+        self.assertEqual(
+            [
+                "# HELP requests_total The number of requests",
+                "# TYPE requests_total counter",
+                'requests_total{route="/a"} 3.0',
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{route="/\\"b\\"",le="0.1"} 0',
+                'latency_seconds_bucket{route="/\\"b\\"",le="1.0"} 1',
+                'latency_seconds_bucket{route="/\\"b\\"",le="+Inf"} 2',
+                'latency_seconds_sum{route="/\\"b\\""} 2.5',
+                'latency_seconds_count{route="/\\"b\\""} 2',
+            ],
+            metrics.render().splitlines(),
+        )
@@ -0,0 +1,82 @@
+"""Test memoizing grounding and annotation."""
+
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import ssslm
+
+import biolexica
+from biolexica.memoize import CacheInfo, CachingGrounder
+from tests.cases import TERMS_1
+
+TEXTS = [
+    "The B lymphocyte is a kind of cell. Nothing to see here.",
+    "Nothing to see here. A cell, another cell, and a B lymphocyte.",
+    "The B lymphocyte is a kind of cell. A cell, another cell, and a B lymphocyte.",
+]
+
+
+class TestMemoize(unittest.TestCase):
+    """Test memoizing grounding and annotation."""
+
+    def setUp(self) -> None:
+        """Set up a grounder."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("test.ssslm.tsv.gz")
+            ssslm.write_literal_mappings(TERMS_1, path)
+            self.grounder = biolexica.load_grounder(path.as_posix(), snapshot=False)
+
+    def test_annotate(self) -> None:
+        """Test annotations are the same as without caching, and sentences are reused."""
+        caching_grounder = CachingGrounder(self.grounder)
+        for text in TEXTS * 2:
+            self.assertEqual(self.grounder.annotate(text), caching_grounder.annotate(text))
+        info = caching_grounder.cache_info()["sentence"]
+        self.assertEqual(3, info.currsize)
+        self.assertEqual(3, info.misses)
+        self.assertEqual(9, info.hits)
+        self.assertEqual(0.75, info.hit_rate)
+
+    def test_get_matches(self) -> None:
+        """Test matches are the same as without caching, and evicted when the cache is full."""
+        caching_grounder = CachingGrounder(self.grounder, span_cache_size=1)
+        for text in ["B lymphocyte", "B lymphocyte", "cell", "B lymphocyte"]:
+            self.assertEqual(
+                self.grounder.get_matches(text), caching_grounder.get_matches(text), msg=text
+            )
+        info = caching_grounder.cache_info()["span"]
+        self.assertEqual((1, 3, 1), (info.hits, info.misses, info.currsize))
+
+        caching_grounder.cache_clear()
+        self.assertEqual(CacheInfo(0, 0, 1, 0), caching_grounder.cache_info()["span"])
+
+    def test_no_context(self) -> None:
+        """Test disambiguation models aren't loaded when there's no context."""
+        caching_grounder = CachingGrounder(self.grounder)
+        with mock.patch("gilda.grounder.load_gilda_models") as load_gilda_models:
+            for text in ["B lymphocyte", "B lymphocyte"]:
+                caching_grounder.get_matches(text)
+        load_gilda_models.assert_not_called()
+        self.assertEqual(1, caching_grounder.cache_info()["span"].hits)
+
+    def test_context_dependent(self) -> None:
+        """Test spans with a disambiguation model aren't cached."""
+        caching_grounder = CachingGrounder(self.grounder)
+        if not isinstance(self.grounder, ssslm.GildaGrounder):
+            raise TypeError
+        self.grounder._grounder.gilda_disambiguators = {"B lymphocyte": {}}  # type:ignore[assignment]
+        for text in TEXTS:
+            caching_grounder.annotate(text)
+        # only the sentence without a B lymphocyte is cached
+        self.assertEqual(1, caching_grounder.cache_info()["sentence"].currsize)
+
+    def test_threads(self) -> None:
+        """Test annotating from several threads."""
+        caching_grounder = CachingGrounder(self.grounder)
+        expected = [self.grounder.annotate(text) for text in TEXTS * 20]
+        with ThreadPoolExecutor(4) as executor:
+            actual = list(executor.map(caching_grounder.annotate, TEXTS * 20))
+        self.assertEqual(expected, actual)
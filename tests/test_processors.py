@@ -0,0 +1,120 @@
+"""Test the processor registry and scheduling inputs by processor."""
+
+import threading
+import unittest
+from importlib.metadata import EntryPoint
+
+import pydantic
+import ssslm
+from ssslm import LiteralMapping
+
+import biolexica
+from biolexica.processors import (
+    ENTRY_POINT_GROUP,
+    ProcessorSpec,
+    _load_entry_point,
+    get_processor,
+    get_processor_names,
+    register_processor,
+)
+from tests.cases import TERMS_1, TERMS_2, LiteralMappingsTestCase
+
+#: The names of the threads that I/O-bound functions ran on
+THREAD_NAMES: list[str] = []
+
+
+def _read_on_thread(inp: biolexica.Input) -> list[LiteralMapping]:
+    THREAD_NAMES.append(threading.current_thread().name)
+    return ssslm.read_literal_mappings(inp.source)
+
+
+def _fetch_on_thread(inp: biolexica.Input) -> biolexica.Input:
+    THREAD_NAMES.append(threading.current_thread().name)
+    return inp.model_copy(update={"source": inp.source.removesuffix(".missing")})
+
+
+IO_PROCESSOR = ProcessorSpec("test-io", _read_on_thread, bound="io")
+FETCH_PROCESSOR = ProcessorSpec(
+    "test-fetch", biolexica.processors._read_ssslm, fetch=_fetch_on_thread
+)
+register_processor(IO_PROCESSOR)
+register_processor(FETCH_PROCESSOR)
+
+
+class TestRegistry(unittest.TestCase):
+    """Test the processor registry."""
+
+    def test_builtin(self) -> None:
+        """Test the built-in processors are registered."""
+        for name in ["pyobo", "bioontologies", "ssslm", "gilda"]:
+            self.assertIn(name, get_processor_names())
+        self.assertEqual("cpu", get_processor("pyobo").bound)
+        self.assertIsNotNone(get_processor("ssslm").fetch)
+
+    def test_unknown(self) -> None:
+        """Test that inputs with unknown processors are invalid."""
+        with self.assertRaises(ValueError):
+            get_processor("nope")
+        with self.assertRaises(pydantic.ValidationError):
+            biolexica.Input(processor="nope", source="nope")
+
+    def test_register_conflict(self) -> None:
+        """Test that a different processor can't be registered with the same name."""
+        register_processor(IO_PROCESSOR)
+        with self.assertRaises(ValueError):
+            register_processor(IO_PROCESSOR._replace(bound="cpu"))
+
+    def test_entry_point(self) -> None:
+        """Test loading processors from entry points."""
+        entry_point = EntryPoint(
+            name="test-io", value="tests.test_processors:IO_PROCESSOR", group=ENTRY_POINT_GROUP
+        )
+        self.assertEqual(IO_PROCESSOR, _load_entry_point(entry_point))
+
+        entry_point = EntryPoint(
+            name="test-function",
+            value="tests.test_processors:_read_on_thread",
+            group=ENTRY_POINT_GROUP,
+        )
+        self.assertEqual(
+            ProcessorSpec("test-function", _read_on_thread), _load_entry_point(entry_point)
+        )
+
+        entry_point = EntryPoint(
+            name="other", value="tests.test_processors:IO_PROCESSOR", group=ENTRY_POINT_GROUP
+        )
+        with self.assertRaises(ValueError):
+            _load_entry_point(entry_point)
+
+
+class TestSchedule(LiteralMappingsTestCase):
+    """Test scheduling inputs based on their processors."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with literal mappings files and reset thread names."""
+        super().setUp()
+        THREAD_NAMES.clear()
+
+    def test_workers(self) -> None:
+        """Test that inputs with different processors give the same result in parallel."""
+        configuration = biolexica.Configuration(
+            inputs=[
+                biolexica.Input(processor="ssslm", source=self.path_1.as_posix()),
+                biolexica.Input(processor="test-io", source=self.path_2.as_posix()),
+                biolexica.Input(processor="test-fetch", source=f"{self.path_1}.missing"),
+            ]
+        )
+        serial = biolexica.assemble_terms(
+            configuration, include_biosynonyms=False, deduplicate=False
+        )
+        self.assertEqual([*TERMS_1, *TERMS_2, *TERMS_1], serial)
+        self.assertEqual(2, len(THREAD_NAMES))
+
+        THREAD_NAMES.clear()
+        parallel = biolexica.assemble_terms(
+            configuration, include_biosynonyms=False, deduplicate=False, workers=2
+        )
+        self.assertEqual(serial, parallel)
+        self.assertEqual(2, len(THREAD_NAMES))
+        for name in THREAD_NAMES:
+            self.assertTrue(name.startswith("biolexica"), msg=name)
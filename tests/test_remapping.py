@@ -0,0 +1,95 @@
+"""Test remapping literal mappings with an index of prioritized mappings."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import semra
+import semra.io
+import ssslm
+from curies import NamableReference
+from semra.pipeline import Configuration
+from ssslm import LiteralMapping
+
+from biolexica.remapping import INDEX_NAME, RemappingIndex, get_remapping_index
+from tests.cases import MAPPINGS, TERMS_1, TERMS_2
+
+
+class TestRemapping(unittest.TestCase):
+    """Test remapping literal mappings with an index of prioritized mappings."""
+
+    def test_remap(self) -> None:
+        """Test remapping gives the same literal mappings as :mod:`ssslm`, in order."""
+        terms = [
+            *TERMS_2,
+            *TERMS_1,
+            LiteralMapping(
+                reference=NamableReference(prefix="mesh", identifier="D000001", name="nope"),
+                text="not remapped",
+            ),
+        ]
+        expected: list[LiteralMapping] = ssslm.remap_literal_mappings(
+            terms, [(mapping.subject, mapping.object) for mapping in MAPPINGS]
+        )
+        actual = list(terms)
+        index = RemappingIndex.from_mappings(MAPPINGS)
+        self.assertEqual(1, index.remap(actual))
+        self.assertEqual(sorted(expected), sorted(actual))
+        self.assertEqual([term.text for term in terms], [term.text for term in actual])
+        self.assertEqual(
+            NamableReference(prefix="cl", identifier="0000236", name="B cell"),
+            actual[0].reference,
+            msg="the name should come from a literal mapping that comes later",
+        )
+
+    def test_projection(self) -> None:
+        """Test that a subject appearing in multiple mappings raises an error."""
+        index = RemappingIndex.from_mappings(MAPPINGS)
+        other = semra.Mapping(
+            subject=MAPPINGS[0].subject,
+            predicate=semra.EXACT_MATCH,
+            object=semra.Reference(prefix="cl", identifier="0000000"),
+        )
+        with self.assertRaises(ValueError):
+            index.add_mappings([other])
+
+    def test_persist(self) -> None:
+        """Test the index is saved next to the prioritized mappings and reused."""
+        with tempfile.TemporaryDirectory() as directory:
+            configuration = Configuration(
+                key="test", name="Test", inputs=[], priority=["cl"], directory=directory
+            )
+            semra.io.write_pickle(MAPPINGS, configuration.priority_pickle_path)
+            index = get_remapping_index(configuration)
+            self.assertEqual(("cl", "0000236", None), index.get("mesh", "D001402"))
+            self.assertTrue(Path(directory).joinpath(INDEX_NAME).is_file())
+
+            with mock.patch.object(Configuration, "get_mappings") as get_mappings:
+                self.assertEqual(index.targets, get_remapping_index(configuration).targets)
+            get_mappings.assert_not_called()
+
+            # the index is rebuilt after the prioritized mappings change
+            semra.io.write_pickle([], configuration.priority_pickle_path)
+            self.assertEqual(0, len(get_remapping_index(configuration)))
+
+    def test_configuration_changed(self) -> None:
+        """Test only the affected semra stages are run again when the configuration changes."""
+        with tempfile.TemporaryDirectory() as directory:
+            configuration = Configuration(
+                key="test", name="Test", inputs=[], priority=["cl"], directory=directory
+            )
+            semra.io.write_pickle(MAPPINGS, configuration.priority_pickle_path)
+            get_remapping_index(configuration)
+
+            # metadata doesn't affect the mappings
+            renamed = configuration.model_copy(update={"name": "Renamed"})
+            with mock.patch.object(Configuration, "get_mappings") as get_mappings:
+                get_remapping_index(renamed)
+            get_mappings.assert_not_called()
+
+            reprioritized = configuration.model_copy(update={"priority": ["mesh", "cl"]})
+            with mock.patch.object(Configuration, "get_mappings", return_value=[]) as get_mappings:
+                get_remapping_index(reprioritized)
+            self.assertTrue(get_mappings.call_args.kwargs["refresh_processed"])
+            self.assertFalse(get_mappings.call_args.kwargs["refresh_raw"])
@@ -0,0 +1,97 @@
+"""Test caching remote lexica."""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import ClassVar
+
+from biolexica.remote import ensure_lexicon
+from tests.cases import TemporaryDirectoryTestCase
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves a single payload with an ETag, like a static file server would."""
+
+    payload: ClassVar[bytes] = b""
+    requests: ClassVar[list[int]] = []
+
+    def do_GET(self) -> None:
+        """Respond to a GET request."""
+        etag = f'"{hashlib.md5(self.payload).hexdigest()}"'  # noqa:S324
+        if self.headers.get("If-None-Match") == etag:
+            self.requests.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.requests.append(200)
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Don't log requests."""
+
+
+class TestRemote(TemporaryDirectoryTestCase):
+    """Test caching remote lexica."""
+
+    def setUp(self) -> None:
+        """Set up a local file server and a temporary cache directory."""
+        super().setUp()
+        _Handler.payload = b"version 1"
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/test.ssslm.tsv.gz"
+
+    def tearDown(self) -> None:
+        """Shut down the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _ensure(self, **kwargs: bool) -> Path:
+        return ensure_lexicon("test", url=self.url, directory=self.directory, **kwargs)
+
+    def test_offline_missing(self) -> None:
+        """Test offline mode fails if there's nothing cached, without using the network."""
+        with self.assertRaises(FileNotFoundError):
+            self._ensure(offline=True)
+        self.assertEqual([], _Handler.requests)
+
+    def test_revalidate(self) -> None:
+        """Test the lexicon is only downloaded again when it changes."""
+        path = self._ensure(offline=False)
+        self.assertEqual(b"version 1", path.read_bytes())
+        self.assertEqual([200], _Handler.requests)
+
+        self.assertEqual(path, self._ensure(offline=False))
+        self.assertEqual(b"version 1", path.read_bytes())
+        self.assertEqual([200, 304], _Handler.requests)
+
+        self.assertEqual(path, self._ensure(offline=True))
+        self.assertEqual([200, 304], _Handler.requests)
+
+        _Handler.payload = b"version 2"
+        self.assertEqual(path, self._ensure(offline=False))
+        self.assertEqual(b"version 2", path.read_bytes())
+        self.assertEqual([200, 304, 200], _Handler.requests)
+
+        self._ensure(offline=False, force=True)
+        self.assertEqual([200, 304, 200, 200], _Handler.requests)
+
+        # no temporary files are left over
+        self.assertEqual(
+            {"test.ssslm.tsv.gz", "test.json"}, {p.name for p in self.directory.iterdir()}
+        )
+
+    def test_unreachable(self) -> None:
+        """Test that the cached file is used when the server can't be reached."""
+        path = self._ensure(offline=False)
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(path, self._ensure(offline=False))
+        self.assertEqual(b"version 1", path.read_bytes())
@@ -0,0 +1,62 @@
+"""Test binary grounder snapshots."""
+
+import os
+from unittest import mock
+
+import ssslm
+
+import biolexica
+from biolexica.snapshot import get_snapshot_path, read_snapshot, write_snapshot
+from tests.cases import TERMS_1, TERMS_2, TemporaryDirectoryTestCase
+
+
+class TestSnapshot(TemporaryDirectoryTestCase):
+    """Test binary grounder snapshots."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with a literal mappings file."""
+        super().setUp()
+        self.data_directory = self.directory.joinpath("data")
+        self.data_directory.mkdir()
+        self.path = self.data_directory.joinpath("test.ssslm.tsv.gz")
+        ssslm.write_literal_mappings(TERMS_1, self.path)
+        # snapshots are written in biolexica's cache directory, which pystow configures
+        self.home = self.directory.joinpath("home")
+        patcher = mock.patch.dict(os.environ, {"BIOLEXICA_HOME": self.home.as_posix()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_roundtrip(self) -> None:
+        """Test a grounder loaded from a snapshot gives the same results."""
+        self.assertIsNone(read_snapshot(self.path), msg="no snapshot written yet")
+        expected = ssslm.make_grounder(self.path)
+        snapshot_path = write_snapshot(self.path)
+        self.assertEqual(get_snapshot_path(self.path), snapshot_path)
+        self.assertTrue(snapshot_path.is_relative_to(self.home))
+
+        actual = read_snapshot(self.path)
+        if actual is None:
+            raise self.failureException("no grounder was loaded")
+        for text in ["cell", "B lymphocyte", "b-lymphocyte", "nope"]:
+            self.assertEqual(expected.get_matches(text), actual.get_matches(text), msg=text)
+        self.assertEqual(
+            expected.annotate("The B lymphocyte is a cell."),
+            actual.annotate("The B lymphocyte is a cell."),
+        )
+
+    def test_stale(self) -> None:
+        """Test a snapshot isn't used after the literal mappings file changes."""
+        write_snapshot(self.path)
+        ssslm.write_literal_mappings([*TERMS_1, *TERMS_2], self.path)
+        self.assertIsNone(read_snapshot(self.path))
+
+    def test_load_grounder(self) -> None:
+        """Test loading a grounder writes a snapshot, then uses it."""
+        snapshot_path = get_snapshot_path(self.path)
+        self.assertFalse(snapshot_path.is_file())
+        first = biolexica.load_grounder(self.path.as_posix())
+        self.assertTrue(snapshot_path.is_file())
+        # nothing is written next to the literal mappings file
+        self.assertEqual([self.path], list(self.data_directory.iterdir()))
+        second = biolexica.load_grounder(self.path.as_posix())
+        self.assertEqual(first.get_matches("cell"), second.get_matches("cell"))
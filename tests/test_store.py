@@ -0,0 +1,78 @@
+"""Test the compact store of literal mappings."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import ssslm
+from curies import NamableReference, NamedReference, Reference
+from ssslm import LiteralMapping
+
+import biolexica
+from biolexica.store import LexiconStore
+from biolexica.summary import literal_mappings_to_df, summarize_terms
+from tests.cases import LITERAL_MAPPINGS, TERMS_1, TERMS_2
+
+
+class TestStore(unittest.TestCase):
+    """Test the compact store of literal mappings."""
+
+    def setUp(self) -> None:
+        """Set up literal mappings with all kinds of fields."""
+        self.literal_mappings = [
+            *LITERAL_MAPPINGS,
+            *TERMS_1,
+            *TERMS_2,
+            # the same predicate as in others, but with another name, which is kept
+            LiteralMapping(
+                reference=NamableReference(prefix="cl", identifier="0000084", name="T cell"),
+                text="T lymphocyte",
+                predicate=NamedReference(
+                    prefix="oboInOwl", identifier="hasExactSynonym", name="exact"
+                ),
+                comment="a comment",
+                contributor=Reference(prefix="orcid", identifier="0000-0003-4423-4370"),
+            ),
+        ]
+
+    def test_sequence(self) -> None:
+        """Test that literal mappings are the same when they're made again."""
+        store = LexiconStore(self.literal_mappings)
+        self.assertEqual(len(self.literal_mappings), len(store))
+        self.assertEqual(["cl", "mesh"], store.prefixes)
+        self.assertEqual(self.literal_mappings, list(store))
+        self.assertEqual(self.literal_mappings[-1], store[-1])
+        self.assertEqual("exact", store[-1].predicate.name)  # type:ignore[attr-defined]
+        self.assertEqual(self.literal_mappings[1:3], store[1:3])
+        with self.assertRaises(IndexError):
+            store[len(store)]
+
+    def test_df(self) -> None:
+        """Test that the dataframe from the columns is the same as from literal mappings."""
+        store = LexiconStore(self.literal_mappings)
+        self.assertTrue(literal_mappings_to_df(self.literal_mappings).equals(store.to_df()))
+        self.assertEqual(summarize_terms(self.literal_mappings), summarize_terms(store))
+
+    def test_assemble(self) -> None:
+        """Test assembling literal mappings into a store."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            directory = Path(directory_str)
+            path = directory.joinpath("terms.ssslm.tsv")
+            ssslm.write_literal_mappings(TERMS_1, path)
+            configuration = biolexica.Configuration(
+                inputs=[biolexica.Input(processor="ssslm", source=path.as_posix())]
+            )
+            expected = biolexica.assemble_terms(
+                configuration, extra_terms=LexiconStore(TERMS_2), include_biosynonyms=False
+            )
+            processed_path = directory.joinpath("processed.ssslm.tsv")
+            store = biolexica.assemble_terms(
+                configuration,
+                extra_terms=LexiconStore(TERMS_2),
+                include_biosynonyms=False,
+                processed_path=processed_path,
+                compact=True,
+            )
+            self.assertIsInstance(store, LexiconStore)
+            self.assertEqual(expected, list(store))
+            self.assertEqual(expected, ssslm.read_literal_mappings(processed_path))
@@ -0,0 +1,73 @@
+"""Test summarizing literal mappings."""
+
+import unittest
+
+from curies import Reference
+from ssslm import LiteralMapping
+
+from biolexica.store import LexiconStore
+from biolexica.summary import SummaryBuilder, summarize_terms
+from tests.cases import B_CELL, LITERAL_MAPPINGS, PMID_1
+
+
+class TestSummary(unittest.TestCase):
+    """Test summarizing literal mappings."""
+
+    def test_summarize(self) -> None:
+        """Test summarizing literal mappings."""
+        summary = summarize_terms(LITERAL_MAPPINGS)
+        self.assertEqual(3, summary.count)
+        self.assertEqual({"pubmed": 2, "doi": 1}, summary.provenance_counter)
+        self.assertEqual({"OMO:0003008": 1}, summary.type_counter)
+        self.assertEqual({"cl": 2}, summary.source_counter)
+        self.assertEqual({"cl": 2, "mesh": 1}, summary.prefix_counter)
+        self.assertEqual(
+            {"oboInOwl:hasRelatedSynonym": 2, "oboInOwl:hasExactSynonym": 1},
+            summary.predicate_counter,
+        )
+        self.assertEqual({"en": 1}, summary.language_counter)
+        self.assertEqual(
+            ["0-4", "5-9", "10-19", "20-39", "40-79", "80-159", "160+"],
+            list(summary.text_length_histogram),
+        )
+        self.assertEqual(1, summary.text_length_histogram["5-9"])
+        self.assertEqual(2, summary.text_length_histogram["10-19"])
+        self.assertEqual(
+            {"1": 1, "2": 2}, {k: v for k, v in summary.word_count_histogram.items() if v}
+        )
+
+    def test_builder(self) -> None:
+        """Test that accumulating a summary in chunks gives the same summary."""
+        summary_builder = SummaryBuilder(chunk_size=2)
+        for literal_mapping in LITERAL_MAPPINGS:
+            summary_builder.add_row(literal_mapping._as_row())
+        self.assertEqual(summarize_terms(LITERAL_MAPPINGS), summary_builder.build())
+
+    def test_provenance_comma(self) -> None:
+        """Test counting the prefixes of provenance whose identifiers have commas."""
+        literal_mappings = [
+            LiteralMapping(
+                reference=B_CELL,
+                text="B cell",
+                provenance=[PMID_1, Reference(prefix="doi", identifier="10.1/a,b")],
+            ),
+        ]
+        expected = {"doi": 1, "pubmed": 1}
+        self.assertEqual(expected, summarize_terms(literal_mappings).provenance_counter)
+        self.assertEqual(
+            expected, summarize_terms(LexiconStore(literal_mappings)).provenance_counter
+        )
+        summary_builder = SummaryBuilder()
+        for literal_mapping in literal_mappings:
+            summary_builder.add_row(
+                literal_mapping._as_row(), [p.prefix for p in literal_mapping.provenance]
+            )
+        self.assertEqual(expected, summary_builder.build().provenance_counter)
+
+    def test_empty(self) -> None:
+        """Test summarizing no literal mappings."""
+        summary = SummaryBuilder().build()
+        self.assertEqual(summarize_terms([]), summary)
+        self.assertEqual(0, summary.count)
+        self.assertEqual({}, summary.prefix_counter)
+        self.assertEqual(0, sum(summary.text_length_histogram.values()))
@@ -0,0 +1,195 @@
+"""Test the web application."""
+
+import gzip
+import json
+from unittest import mock
+
+import ssslm
+from fastapi.testclient import TestClient
+
+from biolexica.cli import _get_available_lexica, _parse_lexica
+from biolexica.web import NDJSON, get_app, get_multi_app
+from tests.cases import TERMS_1, TERMS_2, TemporaryDirectoryTestCase
+
+TEXTS = ["B lymphocyte", "nope", "The B lymphocyte is a kind of cell."] * 5
+
+
+class TestWeb(TemporaryDirectoryTestCase):
+    """Test the web application."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with a literal mappings file."""
+        super().setUp()
+        self.path = self.directory.joinpath("test.ssslm.tsv.gz")
+        ssslm.write_literal_mappings(TERMS_1, self.path)
+        self.grounder = ssslm.make_grounder(self.path)
+
+    def _check(self, client: TestClient) -> None:
+        expected_matches = [
+            [
+                {"curie": m.curie, "name": m.name, "score": m.score}
+                for m in self.grounder.get_matches(text)
+            ]
+            for text in TEXTS
+        ]
+        res = client.post("/api/ground/batch", json={"texts": TEXTS})
+        self.assertEqual(200, res.status_code, msg=res.text)
+        self.assertEqual(expected_matches, res.json())
+
+        expected_annotations = [
+            [(a.start, a.end, a.substr, a.curie) for a in self.grounder.annotate(text)]
+            for text in TEXTS
+        ]
+        res = client.post(
+            "/api/annotate/batch",
+            content=gzip.compress(json.dumps({"texts": TEXTS}).encode("utf-8")),
+            headers={
+                "Content-Encoding": "gzip",
+                "Content-Type": "application/json",
+                "Accept": NDJSON,
+            },
+        )
+        self.assertEqual(200, res.status_code, msg=res.text)
+        self.assertEqual(NDJSON, res.headers["content-type"])
+        self.assertEqual(
+            expected_annotations,
+            [
+                [(a["start"], a["end"], a["text"], a["curie"]) for a in json.loads(line)]
+                for line in res.text.splitlines()
+            ],
+        )
+
+        # a body that isn't gzipped is a bad request
+        res = client.post(
+            "/api/ground/batch",
+            content=json.dumps({"texts": TEXTS}).encode("utf-8"),
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        self.assertEqual(400, res.status_code, msg=res.text)
+        res = client.post(
+            "/api/ground/batch",
+            content=gzip.compress(json.dumps({"texts": TEXTS}).encode("utf-8"))[:-4],
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+        self.assertEqual(400, res.status_code, msg=res.text)
+        # as is one that's too large once it's decompressed
+        with mock.patch("biolexica.web.MAX_BODY_SIZE", 100):
+            res = client.post(
+                "/api/ground/batch",
+                content=gzip.compress(json.dumps({"texts": TEXTS}).encode("utf-8")),
+                headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+            )
+        self.assertEqual(413, res.status_code, msg=res.text)
+
+        # the single-text endpoints are still available
+        res = client.get("/api/ground/B lymphocyte")
+        self.assertEqual(200, res.status_code, msg=res.text)
+
+        res = client.get("/metrics")
+        self.assertEqual(200, res.status_code, msg=res.text)
+        lines = res.text.splitlines()
+        self.assertIn('biolexica_texts_total{operation="ground"} 15.0', lines)
+        self.assertIn('biolexica_texts_total{operation="annotate"} 15.0', lines)
+        self.assertIn(
+            'biolexica_requests_total{method="POST",route="/ground/batch",status="200"} 1.0', lines
+        )
+        self.assertIn('biolexica_chunk_duration_seconds_count{operation="ground"} 4', lines)
+
+    def test_batch(self) -> None:
+        """Test grounding and annotating in batches in a thread."""
+        with TestClient(get_app(self.path.as_posix(), chunk_size=4)) as client:
+            self._check(client)
+
+    def test_batch_workers(self) -> None:
+        """Test grounding and annotating in batches with worker processes."""
+        with TestClient(get_app(self.path.as_posix(), chunk_size=4, workers=2)) as client:
+            self._check(client)
+
+
+class TestMultiApp(TemporaryDirectoryTestCase):
+    """Test serving several lexica from one app."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory with two literal mappings files."""
+        super().setUp()
+        self.path_1 = self.directory.joinpath("one.ssslm.tsv.gz")
+        self.path_2 = self.directory.joinpath("two.ssslm.tsv.gz")
+        ssslm.write_literal_mappings(TERMS_1, self.path_1)
+        ssslm.write_literal_mappings(TERMS_2, self.path_2)
+
+    def test_parse_lexica(self) -> None:
+        """Test parsing lexica from the command line."""
+        self.assertEqual(
+            {"cell": "cell", "one": "a/one.ssslm.tsv.gz", "x": "b/two.ssslm.tsv.gz"},
+            _parse_lexica(("cell", "a/one.ssslm.tsv.gz", "x=b/two.ssslm.tsv.gz")),
+        )
+
+    def test_available_lexica(self) -> None:
+        """Test that only predefined lexica that have been built are served by default."""
+        self.assertEqual(
+            {"cell": "cell", "anatomy": "anatomy", "phenotype": "phenotype"},
+            _get_available_lexica(),
+        )
+
+    def test_multi(self) -> None:
+        """Test routing, lazy loading, unloading, and combined annotation."""
+        lexica = _parse_lexica((self.path_1.as_posix(), self.path_2.as_posix()))
+        app = get_multi_app(lexica, idle_timeout=3600)
+        pool = app.state.pool
+        with TestClient(app) as client:
+            res = client.get("/api/lexica")
+            self.assertEqual({"one": {"loaded": False}, "two": {"loaded": False}}, res.json())
+
+            res = client.get("/api/one/ground/B lymphocyte")
+            self.assertEqual(200, res.status_code, msg=res.text)
+            self.assertEqual(["cl:0000236"], [m["curie"] for m in res.json()[0]])
+            self.assertTrue(pool.is_loaded("one"))
+            self.assertFalse(pool.is_loaded("two"))
+
+            # texts can have slashes in them
+            res = client.get("/api/one/ground/B lymphocyte/cell")
+            self.assertEqual(200, res.status_code, msg=res.text)
+            expected_curies = [m.curie for m in pool.get("one").get_matches("B lymphocyte/cell")]
+            self.assertEqual(expected_curies, [m["curie"] for m in res.json()[0]])
+
+            res = client.post("/api/two/ground/batch", json={"texts": ["B-Lymphocytes"]})
+            self.assertEqual(["mesh:D001402"], [m["curie"] for m in res.json()[0]])
+
+            self.assertEqual(
+                404, client.post("/api/nope/ground/batch", json={"texts": []}).status_code
+            )
+
+            text = "Here are B-Lymphocytes. A B lymphocyte is a kind of cell."
+            expected = sorted(
+                (a.start, a.end, a.curie)
+                for path in [self.path_1, self.path_2]
+                for a in ssslm.make_grounder(path).annotate(text)
+            )
+            self.assertEqual(2, len(expected))
+            res = client.post("/api/annotate/batch", json={"texts": [text]})
+            self.assertEqual(expected, [(a["start"], a["end"], a["curie"]) for a in res.json()[0]])
+            res = client.post("/api/annotate/batch", json={"texts": [text], "lexica": ["two"]})
+            self.assertEqual(["mesh:D001402"], [a["curie"] for a in res.json()[0]])
+
+            metrics = app.state.metrics
+            self.assertEqual(
+                2, metrics.get("biolexica_texts_total", operation="ground", lexicon="one")
+            )
+            self.assertEqual(
+                1,
+                metrics.get(
+                    "biolexica_requests_total",
+                    method="POST",
+                    route="/{lexicon}/ground/batch",
+                    lexicon="unknown",
+                    status="404",
+                ),
+            )
+            # lexica that aren't served don't get their own series
+            client.get("/api/bogus/ground/x")
+            self.assertNotIn('lexicon="bogus"', client.get("/metrics").text)
+
+            self.assertEqual([], pool.unload_idle())
+            pool.idle_timeout = 0
+            self.assertEqual({"one", "two"}, set(pool.unload_idle()))
+            self.assertFalse(pool.is_loaded("one"))